@@ -0,0 +1,6 @@
+import time
+
+# Taken when the app package is first imported, before app.main pulls in its
+# dependencies, so /api/health can show what startup imports cost; heavy ML
+# imports are deferred until a model is actually needed.
+IMPORT_STARTED = time.perf_counter()
@@ -1,7 +1,8 @@
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse, Response
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from app.services.store import build_analytics_payload
+from app.services.exports import REPORT_FIELDS, iter_csv, report_row
+from app.services.store import build_analytics_payload, created_at_bounds, iter_video_records
 
 
 router = APIRouter(prefix="/api")
@@ -14,15 +15,19 @@ async def get_analytics():
 
 
 @router.get("/analytics/report")
-async def download_analytics_report():
-    payload = build_analytics_payload()
-    rows = ["video_name,upload_date,person_count,status"]
-    for item in payload["recent_uploads"]:
-        rows.append(f'{item["videoName"]},{item["uploadDate"]},{item["personCount"]},{item["status"]}')
-
-    csv_data = "\n".join(rows) + "\n"
-    return Response(
-        content=csv_data,
+async def download_analytics_report(
+    date_from: str | None = Query(None, description="ISO date or datetime"),
+    date_to: str | None = Query(None, description="ISO date or datetime (a date includes the whole day)"),
+):
+    # The full upload history, streamed; see /api/videos/export for more columns.
+    try:
+        created_from, created_to = created_at_bounds(date_from, date_to)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    records = iter_video_records(created_from=created_from, created_to=created_to)
+    return StreamingResponse(
+        iter_csv((report_row(record) for _, record in records), REPORT_FIELDS),
         media_type="text/csv",
         headers={"Content-Disposition": 'attachment; filename="analytics_report.csv"'},
     )
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from app.core.config import MODEL_WARMUP
+from app.services.executor import job_executor
+
+
+router = APIRouter(prefix="/api")
+
+
+@router.get("/health")
+async def get_health(request: Request):
+    return JSONResponse(
+        {"success": True, "message": "Service is alive", "data": {"status": "ok", "startup": request.app.state.startup}}
+    )
+
+
+@router.get("/health/ready")
+async def get_readiness():
+    # Without warm-up the model loads on the first job, so the service is
+    # ready as soon as it accepts requests.
+    model_status = job_executor.model_status()
+    models = model_status["models"]
+    ready = not MODEL_WARMUP or (
+        len(models) >= (1 if model_status["mode"] == "thread" else job_executor.max_workers)
+        and all(model["state"] == "ready" and model["warmup_seconds"] is not None for model in models)
+    )
+    payload = {"ready": ready, "model_warmup": MODEL_WARMUP, **model_status, "executor": job_executor.stats()}
+    return JSONResponse(
+        {"success": ready, "message": "Service is ready" if ready else "Model is not loaded yet", "data": payload},
+        status_code=200 if ready else 503,
+    )
@@ -1,22 +1,25 @@
 from datetime import datetime
+import asyncio
+import json
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from app.services.store import get_job_state, load_analytics_records, resolve_processed_video_path
+from app.core.config import EVENTS_KEEPALIVE_SECONDS, EVENTS_MIN_INTERVAL_SECONDS
+from app.services.events import TERMINAL_JOB_STATUSES, job_events
+from app.services.executor import job_executor
+from app.services.store import get_job_state, get_video_record, resolve_processed_video_path
 
 
 router = APIRouter(prefix="/api")
 
 
-@router.get("/jobs/{job_id}")
-async def get_job_status(job_id: str):
+def _resolve_job_status(job_id):
     job = get_job_state(job_id)
     if not job:
-        records = load_analytics_records()
-        record = next((r for r in records if r.get("id") == job_id), None)
+        record = get_video_record(job_id)
         if not record:
-            raise HTTPException(status_code=404, detail="Job not found.")
+            return None
 
         job = {
             "job_id": job_id,
@@ -29,5 +32,141 @@ async def get_job_status(job_id: str):
             "error": record.get("details", {}).get("error"),
             "updated_at": datetime.utcnow().isoformat(),
         }
+    elif job.get("status") == "queued":
+        job["queue_position"] = job_executor.queue_position(job_id)
+
+    return job
+
+
+def _parse_job_ids(raw):
+    return list(dict.fromkeys(job_id.strip() for job_id in raw.split(",") if job_id.strip()))
+
+
+def _with_queue_position(state):
+    if state.get("status") == "queued":
+        state = dict(state)
+        state["queue_position"] = job_executor.queue_position(state.get("job_id", ""))
+    return state
+
+
+@router.get("/jobs/events")
+async def stream_job_events(
+    job_ids: str = Query(..., description="Comma-separated job ids"),
+    min_interval: float = Query(
+        EVENTS_MIN_INTERVAL_SECONDS, ge=0, description="Seconds between updates per job; never below the server minimum"
+    ),
+):
+    requested = _parse_job_ids(job_ids)
+    if not requested:
+        raise HTTPException(status_code=400, detail="At least one job id is required.")
+
+    # Clients may slow updates down but not speed them up past the server limit.
+    subscription = job_events.open(max(EVENTS_MIN_INTERVAL_SECONDS, min_interval))
+    try:
+        # Subscribe before taking the snapshot so no update falls in between.
+        subscription.subscribe(requested)
+    except ValueError as exc:
+        subscription.close()
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    async def event_stream():
+        try:
+            active = set()
+            for job_id in requested:
+                job = _resolve_job_status(job_id)
+                if job is None:
+                    job = {"job_id": job_id, "status": "not_found"}
+                yield _sse_message(job)
+                if job.get("status") not in TERMINAL_JOB_STATUSES and job.get("status") != "not_found":
+                    active.add(job_id)
+
+            while active:
+                updates = await subscription.next_updates(timeout=EVENTS_KEEPALIVE_SECONDS)
+                if not updates:
+                    yield ": keepalive\n\n"
+                    continue
+                for state in updates:
+                    yield _sse_message(_with_queue_position(state))
+                    if state.get("status") in TERMINAL_JOB_STATUSES:
+                        active.discard(state.get("job_id"))
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse_message(job):
+    return f"event: job\ndata: {json.dumps(job, ensure_ascii=True)}\n\n"
+
+
+@router.websocket("/jobs/ws")
+async def job_events_socket(websocket: WebSocket):
+    # Clients send {"subscribe": [...]} / {"unsubscribe": [...]}; every update
+    # to a subscribed job is pushed as {"type": "job", "data": {...}}.
+    await websocket.accept()
+    min_interval = EVENTS_MIN_INTERVAL_SECONDS
+    try:
+        min_interval = max(min_interval, float(websocket.query_params.get("min_interval", min_interval)))
+    except ValueError:
+        pass
+    subscription = job_events.open(min_interval)
+
+    async def receive_commands():
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON objects."})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON objects."})
+                continue
+
+            unsubscribe = [str(job_id) for job_id in message.get("unsubscribe") or []]
+            if unsubscribe:
+                subscription.unsubscribe(unsubscribe)
+
+            subscribe = [str(job_id) for job_id in message.get("subscribe") or []]
+            if subscribe:
+                try:
+                    subscription.subscribe(subscribe)
+                except ValueError as exc:
+                    await websocket.send_json({"type": "error", "detail": str(exc)})
+                    continue
+                for job_id in subscribe:
+                    job = _resolve_job_status(job_id)
+                    if job is None:
+                        await websocket.send_json({"type": "error", "job_id": job_id, "detail": "Job not found."})
+                        subscription.unsubscribe([job_id])
+                    else:
+                        await websocket.send_json({"type": "job", "data": job})
+
+    async def push_updates():
+        while True:
+            for state in await subscription.next_updates():
+                await websocket.send_json({"type": "job", "data": _with_queue_position(state)})
+
+    tasks = [asyncio.create_task(receive_commands()), asyncio.create_task(push_updates())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = _resolve_job_status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
 
     return JSONResponse({"success": True, "message": "Job status fetched successfully", "data": job})
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import METRICS_ENABLED
+from app.services.executor import job_executor
+from app.services.metrics import render_metrics
+
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+
+    stats = job_executor.stats()
+    payload = render_metrics(
+        gauges=[
+            ("video_jobs_in_flight", "Jobs currently processing.", stats["running"]),
+            ("video_jobs_queued", "Jobs waiting in the admission queue.", stats["queued"]),
+            ("video_job_workers", "Maximum jobs processed at once.", stats["max_workers"]),
+        ]
+    )
+    return PlainTextResponse(payload, media_type="text/plain; version=0.0.4")
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import CONFIDENCE_THRESHOLD
+from app.services.streams import stream_manager
+from src.person_count.regions import parse_roi
+
+
+router = APIRouter(prefix="/api")
+
+
+class StreamRequest(BaseModel):
+    source: str
+    name: str = ""
+    confidence: float | None = None
+    roi: str | list | None = None
+
+
+@router.post("/streams")
+async def create_stream(payload: StreamRequest):
+    source = payload.source.strip()
+    if not source:
+        raise HTTPException(status_code=400, detail="A stream source is required.")
+    confidence = CONFIDENCE_THRESHOLD if payload.confidence is None else payload.confidence
+    if not 0.0 < confidence <= 1.0:
+        raise HTTPException(status_code=400, detail="confidence must be between 0 and 1.")
+
+    try:
+        roi = parse_roi(payload.roi)
+        stream = stream_manager.add(source, payload.name.strip() or source, confidence, roi)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    return JSONResponse({"success": True, "message": "Stream registered", "data": stream})
+
+
+@router.get("/streams")
+async def list_streams():
+    return JSONResponse({"success": True, "message": "Streams fetched successfully", "data": stream_manager.list()})
+
+
+@router.get("/streams/{stream_id}")
+async def get_stream(stream_id: str):
+    stream = stream_manager.describe(stream_id, include_window=True)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found.")
+    return JSONResponse({"success": True, "message": "Stream fetched successfully", "data": stream})
+
+
+@router.delete("/streams/{stream_id}")
+async def delete_stream(stream_id: str):
+    if not stream_manager.remove(stream_id):
+        raise HTTPException(status_code=404, detail="Stream not found.")
+    return JSONResponse({"success": True, "message": "Stream removed"})
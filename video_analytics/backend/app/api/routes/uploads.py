@@ -1,35 +1,201 @@
 from datetime import datetime
 from uuid import uuid4
 import os
-import shutil
 
-from fastapi import APIRouter, BackgroundTasks, File, HTTPException, UploadFile
+from fastapi import APIRouter, File, HTTPException, Query, Request, UploadFile
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.requests import ClientDisconnect
 
-from app.core.config import FRAME_STRIDE, UPLOAD_DIR
-from app.services.jobs import process_video_job
-from app.services.store import append_video_record, is_supported_video_upload, set_job_state
+from app.core.config import FRAME_STRIDE, UPLOAD_CHUNK_SIZE, UPLOAD_DIR
+from app.services.executor import QUEUE_FULL_DETAIL, QueueFullError, job_executor
+from app.services.jobs import processing_signature, resolve_processing_mode
+from app.services.result_cache import result_cache, result_cache_key
+from app.services.store import (
+    append_video_record,
+    delete_video_record,
+    is_supported_video_name,
+    is_supported_video_upload,
+    pop_job_state,
+    set_job_state,
+    update_video_record,
+)
+from app.services.uploads import (
+    UploadSessionError,
+    append_upload_chunk,
+    create_upload_session,
+    discard_upload_session,
+    finalize_upload_session,
+    get_upload_session,
+    iter_upload_file,
+    save_upload_stream,
+)
+from src.person_count.regions import parse_roi
 
 
 router = APIRouter()
 
 
+UNSUPPORTED_TYPE_DETAIL = (
+    "Unsupported file type. Please upload a common video format such as MP4, AVI, MOV, MKV, WEBM, FLV, WMV, or MPEG."
+)
+
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    size: int | None = None
+    content_type: str = ""
+
+
+MODE_QUERY = Query(None, description="annotated (default) or analytics (counts only, no rendered video)")
+ROI_QUERY = Query(
+    None,
+    description="Region to detect and count in, as JSON: [x1, y1, x2, y2] or [[x, y], ...] in fractions of the frame",
+)
+
+
+def _new_input_path(safe_name):
+    return os.path.join(str(UPLOAD_DIR), f"{uuid4().hex}_{safe_name}")
+
+
+def _processing_mode(mode):
+    try:
+        return resolve_processing_mode(mode)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _region_of_interest(roi):
+    try:
+        return parse_roi(roi)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @router.post("/upload-video")
-async def upload_video(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def upload_video(file: UploadFile = File(...), mode: str | None = MODE_QUERY, roi: str | None = ROI_QUERY):
     if not is_supported_video_upload(file):
-        raise HTTPException(
-            status_code=400,
-            detail="Unsupported file type. Please upload a common video format such as MP4, AVI, MOV, MKV, WEBM, FLV, WMV, or MPEG.",
-        )
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_TYPE_DETAIL)
+    mode = _processing_mode(mode)
+    roi = _region_of_interest(roi)
+
+    if job_executor.is_saturated():
+        raise HTTPException(status_code=429, detail=QUEUE_FULL_DETAIL)
 
     safe_name = os.path.basename(file.filename or "upload_video.mp4")
-    unique_input_name = f"{uuid4().hex}_{safe_name}"
-    input_path = os.path.join(str(UPLOAD_DIR), unique_input_name)
+    input_path = _new_input_path(safe_name)
+
+    # Chunks are written and hashed on a writer thread so large uploads never
+    # block the event loop.
+    content_hash, _ = await save_upload_stream(iter_upload_file(file), input_path)
+    return _accept_upload(safe_name, input_path, content_hash, mode, roi)
+
+
+@router.post("/upload-video/stream")
+async def upload_video_stream(
+    request: Request, filename: str, mode: str | None = MODE_QUERY, roi: str | None = ROI_QUERY
+):
+    # Raw request body (no multipart), streamed straight to its final path.
+    if not is_supported_video_name(filename, request.headers.get("content-type", "")):
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_TYPE_DETAIL)
+    mode = _processing_mode(mode)
+    roi = _region_of_interest(roi)
+
+    if job_executor.is_saturated():
+        raise HTTPException(status_code=429, detail=QUEUE_FULL_DETAIL)
+
+    safe_name = os.path.basename(filename) or "upload_video.mp4"
+    input_path = _new_input_path(safe_name)
+    try:
+        content_hash, size = await save_upload_stream(request.stream(), input_path)
+    except ClientDisconnect:
+        if os.path.exists(input_path):
+            os.remove(input_path)
+        raise HTTPException(status_code=400, detail="Upload interrupted.")
+
+    if size == 0:
+        os.remove(input_path)
+        raise HTTPException(status_code=400, detail="Upload body is empty.")
+    return _accept_upload(safe_name, input_path, content_hash, mode, roi)
+
+
+def _session_payload(session):
+    return {
+        "upload_id": session["upload_id"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "offset": session["offset"],
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+    }
+
+
+def _session_error(exc):
+    detail = {"message": str(exc)}
+    if exc.offset is not None:
+        detail["offset"] = exc.offset
+    return HTTPException(status_code=exc.status_code, detail=detail)
+
+
+@router.post("/api/uploads")
+async def create_chunked_upload(payload: UploadSessionRequest):
+    if not is_supported_video_name(payload.filename, payload.content_type):
+        raise HTTPException(status_code=400, detail=UNSUPPORTED_TYPE_DETAIL)
+
+    session = create_upload_session(payload.filename, payload.size)
+    return JSONResponse({"success": True, "message": "Upload session created", "data": _session_payload(session)})
+
+
+@router.get("/api/uploads/{upload_id}")
+async def get_chunked_upload(upload_id: str):
+    session = get_upload_session(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload session not found.")
+    return JSONResponse({"success": True, "message": "Upload session fetched successfully", "data": _session_payload(session)})
+
+
+@router.put("/api/uploads/{upload_id}")
+async def put_chunked_upload(upload_id: str, request: Request, offset: int):
+    try:
+        session = await append_upload_chunk(upload_id, offset, request.stream())
+    except UploadSessionError as exc:
+        raise _session_error(exc)
+    except ClientDisconnect:
+        raise HTTPException(status_code=400, detail="Chunk upload interrupted; resume from the current offset.")
+
+    return JSONResponse({"success": True, "message": "Chunk stored", "data": _session_payload(session)})
 
-    with open(input_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
 
+@router.post("/api/uploads/{upload_id}/finalize")
+async def finalize_chunked_upload(upload_id: str, mode: str | None = MODE_QUERY, roi: str | None = ROI_QUERY):
+    mode = _processing_mode(mode)
+    roi = _region_of_interest(roi)
+    # Checked before the file is moved so a rejected finalize can be retried.
+    if job_executor.is_saturated():
+        raise HTTPException(status_code=429, detail=QUEUE_FULL_DETAIL)
+
+    try:
+        safe_name, input_path, content_hash = await finalize_upload_session(upload_id)
+    except UploadSessionError as exc:
+        raise _session_error(exc)
+
+    return _accept_upload(safe_name, input_path, content_hash, mode, roi)
+
+
+@router.delete("/api/uploads/{upload_id}")
+async def abort_chunked_upload(upload_id: str):
+    if get_upload_session(upload_id) is None:
+        raise HTTPException(status_code=404, detail="Upload session not found.")
+    discard_upload_session(upload_id)
+    return JSONResponse({"success": True, "message": "Upload session discarded"})
+
+
+def _accept_upload(safe_name, input_path, content_hash, mode, roi=None):
     job_id = str(uuid4())
+    cache_key = result_cache_key(content_hash, processing_signature(mode, roi))
+    cached = result_cache.lookup(cache_key)
+    if cached is not None:
+        return _complete_from_cache(job_id, safe_name, input_path, cache_key, cached, mode)
+
     record_id = append_video_record(
         video_name=safe_name,
         person_count=0,
@@ -42,18 +208,74 @@ async def upload_video(background_tasks: BackgroundTasks, file: UploadFile = Fil
         job_id,
         record_id=record_id,
         video_name=safe_name,
-        status="processing",
+        status="queued",
+        mode=mode,
         progress=0,
         frame_stride=FRAME_STRIDE,
-        started_at=datetime.utcnow().isoformat(),
+        queued_at=datetime.utcnow().isoformat(),
     )
-    background_tasks.add_task(process_video_job, job_id, record_id, safe_name, input_path)
+
+    try:
+        admission = job_executor.submit(
+            job_id, record_id, safe_name, input_path, {"cache_key": cache_key, "mode": mode, "roi": roi}
+        )
+    except QueueFullError:
+        delete_video_record(record_id)
+        pop_job_state(job_id)
+        if os.path.exists(input_path):
+            os.remove(input_path)
+        raise HTTPException(status_code=429, detail=QUEUE_FULL_DETAIL)
 
     return JSONResponse(
         {
             "message": "Video accepted for processing",
             "job_id": job_id,
-            "status": "processing",
+            "status": admission["status"],
+            "queue_position": admission["queue_position"],
+            "frame_stride": FRAME_STRIDE,
+            "mode": mode,
+        }
+    )
+
+
+def _complete_from_cache(job_id, safe_name, input_path, cache_key, cached, mode):
+    now = datetime.utcnow().isoformat()
+    output_path = cached["output_path"]
+    details = dict(cached["details"], cache_hit=True, cached_from=cached.get("source_record_id", ""))
+    record_id = append_video_record(
+        video_name=safe_name,
+        person_count=cached["person_count"],
+        status="completed",
+        input_path=input_path,
+        output_path=output_path,
+        details=details,
+        record_id=job_id,
+    )
+    update_video_record(record_id, completed_at=now)
+    result_cache.add_ref(cache_key, record_id)
+
+    set_job_state(
+        job_id,
+        record_id=record_id,
+        video_name=safe_name,
+        status="completed",
+        progress=100,
+        frame_stride=FRAME_STRIDE,
+        total_person_count=cached["person_count"],
+        processed_video=f"/outputs/{os.path.basename(output_path)}" if output_path else "",
+        cache_hit=True,
+        started_at=now,
+        completed_at=now,
+    )
+
+    return JSONResponse(
+        {
+            "message": "Video matched a previous upload; results reused",
+            "job_id": job_id,
+            "status": "completed",
+            "queue_position": 0,
             "frame_stride": FRAME_STRIDE,
+            "mode": mode,
+            "cache_hit": True,
         }
     )
@@ -1,23 +1,125 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from datetime import datetime
+from uuid import uuid4
+import asyncio
 import os
 
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.services.aggregates import video_upload_summary
+from app.services.executor import QUEUE_FULL_DETAIL, QueueFullError, job_executor
+from app.services.exports import VIDEO_EXPORT_FIELDS, iter_csv, iter_ndjson, video_export_row
+from app.services.jobs import discard_output
+from app.services.result_cache import result_cache
 from app.services.store import (
-    load_analytics_records,
+    created_at_bounds,
+    delete_video_record,
+    get_job_state,
+    get_video_record,
+    iter_video_records,
+    list_processed_outputs,
+    needs_output_listing,
+    list_video_records,
     pop_job_state,
     records_lock,
+    resolve_detections_path,
     resolve_processed_video_path,
-    save_analytics_records,
+    resolve_series_path,
+    set_job_state,
+    update_video_record,
 )
+from src.person_count.encoders import remove_hls_segments, remove_video_output
+from src.person_count.replay import recount
+from src.person_count.series import SERIES_RESOLUTIONS, SERIES_SUFFIX, CountSeries
+
+
+class RecountRequest(BaseModel):
+    confidence: float | None = Field(default=None, ge=0, le=1)
+    bucket_seconds: int = Field(default=1, ge=1)
+    save: bool = False
+
+
+class RerenderRequest(BaseModel):
+    confidence: float | None = Field(default=None, ge=0, le=1)
 
 
 router = APIRouter(prefix="/api")
 
 
+VIDEO_STATUSES = ("processing", "completed", "failed")
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+STATUS_QUERY = Query(None, description="processing, completed or failed")
+DATE_FROM_QUERY = Query(None, description="ISO date or datetime; records created at or after it")
+DATE_TO_QUERY = Query(None, description="ISO date or datetime; records created up to it (a date includes the whole day)")
+NAME_PREFIX_QUERY = Query(None, description="Video name prefix (case-sensitive)")
+SERIES_MAX_POINTS = 5000
+
+
+def _record_filters(status, date_from, date_to, name_prefix):
+    if status is not None and status not in VIDEO_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unsupported status: {status}")
+    try:
+        created_from, created_to = created_at_bounds(date_from, date_to)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"status": status, "created_from": created_from, "created_to": created_to, "name_prefix": name_prefix}
+
+
+@router.get("/videos")
+async def list_videos(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    status: str | None = STATUS_QUERY,
+    date_from: str | None = DATE_FROM_QUERY,
+    date_to: str | None = DATE_TO_QUERY,
+    name_prefix: str | None = NAME_PREFIX_QUERY,
+):
+    # Newest first; the cursor marks the last record returned.
+    filters = _record_filters(status, date_from, date_to, name_prefix)
+    try:
+        records, next_cursor = list_video_records(limit, cursor=cursor, **filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    # Legacy records without an output_path are matched against one listing
+    # of outputs/ for the whole page.
+    processed_outputs = list_processed_outputs() if needs_output_listing(records) else None
+    return JSONResponse(
+        {
+            "success": True,
+            "message": "Videos fetched successfully",
+            "data": {
+                "videos": [video_upload_summary(record, processed_outputs) for record in records],
+                "next_cursor": next_cursor,
+            },
+        }
+    )
+
+
+@router.get("/videos/export")
+async def export_videos(
+    format: str = Query("csv", description="csv or ndjson"),
+    status: str | None = STATUS_QUERY,
+    date_from: str | None = DATE_FROM_QUERY,
+    date_to: str | None = DATE_TO_QUERY,
+    name_prefix: str | None = NAME_PREFIX_QUERY,
+):
+    # Streams every matching record, newest first, without holding them in memory.
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson.")
+    filters = _record_filters(status, date_from, date_to, name_prefix)
+    rows = (video_export_row(record) for _, record in iter_video_records(**filters))
+    body = iter_csv(rows, VIDEO_EXPORT_FIELDS) if format == "csv" else iter_ndjson(rows)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="videos.{format}"'},
+    )
+
+
 @router.get("/videos/{video_id}")
 async def get_video_details(video_id: str):
-    records = load_analytics_records()
-    record = next((r for r in records if r.get("id") == video_id), None)
+    record = get_video_record(video_id)
     if not record:
         raise HTTPException(status_code=404, detail="Video record not found.")
 
@@ -37,7 +139,60 @@ async def get_video_details(video_id: str):
                 "personCount": int(record.get("person_count", 0)),
                 "status": record.get("status", "failed"),
                 "processedVideo": processed_video,
-                "details": record.get("details", {}),
+                # Per-second counts are served by /videos/{video_id}/series.
+                "details": {
+                    key: value for key, value in (record.get("details", {}) or {}).items() if key != "counts_per_second"
+                },
+            },
+        }
+    )
+
+
+def _load_series(record):
+    series_path = resolve_series_path(record)
+    if series_path:
+        return CountSeries(series_path)
+    # Records from before series files kept the per-second counts inline.
+    points = (record.get("details", {}) or {}).get("counts_per_second")
+    if points is not None:
+        return CountSeries.from_points(points)
+    return None
+
+
+@router.get("/videos/{video_id}/series")
+async def get_video_series(
+    video_id: str,
+    resolution: str = Query("auto", description="auto, 1s, 10s, 1m or 10m"),
+    max_points: int = Query(600, ge=1, le=SERIES_MAX_POINTS),
+):
+    record = get_video_record(video_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Video record not found.")
+    if resolution != "auto" and resolution not in SERIES_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported resolution: {resolution}")
+
+    try:
+        series = await asyncio.to_thread(_load_series, record)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    if series is None:
+        raise HTTPException(status_code=404, detail="No count series for this video.")
+
+    # auto picks the finest resolution that fits in max_points buckets.
+    bucket_seconds = series.bucket_seconds_for(max_points) if resolution == "auto" else SERIES_RESOLUTIONS[resolution]
+    points = await asyncio.to_thread(series.points, bucket_seconds)
+    details = record.get("details", {}) or {}
+    return JSONResponse(
+        {
+            "success": True,
+            "message": "Video series fetched successfully",
+            "data": {
+                "resolution": next(name for name, seconds in SERIES_RESOLUTIONS.items() if seconds == bucket_seconds),
+                "bucket_seconds": bucket_seconds,
+                "available": list(SERIES_RESOLUTIONS),
+                "peak_count": series.peak_count,
+                "duration_seconds": details.get("duration_seconds", 0),
+                "points": points,
             },
         }
     )
@@ -46,24 +201,129 @@ async def get_video_details(video_id: str):
 @router.delete("/videos/{video_id}")
 async def delete_video(video_id: str):
     with records_lock:
-        records = load_analytics_records()
-        record_index = next((idx for idx, r in enumerate(records) if r.get("id") == video_id), None)
-        if record_index is None:
+        record = delete_video_record(video_id)
+        if record is None:
             raise HTTPException(status_code=404, detail="Video record not found.")
 
-        record = records[record_index]
         input_path = record.get("input_path", "")
         output_path = record.get("output_path", "")
+        detections_path = resolve_detections_path(record)
+        series_path = resolve_series_path(record)
 
         if input_path and os.path.exists(input_path):
             os.remove(input_path)
 
-        if output_path and os.path.exists(output_path):
-            os.remove(output_path)
-
-        records.pop(record_index)
-        save_analytics_records(records)
+        # Outputs reused from the result cache may be shared with other records.
+        output_retained = result_cache.release(video_id, output_path)
+        if output_path and not output_retained:
+            remove_video_output(output_path)
+        # HLS segments left by an interrupted job are never shared.
+        remove_hls_segments(output_path)
+        if detections_path and not result_cache.is_retained(detections_path):
+            os.remove(detections_path)
+        if series_path and not result_cache.is_retained(series_path):
+            os.remove(series_path)
 
+    # A job already running finds its record gone and discards its outputs.
+    for job_id in job_executor.cancel_record(video_id):
+        pop_job_state(job_id)
     pop_job_state(video_id)
 
     return JSONResponse({"success": True, "message": "Video deleted permanently"})
+
+
+def _completed_record_with_detections(video_id):
+    record = get_video_record(video_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Video record not found.")
+    if record.get("status") != "completed":
+        raise HTTPException(status_code=409, detail="Video has not finished processing.")
+
+    detections_path = resolve_detections_path(record)
+    if not detections_path:
+        raise HTTPException(status_code=404, detail="No stored detections for this video.")
+    return record, detections_path
+
+
+@router.post("/videos/{video_id}/recount")
+async def recount_video(video_id: str, payload: RecountRequest):
+    record, detections_path = _completed_record_with_detections(video_id)
+    if payload.save and payload.bucket_seconds != 1:
+        raise HTTPException(status_code=400, detail="Only 1-second buckets can be saved to the record.")
+
+    # A saved recount gets a new series file; the current one may be shared
+    # through the result cache.
+    series_path = os.path.join(os.path.dirname(detections_path), f"recount_{uuid4().hex}{SERIES_SUFFIX}")
+    try:
+        result = await asyncio.to_thread(
+            recount,
+            detections_path,
+            payload.confidence,
+            payload.bucket_seconds,
+            series_path if payload.save else None,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if payload.save:
+        previous_series = resolve_series_path(record)
+        details = dict(record.get("details", {}) or {})
+        details.pop("counts_per_second", None)
+        details.update(
+            confidence=result["confidence"],
+            peak_count=result["peak_count"],
+            unique_persons=result["unique_persons"],
+            series_file=os.path.basename(series_path),
+            recounted_at=datetime.utcnow().isoformat(),
+        )
+        update_video_record(video_id, person_count=result["person_count"], details=details)
+        discard_output(previous_series)
+
+    return JSONResponse({"success": True, "message": "Video recounted successfully", "data": result})
+
+
+@router.post("/videos/{video_id}/rerender")
+async def rerender_video(video_id: str, payload: RerenderRequest):
+    record, detections_path = _completed_record_with_detections(video_id)
+
+    job = get_job_state(video_id)
+    if job and job.get("status") in ("queued", "processing"):
+        raise HTTPException(status_code=409, detail="Video already has a job in progress.")
+
+    input_path = record.get("input_path", "")
+    if not input_path or not os.path.exists(input_path):
+        raise HTTPException(status_code=404, detail="Source video is no longer available.")
+
+    video_name = record.get("video_name", "unknown")
+    set_job_state(
+        video_id,
+        record_id=video_id,
+        video_name=video_name,
+        status="queued",
+        task="rerender",
+        progress=0,
+        error=None,
+        queued_at=datetime.utcnow().isoformat(),
+    )
+    options = {
+        "task": "rerender",
+        "detections_path": detections_path,
+        "confidence": payload.confidence,
+        "details": record.get("details", {}),
+        "previous_output": record.get("output_path", ""),
+        "previous_series": resolve_series_path(record),
+    }
+    try:
+        admission = job_executor.submit(video_id, video_id, video_name, input_path, options)
+    except QueueFullError:
+        pop_job_state(video_id)
+        raise HTTPException(status_code=429, detail=QUEUE_FULL_DETAIL)
+
+    return JSONResponse(
+        {
+            "message": "Video accepted for re-rendering",
+            "job_id": video_id,
+            "status": admission["status"],
+            "queue_position": admission["queue_position"],
+        }
+    )
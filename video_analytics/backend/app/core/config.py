@@ -21,7 +21,58 @@ def _parse_origins(raw_origins: str) -> list[str]:
 UPLOAD_DIR = _resolve_dir("VIDEO_UPLOAD_DIR", "uploads")
 OUTPUT_DIR = _resolve_dir("VIDEO_OUTPUT_DIR", "outputs")
 ANALYTICS_STORE = OUTPUT_DIR / "analytics_data.json"
+ANALYTICS_DB = OUTPUT_DIR / "analytics.db"
+RESULT_CACHE_INDEX = OUTPUT_DIR / "result_cache.json"
+STREAMS_STORE = OUTPUT_DIR / "streams.json"
+RESULT_CACHE_ENABLED = os.getenv("VIDEO_RESULT_CACHE_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+RESULT_CACHE_MAX_BYTES = max(0, int(os.getenv("VIDEO_RESULT_CACHE_MAX_BYTES", str(10 * 1024 ** 3))))
+MODEL_PATH = BACKEND_DIR / "models" / "yolo11n.pt"
+INFERENCE_BACKEND = os.getenv("VIDEO_INFERENCE_BACKEND", "pytorch").strip().lower()
+INFERENCE_IMGSZ = max(32, int(os.getenv("VIDEO_INFERENCE_IMGSZ", "640")))
+DETECT_MAX_SIDE = max(0, int(os.getenv("VIDEO_DETECT_MAX_SIDE", "0")))
+MODEL_WARMUP = os.getenv("VIDEO_MODEL_WARMUP", "true").strip().lower() in {"1", "true", "yes", "on"}
+STORE_BACKEND = os.getenv("VIDEO_STORE_BACKEND", "sqlite").strip().lower()
+PROCESSING_MODE = os.getenv("VIDEO_PROCESSING_MODE", "annotated").strip().lower()
 FRAME_STRIDE = max(1, int(os.getenv("VIDEO_FRAME_STRIDE", "3")))
+SAMPLING_MODE = os.getenv("VIDEO_SAMPLING_MODE", "grab").strip().lower()
+CONFIDENCE_THRESHOLD = float(os.getenv("VIDEO_CONFIDENCE_THRESHOLD", "0.25"))
+DETECT_INTERVAL = max(1, int(os.getenv("VIDEO_DETECT_INTERVAL", "1")))
+MOTION_GATING = os.getenv("VIDEO_MOTION_GATING", "false").strip().lower() in {"1", "true", "yes", "on"}
+MOTION_THRESHOLD = max(0.0, float(os.getenv("VIDEO_MOTION_THRESHOLD", "0.01")))
+MOTION_MAX_SKIP = max(0, int(os.getenv("VIDEO_MOTION_MAX_SKIP", "10")))
+DETECTIONS_SIDECAR = os.getenv("VIDEO_DETECTIONS_SIDECAR", "true").strip().lower() in {"1", "true", "yes", "on"}
+DETECTION_FLOOR = min(CONFIDENCE_THRESHOLD, max(0.0, float(os.getenv("VIDEO_DETECTION_FLOOR", "0.05"))))
+INFERENCE_SERVER = os.getenv("VIDEO_INFERENCE_SERVER", "false").strip().lower() in {"1", "true", "yes", "on"}
+INFERENCE_SERVER_MAX_BATCH = max(1, int(os.getenv("VIDEO_INFERENCE_SERVER_MAX_BATCH", "16")))
+INFERENCE_SERVER_MAX_WAIT_MS = max(0.0, float(os.getenv("VIDEO_INFERENCE_SERVER_MAX_WAIT_MS", "5")))
+SEGMENT_WORKERS = max(1, int(os.getenv("VIDEO_SEGMENT_WORKERS", "1")))
+SEGMENT_MIN_SECONDS = max(1, int(os.getenv("VIDEO_SEGMENT_MIN_SECONDS", "60")))
+INFERENCE_BATCH_SIZE = max(1, int(os.getenv("VIDEO_INFERENCE_BATCH_SIZE", "1")))
+DECODE_QUEUE_SIZE = max(1, int(os.getenv("VIDEO_DECODE_QUEUE_SIZE", "8")))
+RESULT_QUEUE_SIZE = max(1, int(os.getenv("VIDEO_RESULT_QUEUE_SIZE", "8")))
+ENCODER_MODE = os.getenv("VIDEO_ENCODER_MODE", "pipe").strip().lower()
+HLS_SEGMENT_SECONDS = max(1, int(os.getenv("VIDEO_HLS_SEGMENT_SECONDS", "4")))
+FFMPEG_PRESET = os.getenv("VIDEO_FFMPEG_PRESET", "veryfast").strip()
+FFMPEG_CRF = int(os.getenv("VIDEO_FFMPEG_CRF", "23"))
+FFMPEG_THREADS = max(0, int(os.getenv("VIDEO_FFMPEG_THREADS", "0")))
+UPLOAD_CHUNK_SIZE = max(64 * 1024, int(os.getenv("VIDEO_UPLOAD_CHUNK_SIZE", str(1024 * 1024))))
+UPLOAD_BUFFER_CHUNKS = max(1, int(os.getenv("VIDEO_UPLOAD_BUFFER_CHUNKS", "8")))
+# The inference server batches jobs that share a process, so it needs
+# thread-mode jobs; that is the default when it is enabled.
+JOB_EXECUTOR = os.getenv("VIDEO_JOB_EXECUTOR", "thread" if INFERENCE_SERVER else "process").strip().lower()
+if INFERENCE_SERVER and JOB_EXECUTOR != "thread":
+    raise ValueError("VIDEO_INFERENCE_SERVER=true requires VIDEO_JOB_EXECUTOR=thread.")
+JOB_WORKERS = max(1, int(os.getenv("VIDEO_JOB_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))))
+JOB_MAX_QUEUE = max(0, int(os.getenv("VIDEO_JOB_MAX_QUEUE", "16")))
+JOB_WORKER_THREADS = max(0, int(os.getenv("VIDEO_JOB_WORKER_THREADS", "0")))
+EVENTS_MIN_INTERVAL_SECONDS = max(0.0, float(os.getenv("VIDEO_EVENTS_MIN_INTERVAL_SECONDS", "0.5")))
+EVENTS_MAX_JOBS_PER_SUBSCRIBER = max(1, int(os.getenv("VIDEO_EVENTS_MAX_JOBS_PER_SUBSCRIBER", "100")))
+EVENTS_KEEPALIVE_SECONDS = max(1.0, float(os.getenv("VIDEO_EVENTS_KEEPALIVE_SECONDS", "15")))
+METRICS_ENABLED = os.getenv("VIDEO_METRICS_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+STREAMS_MAX = max(0, int(os.getenv("VIDEO_STREAMS_MAX", "8")))
+STREAM_MAX_INFER_FPS = max(0.0, float(os.getenv("VIDEO_STREAM_MAX_INFER_FPS", "5")))
+STREAM_WINDOW_SECONDS = max(1, int(os.getenv("VIDEO_STREAM_WINDOW_SECONDS", "300")))
+STREAM_RECONNECT_SECONDS = max(0.5, float(os.getenv("VIDEO_STREAM_RECONNECT_SECONDS", "5")))
 CORS_ALLOW_ORIGINS = _parse_origins(os.getenv("CORS_ALLOW_ORIGINS", "*"))
 SUPPORTED_VIDEO_EXTENSIONS = {
     ".mp4",
@@ -1,20 +1,45 @@
+from contextlib import asynccontextmanager
+import time
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app import IMPORT_STARTED
 from app.api.routes.analytics import router as analytics_router
+from app.api.routes.health import router as health_router
 from app.api.routes.jobs import router as jobs_router
+from app.api.routes.metrics import router as metrics_router
+from app.api.routes.streams import router as streams_router
 from app.api.routes.uploads import router as uploads_router
 from app.api.routes.videos import router as videos_router
-from app.core.config import CORS_ALLOW_ORIGINS, OUTPUT_DIR, UPLOAD_DIR
-from app.services.store import ensure_storage_dirs
+from app.core.config import CORS_ALLOW_ORIGINS, METRICS_ENABLED, MODEL_WARMUP, OUTPUT_DIR, UPLOAD_DIR
+from app.services.executor import job_executor
+from app.services.metrics import RequestLatencyMiddleware
+from app.services.store import ensure_storage_dirs, rebuild_analytics_aggregates
+from app.services.streams import stream_manager
+
+IMPORT_SECONDS = round(time.perf_counter() - IMPORT_STARTED, 3)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start = time.perf_counter()
+    rebuild_analytics_aggregates()
+    job_executor.start(warm_up=MODEL_WARMUP)
+    stream_manager.start()
+    app.state.startup["startup_seconds"] = round(time.perf_counter() - start, 3)
+    yield
+    stream_manager.shutdown()
+    job_executor.shutdown()
 
 
 def create_app() -> FastAPI:
     ensure_storage_dirs()
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
+    app.state.startup = {"import_seconds": IMPORT_SECONDS, "startup_seconds": None}
     app.add_middleware(
         CORSMiddleware,
         allow_origins=CORS_ALLOW_ORIGINS,
@@ -22,12 +47,17 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    if METRICS_ENABLED:
+        app.add_middleware(RequestLatencyMiddleware)
 
     app.mount("/outputs", StaticFiles(directory=str(OUTPUT_DIR)), name="outputs")
     app.include_router(uploads_router)
     app.include_router(jobs_router)
     app.include_router(analytics_router)
     app.include_router(videos_router)
+    app.include_router(health_router)
+    app.include_router(metrics_router)
+    app.include_router(streams_router)
 
     return app
 
@@ -0,0 +1,222 @@
+from datetime import datetime, timedelta
+from threading import RLock
+
+
+RECENT_LIMIT = 10
+RECENT_FIELDS = ("id", "video_name", "created_at", "person_count", "status", "output_path")
+RECENT_DETAILS = ("duration_seconds", "processing_mode")
+
+
+def _created_at(record):
+    try:
+        return datetime.fromisoformat(record.get("created_at", ""))
+    except (TypeError, ValueError):
+        return None
+
+
+def _completed_contribution(record):
+    if not record or record.get("status") != "completed":
+        return None
+
+    created_at = _created_at(record)
+    return {
+        "day": created_at.date().isoformat() if created_at else None,
+        "hour": created_at.strftime("%Y-%m-%dT%H") if created_at else None,
+        "persons": int(record.get("person_count", 0)),
+        "duration": float((record.get("details", {}) or {}).get("duration_seconds") or 0),
+    }
+
+
+class AnalyticsAggregates:
+    # Dashboard rollups kept up to date from store writes, so /api/analytics
+    # never has to scan the full history. Only completed records contribute to
+    # totals and rollups; the recent-uploads ring tracks every record.
+    def __init__(self, recent_limit=RECENT_LIMIT):
+        self.recent_limit = recent_limit
+        self._lock = RLock()
+        self.ready = False
+        self._reset()
+
+    def _reset(self):
+        self.total_videos = 0
+        self.total_persons = 0
+        self.total_processing_seconds = 0.0
+        self.daily_detections = {}
+        self.hourly = {}
+        self._recent = {}
+        self._recent_completed = {}
+
+    def rebuild(self, records):
+        with self._lock:
+            self._reset()
+            completed = []
+            for record in records:
+                contribution = _completed_contribution(record)
+                self._apply_contribution(contribution, 1)
+                if contribution is not None:
+                    completed.append(record)
+
+            self._fill_rings(records[-self.recent_limit:], completed[-self.recent_limit:])
+            self.ready = True
+
+    def _apply_contribution(self, contribution, sign):
+        if contribution is None:
+            return
+
+        self.total_videos += sign
+        self.total_persons += sign * contribution["persons"]
+        self.total_processing_seconds += sign * contribution["duration"]
+
+        day = contribution["day"]
+        if day is not None:
+            self.daily_detections[day] = self.daily_detections.get(day, 0) + sign * contribution["persons"]
+
+        hour = contribution["hour"]
+        if hour is not None:
+            bucket = self.hourly.setdefault(hour, {"uploads": 0, "detections": 0})
+            bucket["uploads"] += sign
+            bucket["detections"] += sign * contribution["persons"]
+            if bucket["uploads"] <= 0:
+                self.hourly.pop(hour, None)
+
+    # Both rings are ordered by created_at, which the store assigns at insert
+    # time, so a record's position is known without asking the store. Recent
+    # uploads keep the record fields rather than a summary: processedVideo
+    # depends on outputs/ and is resolved when a snapshot is read.
+    def _set_recent(self, record):
+        self._recent[record.get("id", "")] = (record.get("created_at", ""), _recent_fields(record))
+        _trim(self._recent, self.recent_limit)
+
+    def _set_recent_completed(self, record):
+        self._recent_completed[record.get("id", "")] = (record.get("created_at", ""), _per_video_summary(record))
+        _trim(self._recent_completed, self.recent_limit)
+
+    def _fill_rings(self, latest, latest_completed):
+        self._recent = {}
+        self._recent_completed = {}
+        for record in latest:
+            self._set_recent(record)
+        for record in latest_completed:
+            self._set_recent_completed(record)
+
+    def _refill(self, refill):
+        # Only needed when a ring loses an entry and the next-newest record has
+        # to come back from the store.
+        if refill is not None:
+            self._fill_rings(*refill(self.recent_limit))
+
+    def record_inserted(self, record):
+        with self._lock:
+            if not self.ready:
+                return
+
+            self._set_recent(record)
+            contribution = _completed_contribution(record)
+            self._apply_contribution(contribution, 1)
+            if contribution is not None:
+                self._set_recent_completed(record)
+
+    def record_updated(self, previous, record, refill=None):
+        with self._lock:
+            if not self.ready:
+                return
+
+            self._apply_contribution(_completed_contribution(previous), -1)
+            self._apply_contribution(_completed_contribution(record), 1)
+
+            record_id = record.get("id", "")
+            if record_id in self._recent:
+                self._set_recent(record)
+
+            if record.get("status") == "completed":
+                self._set_recent_completed(record)
+            elif record_id in self._recent_completed:
+                self._recent_completed.pop(record_id)
+                self._refill(refill)
+
+    def record_deleted(self, record, refill=None):
+        with self._lock:
+            if not self.ready or record is None:
+                return
+
+            self._apply_contribution(_completed_contribution(record), -1)
+            record_id = record.get("id", "")
+            tracked = record_id in self._recent or record_id in self._recent_completed
+            self._recent.pop(record_id, None)
+            self._recent_completed.pop(record_id, None)
+            if tracked:
+                self._refill(refill)
+
+    def snapshot(self, now=None):
+        now = now or datetime.utcnow()
+        with self._lock:
+            current_hour = now.replace(minute=0, second=0, microsecond=0)
+            hourly_analytics = []
+            for hours_ago in range(11, -1, -1):
+                hour_start = current_hour - timedelta(hours=hours_ago)
+                bucket = self.hourly.get(hour_start.strftime("%Y-%m-%dT%H"), {})
+                hourly_analytics.append({
+                    "hour": hour_start.strftime("%H:00"),
+                    "detections": bucket.get("detections", 0),
+                    "uploads": bucket.get("uploads", 0),
+                })
+
+            person_count_per_video = [
+                dict(item) for _, item in sorted(self._recent_completed.values(), key=lambda entry: entry[0])
+            ]
+            recent = [record for _, record in sorted(self._recent.values(), key=lambda entry: entry[0], reverse=True)]
+            snapshot = {
+                "total_videos": self.total_videos,
+                "total_persons": self.total_persons,
+                "total_processing_time_seconds": self.total_processing_seconds,
+                "todays_detections": self.daily_detections.get(now.date().isoformat(), 0),
+                "hourly_analytics": hourly_analytics,
+                "person_count_per_video": person_count_per_video,
+            }
+
+        # Imported lazily: store imports this module to publish its writes.
+        from app.services.store import list_processed_outputs, needs_output_listing
+
+        processed_outputs = list_processed_outputs() if needs_output_listing(recent) else None
+        snapshot["recent_uploads"] = [video_upload_summary(record, processed_outputs) for record in recent]
+        return snapshot
+
+
+def _trim(ring, limit):
+    while len(ring) > limit:
+        oldest = min(ring, key=lambda key: ring[key][0])
+        ring.pop(oldest)
+
+
+def _recent_fields(record):
+    details = record.get("details", {}) or {}
+    fields = {key: record[key] for key in RECENT_FIELDS if key in record}
+    fields["details"] = {key: details[key] for key in RECENT_DETAILS if key in details}
+    return fields
+
+
+def _per_video_summary(record):
+    return {
+        "video": record.get("video_name", "unknown"),
+        "count": int(record.get("person_count", 0)),
+    }
+
+
+def video_upload_summary(record, processed_outputs=None):
+    # Imported lazily: store imports this module to publish its writes.
+    from app.services.store import resolve_processed_video_path
+
+    created_at = record.get("created_at", "")
+    upload_date = created_at.split("T")[0] if "T" in created_at else created_at
+    return {
+        "id": record.get("id", ""),
+        "videoName": record.get("video_name", "unknown"),
+        "uploadDate": upload_date,
+        "personCount": int(record.get("person_count", 0)),
+        "status": record.get("status", "completed"),
+        "processedVideo": resolve_processed_video_path(record, processed_outputs),
+        "processingTimeSeconds": float((record.get("details", {}) or {}).get("duration_seconds") or 0),
+    }
+
+
+analytics_aggregates = AnalyticsAggregates()
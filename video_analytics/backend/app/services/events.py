@@ -0,0 +1,102 @@
+from threading import Lock
+import asyncio
+import time
+
+from app.core.config import EVENTS_MAX_JOBS_PER_SUBSCRIBER
+
+
+TERMINAL_JOB_STATUSES = {"completed", "failed"}
+
+
+class JobSubscription:
+    # One subscriber (an SSE stream or WebSocket). Updates are coalesced per
+    # job, so a slow or rate-limited subscriber only ever sees the latest state
+    # of each job instead of a growing backlog.
+    def __init__(self, broker, loop, min_interval):
+        self._broker = broker
+        self._loop = loop
+        self._lock = Lock()
+        self._pending = {}
+        self._wake = asyncio.Event()
+        self.min_interval = min_interval
+        self.job_ids = set()
+        self._last_sent = 0.0
+
+    def offer(self, job_id, state):
+        with self._lock:
+            self._pending[job_id] = state
+        self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def next_updates(self, timeout=None):
+        # Returns coalesced states (oldest job first), or [] on timeout.
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+        delay = self._last_sent + self.min_interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        with self._lock:
+            updates = list(self._pending.values())
+            self._pending.clear()
+            self._wake.clear()
+        self._last_sent = time.monotonic()
+        return updates
+
+    def subscribe(self, job_ids):
+        self._broker._add_jobs(self, job_ids)
+
+    def unsubscribe(self, job_ids):
+        self._broker._remove_jobs(self, job_ids)
+
+    def close(self):
+        self._broker._remove_jobs(self, list(self.job_ids))
+
+
+class JobEventBroker:
+    def __init__(self, max_jobs_per_subscriber=100):
+        self.max_jobs_per_subscriber = max_jobs_per_subscriber
+        self._lock = Lock()
+        self._subscribers = {}
+
+    def open(self, min_interval):
+        return JobSubscription(self, asyncio.get_running_loop(), min_interval)
+
+    def _add_jobs(self, subscription, job_ids):
+        with self._lock:
+            if len(subscription.job_ids | set(job_ids)) > self.max_jobs_per_subscriber:
+                raise ValueError(f"At most {self.max_jobs_per_subscriber} jobs per subscription.")
+            for job_id in job_ids:
+                subscription.job_ids.add(job_id)
+                self._subscribers.setdefault(job_id, set()).add(subscription)
+
+    def _remove_jobs(self, subscription, job_ids):
+        with self._lock:
+            for job_id in job_ids:
+                subscription.job_ids.discard(job_id)
+                subscribers = self._subscribers.get(job_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        self._subscribers.pop(job_id, None)
+
+    def publish(self, job_id, state):
+        # Called from whichever thread updated the job; only hands the state
+        # over to each subscriber's event loop.
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.offer(job_id, state)
+            except RuntimeError:
+                # The subscriber's loop has shut down.
+                self._remove_jobs(subscription, [job_id])
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+
+job_events = JobEventBroker(max_jobs_per_subscriber=EVENTS_MAX_JOBS_PER_SUBSCRIBER)
@@ -0,0 +1,297 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from threading import RLock, Thread
+import multiprocessing
+import os
+import time
+
+from app.core.config import (
+    INFERENCE_BACKEND,
+    INFERENCE_IMGSZ,
+    JOB_EXECUTOR,
+    JOB_MAX_QUEUE,
+    JOB_WORKER_THREADS,
+    JOB_WORKERS,
+)
+from app.services.jobs import discard_output, remember_result, run_video_job
+from app.services.metrics import job_queue_depth, job_queue_wait_seconds, record_job_metrics
+from app.services.store import set_job_state, update_video_record
+from src.person_count.count import model_registry
+
+
+QUEUE_FULL_DETAIL = "Processing queue is full. Please retry later."
+
+
+class QueueFullError(Exception):
+    pass
+
+
+# Worker-process side. Job state and store writes are forwarded to the API
+# process so JOBS and the analytics store keep a single writer.
+_worker_events = None
+
+
+def _init_worker(events, torch_threads, warm_up):
+    global _worker_events
+    _worker_events = events
+
+    if torch_threads > 0:
+        try:
+            import torch
+
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+
+    # Each worker holds its own copy of the model; warming it here means the
+    # first job on this worker does not pay for the load.
+    if warm_up:
+        try:
+            model_registry.warm_up(INFERENCE_BACKEND, INFERENCE_IMGSZ)
+        except Exception:
+            pass
+        _forward("record_worker_model")(os.getpid(), model_registry.status(INFERENCE_BACKEND, INFERENCE_IMGSZ))
+
+
+def _warm_worker():
+    return os.getpid()
+
+
+# Model state reported by each worker process, keyed by pid.
+worker_models = {}
+
+
+def record_worker_model(pid, status):
+    worker_models[pid] = status
+
+
+# Calls a worker may make; they are replayed in the API process in order.
+_FORWARDED_CALLS = {
+    "set_job_state": set_job_state,
+    "update_video_record": update_video_record,
+    "remember_result": remember_result,
+    "discard_output": discard_output,
+    "record_worker_model": record_worker_model,
+    "record_job_metrics": record_job_metrics,
+}
+
+
+def _forward(name):
+    def call(*args, **kwargs):
+        _worker_events.put((name, args, kwargs))
+
+    return call
+
+
+def _run_job_in_worker(job_id, record_id, safe_name, input_path, options):
+    run_video_job(
+        job_id,
+        record_id,
+        safe_name,
+        input_path,
+        options,
+        set_state=_forward("set_job_state"),
+        update_record=_forward("update_video_record"),
+        cache_result=_forward("remember_result"),
+        discard=_forward("discard_output"),
+        observe=_forward("record_job_metrics"),
+    )
+
+
+class JobExecutor:
+    # FIFO admission in front of a fixed-size worker pool: at most max_workers
+    # jobs run at once and at most max_queue wait behind them.
+    def __init__(self, mode="process", max_workers=1, max_queue=16, worker_threads=0):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unsupported job executor mode: {mode}")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.worker_threads = worker_threads
+        self.warm_up = False
+        self._lock = RLock()
+        self._pending = deque()
+        self._running = set()
+        self._submitted_at = {}
+        self._pool = None
+        self._events = None
+        self._listener = None
+
+    def _ensure_pool(self):
+        if self._pool is not None:
+            return self._pool
+
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="video-job")
+            return self._pool
+
+        ctx = multiprocessing.get_context("spawn")
+        if self._events is None:
+            self._events = ctx.Queue()
+            self._listener = Thread(target=self._apply_worker_events, name="video-job-events", daemon=True)
+            self._listener.start()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self._events, self.worker_threads, self.warm_up),
+        )
+        return self._pool
+
+    def start(self, warm_up=False):
+        # Called at app startup. With warm_up, the model is loaded ahead of the
+        # first job: in the background here for thread mode, or by starting
+        # every worker process (their initializer warms up) for process mode.
+        self.warm_up = warm_up
+        if not warm_up:
+            return
+        if self.mode == "thread":
+            model_registry.warm_up_in_background(INFERENCE_BACKEND, INFERENCE_IMGSZ)
+            return
+        with self._lock:
+            pool = self._ensure_pool()
+            for _ in range(self.max_workers):
+                pool.submit(_warm_worker)
+
+    def model_status(self):
+        if self.mode == "thread":
+            return {"mode": self.mode, "models": [model_registry.status(INFERENCE_BACKEND, INFERENCE_IMGSZ)]}
+        return {"mode": self.mode, "models": [dict(status, pid=pid) for pid, status in worker_models.items()]}
+
+    def _apply_worker_events(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            name, args, kwargs = event
+            try:
+                _FORWARDED_CALLS[name](*args, **kwargs)
+            except Exception:
+                # A failed store write must not stop updates for other jobs.
+                continue
+
+    def is_saturated(self):
+        with self._lock:
+            return len(self._running) >= self.max_workers and len(self._pending) >= self.max_queue
+
+    def submit(self, job_id, record_id, safe_name, input_path, options=None):
+        job = (job_id, record_id, safe_name, input_path, options or {})
+        with self._lock:
+            job_queue_depth.observe(len(self._pending))
+            if len(self._running) < self.max_workers:
+                self._dispatch(job)
+                return {"status": "processing", "queue_position": 0}
+
+            if len(self._pending) >= self.max_queue:
+                raise QueueFullError("Processing queue is full.")
+
+            self._submitted_at[job_id] = time.monotonic()
+            self._pending.append(job)
+            return {"status": "queued", "queue_position": len(self._pending)}
+
+    def _publish_queue_positions(self):
+        for position, job in enumerate(self._pending, start=1):
+            set_job_state(job[0], queue_position=position)
+
+    def queue_position(self, job_id):
+        with self._lock:
+            for position, job in enumerate(self._pending, start=1):
+                if job[0] == job_id:
+                    return position
+        return 0
+
+    def cancel(self, job_id):
+        with self._lock:
+            for job in self._pending:
+                if job[0] == job_id:
+                    self._pending.remove(job)
+                    self._submitted_at.pop(job_id, None)
+                    self._publish_queue_positions()
+                    return True
+        return False
+
+    def cancel_record(self, record_id):
+        # Drops every queued job for record_id (upload jobs have their own
+        # job_id) and returns their job ids.
+        with self._lock:
+            job_ids = [job[0] for job in self._pending if job[1] == record_id]
+        return [job_id for job_id in job_ids if self.cancel(job_id)]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": len(self._running),
+                "queued": len(self._pending),
+            }
+
+    def _dispatch(self, job):
+        job_id = job[0]
+        now = time.monotonic()
+        job_queue_wait_seconds.observe(now - self._submitted_at.pop(job_id, now))
+        target = run_video_job if self.mode == "thread" else _run_job_in_worker
+        pool = self._ensure_pool()
+        try:
+            future = pool.submit(target, *job)
+        except BrokenProcessPool:
+            self._pool = None
+            pool = self._ensure_pool()
+            future = pool.submit(target, *job)
+
+        self._running.add(job_id)
+        future.add_done_callback(lambda f, job=job, pool=pool: self._on_job_done(job, pool, f))
+
+    def _on_job_done(self, job, pool, future):
+        job_id, record_id, options = job[0], job[1], job[4]
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            # Jobs record their own failures; this only covers workers that
+            # died before they could report back. A failed re-render leaves
+            # the record's existing results in place.
+            if options.get("task") != "rerender":
+                update_video_record(
+                    record_id,
+                    person_count=0,
+                    status="failed",
+                    details={"error": "Video processing failed."},
+                    completed_at=datetime.utcnow().isoformat(),
+                )
+            set_job_state(
+                job_id,
+                status="failed",
+                error="Video processing failed.",
+                completed_at=datetime.utcnow().isoformat(),
+            )
+
+        with self._lock:
+            self._running.discard(job_id)
+            if isinstance(error, BrokenProcessPool) and self._pool is pool:
+                self._pool = None
+            dispatched = False
+            while self._pending and len(self._running) < self.max_workers:
+                self._dispatch(self._pending.popleft())
+                dispatched = True
+            if dispatched:
+                self._publish_queue_positions()
+
+    def shutdown(self):
+        with self._lock:
+            self._pending.clear()
+            pool, self._pool = self._pool, None
+
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if self._events is not None:
+            self._events.put(None)
+
+
+job_executor = JobExecutor(
+    mode=JOB_EXECUTOR,
+    max_workers=JOB_WORKERS,
+    max_queue=JOB_MAX_QUEUE,
+    worker_threads=JOB_WORKER_THREADS,
+)
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+
+
+# Rows are written in chunks so a streamed export makes one response write
+# per chunk rather than per record.
+EXPORT_CHUNK_ROWS = 500
+
+VIDEO_EXPORT_FIELDS = (
+    "id",
+    "video_name",
+    "status",
+    "created_at",
+    "completed_at",
+    "person_count",
+    "peak_count",
+    "unique_persons",
+    "duration_seconds",
+    "processing_mode",
+)
+REPORT_FIELDS = ("video_name", "upload_date", "person_count", "status")
+
+
+def video_export_row(record):
+    details = record.get("details", {}) or {}
+    return {
+        "id": record.get("id", ""),
+        "video_name": record.get("video_name", ""),
+        "status": record.get("status", ""),
+        "created_at": record.get("created_at", ""),
+        "completed_at": record.get("completed_at", ""),
+        "person_count": int(record.get("person_count", 0)),
+        "peak_count": details.get("peak_count"),
+        "unique_persons": details.get("unique_persons"),
+        "duration_seconds": details.get("duration_seconds"),
+        "processing_mode": details.get("processing_mode"),
+    }
+
+
+def report_row(record):
+    created_at = record.get("created_at", "")
+    return {
+        "video_name": record.get("video_name", "unknown"),
+        "upload_date": created_at.split("T")[0] if "T" in created_at else created_at,
+        "person_count": int(record.get("person_count", 0)),
+        "status": record.get("status", ""),
+    }
+
+
+def iter_csv(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for index, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if index % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=True, separators=(",", ":")))
+        if len(lines) == EXPORT_CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
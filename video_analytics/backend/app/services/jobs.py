@@ -1,13 +1,158 @@
 from datetime import datetime
 import os
+import time
 
-from app.core.config import FRAME_STRIDE, OUTPUT_DIR
-from app.services.store import set_job_state, update_video_record
-from src.person_count.count import process_video
+from app.core.config import (
+    CONFIDENCE_THRESHOLD,
+    DECODE_QUEUE_SIZE,
+    DETECT_MAX_SIDE,
+    DETECTION_FLOOR,
+    DETECTIONS_SIDECAR,
+    DETECT_INTERVAL,
+    ENCODER_MODE,
+    FFMPEG_CRF,
+    FFMPEG_PRESET,
+    FFMPEG_THREADS,
+    FRAME_STRIDE,
+    HLS_SEGMENT_SECONDS,
+    INFERENCE_BACKEND,
+    INFERENCE_BATCH_SIZE,
+    INFERENCE_IMGSZ,
+    INFERENCE_SERVER,
+    INFERENCE_SERVER_MAX_BATCH,
+    INFERENCE_SERVER_MAX_WAIT_MS,
+    MODEL_PATH,
+    MOTION_GATING,
+    MOTION_MAX_SKIP,
+    MOTION_THRESHOLD,
+    OUTPUT_DIR,
+    PROCESSING_MODE,
+    RESULT_QUEUE_SIZE,
+    SAMPLING_MODE,
+    SEGMENT_MIN_SECONDS,
+    SEGMENT_WORKERS,
+)
+from app.services.metrics import record_job_metrics
+from app.services.result_cache import result_cache
+from app.services.store import get_video_record, set_job_state, update_video_record
+from src.person_count.detections import SIDECAR_SUFFIX
+from src.person_count.encoders import remove_hls_segments, remove_video_output
+from src.person_count.replay import rerender
+from src.person_count.segments import process_video_segmented
+from src.person_count.series import SERIES_SUFFIX
 
 
-def process_video_job(job_id, record_id, safe_name, input_path):
-    set_job_state(
+PROCESSING_MODES = ("annotated", "analytics")
+
+
+def resolve_processing_mode(mode=None):
+    mode = (mode or PROCESSING_MODE).strip().lower()
+    if mode not in PROCESSING_MODES:
+        raise ValueError(f"Unsupported processing mode: {mode}")
+    return mode
+
+
+def processing_signature(mode="annotated", roi=None):
+    # Settings that change the produced output; part of the result cache key.
+    model_mtime = int(os.path.getmtime(MODEL_PATH)) if os.path.exists(MODEL_PATH) else 0
+    return {
+        "mode": mode,
+        "model": os.path.basename(MODEL_PATH),
+        "model_mtime": model_mtime,
+        "inference_backend": INFERENCE_BACKEND,
+        "imgsz": INFERENCE_IMGSZ,
+        "detect_max_side": DETECT_MAX_SIDE,
+        "roi": roi,
+        "frame_stride": FRAME_STRIDE,
+        "confidence": CONFIDENCE_THRESHOLD,
+        "detect_interval": DETECT_INTERVAL,
+        # Tracking restarts per segment, which can change unique_persons.
+        "segment_workers": SEGMENT_WORKERS,
+        "detection_floor": DETECTION_FLOOR if DETECTIONS_SIDECAR else None,
+        "motion_threshold": MOTION_THRESHOLD if MOTION_GATING else None,
+        "motion_max_skip": MOTION_MAX_SKIP if MOTION_GATING else None,
+    }
+
+
+def remember_result(cache_key, record_id, output_path, person_count, details):
+    # Runs after the job's final record write. A record deleted while its job
+    # ran is not cached: nothing would ever release the entry, so the job's
+    # files are discarded instead.
+    if get_video_record(record_id) is None:
+        discard_output(output_path)
+        for key in ("detections_file", "series_file"):
+            if details.get(key):
+                discard_output(os.path.join(str(OUTPUT_DIR), details[key]))
+        return
+    if cache_key:
+        result_cache.put(cache_key, record_id, output_path, person_count, details)
+
+
+def discard_output(output_path):
+    # Outputs, sidecars and count series shared through the result cache stay
+    # until the cache drops them.
+    if not output_path or result_cache.is_retained(output_path):
+        return
+    if output_path.endswith((SIDECAR_SUFFIX, SERIES_SUFFIX)):
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    else:
+        remove_video_output(output_path)
+
+
+def run_video_job(
+    job_id,
+    record_id,
+    safe_name,
+    input_path,
+    options=None,
+    set_state=set_job_state,
+    update_record=update_video_record,
+    cache_result=remember_result,
+    discard=discard_output,
+    observe=record_job_metrics,
+):
+    options = options or {}
+    if options.get("task") == "rerender":
+        rerender_video_job(job_id, record_id, safe_name, input_path, options, set_state, update_record, discard)
+    else:
+        process_video_job(
+            job_id, record_id, safe_name, input_path, options, set_state, update_record, cache_result, observe
+        )
+
+
+def _timed(fn, timings, stage):
+    def call(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+    return call
+
+
+def process_video_job(
+    job_id,
+    record_id,
+    safe_name,
+    input_path,
+    options=None,
+    set_state=set_job_state,
+    update_record=update_video_record,
+    cache_result=remember_result,
+    observe=record_job_metrics,
+):
+    options = options or {}
+    # Analytics-only jobs skip drawing and encoding; the sidecar is always
+    # kept for them so the annotated video can still be rendered later.
+    render = options.get("mode", "annotated") != "analytics"
+    # Job state and record writes; the final record write is only in the metrics.
+    store_timings = {}
+    set_state = _timed(set_state, store_timings, "store")
+    update_record = _timed(update_record, store_timings, "store")
+
+    set_state(
         job_id,
         record_id=record_id,
         video_name=safe_name,
@@ -18,7 +163,7 @@ def process_video_job(job_id, record_id, safe_name, input_path):
     )
 
     def on_progress(progress, processed_frames, total_frames):
-        set_job_state(
+        set_state(
             job_id,
             status="processing",
             progress=progress,
@@ -26,14 +171,50 @@ def process_video_job(job_id, record_id, safe_name, input_path):
             total_frames=total_frames,
         )
 
+    def on_playlist(playlist_path):
+        # Served from /outputs, like the finished video.
+        set_state(job_id, playlist=f"/outputs/{os.path.relpath(playlist_path, str(OUTPUT_DIR))}")
+
     try:
-        output_path, total_count, details = process_video(
+        output_path, total_count, details = process_video_segmented(
             input_path,
             str(OUTPUT_DIR),
+            workers=SEGMENT_WORKERS,
+            min_segment_seconds=SEGMENT_MIN_SECONDS,
             frame_stride=FRAME_STRIDE,
             progress_callback=on_progress,
+            batch_size=INFERENCE_BATCH_SIZE,
+            decode_queue_size=DECODE_QUEUE_SIZE,
+            result_queue_size=RESULT_QUEUE_SIZE,
+            encoder_mode=ENCODER_MODE,
+            ffmpeg_preset=FFMPEG_PRESET,
+            ffmpeg_crf=FFMPEG_CRF,
+            ffmpeg_threads=FFMPEG_THREADS,
+            hls_segment_seconds=HLS_SEGMENT_SECONDS,
+            playlist_callback=on_playlist,
+            sampling_mode=SAMPLING_MODE,
+            confidence=CONFIDENCE_THRESHOLD,
+            motion_threshold=MOTION_THRESHOLD if MOTION_GATING else None,
+            motion_max_skip=MOTION_MAX_SKIP,
+            detect_interval=DETECT_INTERVAL,
+            save_detections=DETECTIONS_SIDECAR or not render,
+            detection_floor=DETECTION_FLOOR,
+            render=render,
+            backend=INFERENCE_BACKEND,
+            imgsz=INFERENCE_IMGSZ,
+            roi=options.get("roi"),
+            detect_max_side=DETECT_MAX_SIDE,
+            inference_server=(
+                {"max_batch_size": INFERENCE_SERVER_MAX_BATCH, "max_wait_seconds": INFERENCE_SERVER_MAX_WAIT_MS / 1000}
+                if INFERENCE_SERVER
+                else None
+            ),
         )
-        update_video_record(
+        output_path = output_path or ""
+        # The HLS segments are removed below once the job is completed.
+        details.pop("hls_playlist", None)
+        details["timings"]["store"] = round(store_timings.get("store", 0.0), 3)
+        update_record(
             record_id,
             person_count=total_count,
             status="completed",
@@ -41,39 +222,130 @@ def process_video_job(job_id, record_id, safe_name, input_path):
             details=details,
             completed_at=datetime.utcnow().isoformat(),
         )
-        set_job_state(
+        cache_result(options.get("cache_key"), record_id, output_path, total_count, details)
+        set_state(
             job_id,
             status="completed",
             progress=100,
             total_person_count=total_count,
-            processed_video=f"/outputs/{os.path.basename(output_path)}",
+            processed_video=f"/outputs/{os.path.basename(output_path)}" if output_path else "",
+            playlist="",
             completed_at=datetime.utcnow().isoformat(),
         )
+        remove_hls_segments(output_path)
+        wall_seconds = details.get("wall_seconds") or 0
+        observe(
+            dict(details["timings"], store=store_timings.get("store", 0.0)),
+            details["sampled_frames"] / wall_seconds if wall_seconds > 0 else 0,
+        )
     except ValueError as exc:
-        update_video_record(
+        update_record(
             record_id,
             person_count=0,
             status="failed",
             details={"error": str(exc)},
             completed_at=datetime.utcnow().isoformat(),
         )
-        set_job_state(
+        set_state(
             job_id,
             status="failed",
             error=str(exc),
             completed_at=datetime.utcnow().isoformat(),
         )
     except Exception:
-        update_video_record(
+        update_record(
             record_id,
             person_count=0,
             status="failed",
             details={"error": "Video processing failed."},
             completed_at=datetime.utcnow().isoformat(),
         )
-        set_job_state(
+        set_state(
             job_id,
             status="failed",
             error="Video processing failed.",
             completed_at=datetime.utcnow().isoformat(),
         )
+
+
+def rerender_video_job(
+    job_id,
+    record_id,
+    safe_name,
+    input_path,
+    options,
+    set_state=set_job_state,
+    update_record=update_video_record,
+    discard=discard_output,
+):
+    # Re-draws the annotated video from the detection sidecar; the record
+    # keeps its previous output until the new one is complete.
+    set_state(
+        job_id,
+        record_id=record_id,
+        video_name=safe_name,
+        status="processing",
+        task="rerender",
+        progress=0,
+        started_at=datetime.utcnow().isoformat(),
+    )
+
+    def on_progress(progress, processed_frames, total_frames):
+        set_state(
+            job_id,
+            status="processing",
+            progress=progress,
+            processed_frames=processed_frames,
+            total_frames=total_frames,
+        )
+
+    try:
+        output_path, total_count, rendered = rerender(
+            options["detections_path"],
+            input_path,
+            str(OUTPUT_DIR),
+            confidence=options.get("confidence"),
+            progress_callback=on_progress,
+            encoder_mode=ENCODER_MODE,
+            ffmpeg_preset=FFMPEG_PRESET,
+            ffmpeg_crf=FFMPEG_CRF,
+            ffmpeg_threads=FFMPEG_THREADS,
+        )
+    except Exception as exc:
+        error = str(exc) if isinstance(exc, ValueError) else "Video rendering failed."
+        set_state(
+            job_id,
+            status="failed",
+            error=error,
+            completed_at=datetime.utcnow().isoformat(),
+        )
+        return
+
+    details = dict(options.get("details") or {})
+    # Legacy records kept the per-second counts inline.
+    details.pop("counts_per_second", None)
+    details.update(
+        processing_mode="annotated",
+        confidence=rendered["confidence"],
+        sampled_frames=rendered["sampled_frames"],
+        peak_count=rendered["peak_count"],
+        unique_persons=rendered["unique_persons"],
+        series_file=rendered["series_file"],
+        encoder=rendered["encoder"],
+        encode_seconds=rendered["encode_seconds"],
+        rendered_at=datetime.utcnow().isoformat(),
+    )
+    update_record(record_id, person_count=total_count, output_path=output_path, details=details)
+    if options.get("previous_output") and options["previous_output"] != output_path:
+        discard(options["previous_output"])
+    if options.get("previous_series") and os.path.basename(options["previous_series"]) != rendered["series_file"]:
+        discard(options["previous_series"])
+    set_state(
+        job_id,
+        status="completed",
+        progress=100,
+        total_person_count=total_count,
+        processed_video=f"/outputs/{os.path.basename(output_path)}",
+        completed_at=datetime.utcnow().isoformat(),
+    )
+    remove_hls_segments(output_path)
@@ -0,0 +1,148 @@
+from bisect import bisect_left
+from threading import Lock
+import time
+
+from app.core.config import METRICS_ENABLED
+
+
+# Minimal Prometheus text-format metrics. Everything lives in the API
+# process; worker processes forward their observations through the executor.
+# With VIDEO_METRICS_ENABLED off, observe() returns immediately.
+
+
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+FPS_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 240)
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+# Long-lived streams are not request latency.
+REQUEST_LATENCY_PREFIXES = ("/api/analytics", "/api/jobs")
+REQUEST_LATENCY_EXCLUDED = ("/api/jobs/events", "/api/jobs/ws")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: (list(value["counts"]), value["sum"], value["count"]) for key, value in self._series.items()}
+        for key in sorted(snapshot):
+            counts, total, count = snapshot[key]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+def render_gauge(name, documentation, value):
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+
+
+job_stage_seconds = Histogram(
+    "video_job_stage_seconds", "Time a processing job spent in each stage.", STAGE_BUCKETS, labels=("stage",)
+)
+job_frames_per_second = Histogram(
+    "video_job_frames_per_second", "Sampled frames processed per wall-clock second, per job.", FPS_BUCKETS
+)
+job_queue_wait_seconds = Histogram(
+    "video_job_queue_wait_seconds", "Time jobs waited in the admission queue before starting.", STAGE_BUCKETS
+)
+job_queue_depth = Histogram(
+    "video_job_queue_depth", "Jobs already waiting in the admission queue when a job was submitted.", QUEUE_DEPTH_BUCKETS
+)
+http_request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Latency of analytics and job API requests.",
+    REQUEST_BUCKETS,
+    labels=("method", "route", "status"),
+)
+HISTOGRAMS = (job_stage_seconds, job_frames_per_second, job_queue_wait_seconds, job_queue_depth, http_request_seconds)
+
+
+def record_job_metrics(timings, frames_per_second):
+    for stage, seconds in timings.items():
+        job_stage_seconds.observe(seconds, stage=stage)
+    job_frames_per_second.observe(frames_per_second)
+
+
+def render_metrics(gauges=()):
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for gauge in gauges:
+        lines.extend(render_gauge(*gauge))
+    return "\n".join(lines) + "\n"
+
+
+class RequestLatencyMiddleware:
+    # Plain ASGI (not BaseHTTPMiddleware) so responses pass through untouched.
+    # Requests are labelled by route template, not raw path, to keep job ids
+    # out of the label set.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not path.startswith(REQUEST_LATENCY_PREFIXES)
+            or path.startswith(REQUEST_LATENCY_EXCLUDED)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_request_seconds.observe(
+                time.perf_counter() - started,
+                method=scope.get("method", ""),
+                route=getattr(route, "path", "unmatched"),
+                status=status[0],
+            )
@@ -0,0 +1,169 @@
+from datetime import datetime
+from threading import RLock
+import hashlib
+import json
+import os
+
+from app.core.config import RESULT_CACHE_ENABLED, RESULT_CACHE_INDEX, RESULT_CACHE_MAX_BYTES
+from src.person_count.encoders import remove_video_output
+
+
+def result_cache_key(content_hash, signature):
+    payload = json.dumps([content_hash, signature], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    # Maps (upload content hash, processing settings) to a finished output and
+    # its details. Records that share a cached artifact are tracked in "refs";
+    # an artifact is only removed from disk once it is evicted and no record
+    # still points at it.
+    def __init__(self, index_path, max_bytes, enabled=True):
+        self.index_path = str(index_path)
+        self.max_bytes = max(0, int(max_bytes))
+        self.enabled = enabled
+        self._lock = RLock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+
+        entries = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    entries = data
+            except json.JSONDecodeError:
+                entries = {}
+        self._entries = entries
+        return entries
+
+    def _save(self):
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=True)
+        os.replace(temp_path, self.index_path)
+
+    def lookup(self, key):
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None:
+                return None
+
+            if not all(os.path.exists(path) for path in self._entry_files(entry)):
+                self._entries.pop(key, None)
+                self._save()
+                return None
+
+            entry["last_used_at"] = datetime.utcnow().isoformat()
+            entry["hits"] = int(entry.get("hits", 0)) + 1
+            self._save()
+            return dict(entry)
+
+    def put(self, key, record_id, output_path, person_count, details):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            entries = self._load()
+            now = datetime.utcnow().isoformat()
+            entry = {
+                "output_path": output_path,
+                "person_count": int(person_count),
+                "details": details,
+                "size_bytes": 0,
+                "refs": [record_id],
+                "source_record_id": record_id,
+                "created_at": now,
+                "last_used_at": now,
+                "hits": 0,
+            }
+            entry["size_bytes"] = sum(os.path.getsize(path) for path in self._entry_files(entry) if os.path.exists(path))
+            entries[key] = entry
+            self._evict()
+            self._save()
+
+    def add_ref(self, key, record_id):
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None:
+                return
+            if record_id not in entry["refs"]:
+                entry["refs"].append(record_id)
+            self._save()
+
+    def release(self, record_id, output_path):
+        # Returns True when output_path is still owned by the cache or another
+        # record, in which case the caller must not delete it.
+        with self._lock:
+            entries = self._load()
+            changed = False
+            for entry in entries.values():
+                if record_id in entry["refs"]:
+                    entry["refs"].remove(record_id)
+                    changed = True
+
+            if changed:
+                self._evict()
+                self._save()
+
+            return self.is_retained(output_path)
+
+    def is_retained(self, path):
+        # True when a cache entry still owns path (an output, sidecar or series).
+        if not path:
+            return False
+        with self._lock:
+            return any(path in self._entry_files(entry) for entry in self._load().values())
+
+    def _evict(self):
+        # LRU over entries no record references any more; entries in use are
+        # pinned and only count towards the total.
+        entries = self._entries
+        total = sum(int(e.get("size_bytes", 0)) for e in entries.values())
+        if total <= self.max_bytes:
+            return
+
+        for key in sorted(entries, key=lambda k: entries[k].get("last_used_at", "")):
+            if total <= self.max_bytes:
+                break
+            entry = entries[key]
+            if entry["refs"]:
+                continue
+
+            entries.pop(key)
+            total -= int(entry.get("size_bytes", 0))
+            for path in self._entry_files(entry):
+                if path == entry.get("output_path"):
+                    remove_video_output(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+
+    def _entry_files(self, entry):
+        # The rendered output (absent for analytics-only results), the
+        # detection sidecar and the count series, which live next to the index.
+        files = [entry["output_path"]] if entry.get("output_path") else []
+        details = entry.get("details") or {}
+        for key in ("detections_file", "series_file"):
+            if details.get(key):
+                files.append(os.path.join(os.path.dirname(self.index_path), details[key]))
+        return files
+
+    def stats(self):
+        with self._lock:
+            entries = self._load()
+            return {
+                "enabled": self.enabled,
+                "entries": len(entries),
+                "size_bytes": sum(int(e.get("size_bytes", 0)) for e in entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+result_cache = ResultCache(RESULT_CACHE_INDEX, RESULT_CACHE_MAX_BYTES, enabled=RESULT_CACHE_ENABLED)
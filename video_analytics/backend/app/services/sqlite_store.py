@@ -0,0 +1,217 @@
+from pathlib import Path
+from threading import local
+import json
+import os
+import sqlite3
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT '',
+    video_name TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_videos_id ON videos(id);
+CREATE INDEX IF NOT EXISTS idx_videos_status ON videos(status);
+CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos(created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+# Created after _migrate so databases from before the column existed get it.
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_videos_video_name ON videos(video_name);
+"""
+# Rows per query when iterating; bounds memory however many records match.
+ITER_BATCH_SIZE = 500
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=True, separators=(",", ":"))
+
+
+class SqliteRecordStore:
+    # Video records keyed by id, one JSON document per row. The indexed columns
+    # mirror the record fields that lookups and filters use.
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._local = local()
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+        self._migrate()
+        self._conn().executescript(INDEXES)
+
+    def _migrate(self):
+        columns = {row[1] for row in self._conn().execute("PRAGMA table_info(videos)")}
+        if "video_name" not in columns:
+            with self._transaction() as conn:
+                conn.execute("ALTER TABLE videos ADD COLUMN video_name TEXT NOT NULL DEFAULT ''")
+                conn.execute("UPDATE videos SET video_name = COALESCE(json_extract(data, '$.video_name'), '')")
+
+    def _conn(self):
+        # One connection per thread; autocommit mode so reads never hold locks.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._conn())
+
+    def load_records(self):
+        rows = self._conn().execute("SELECT data FROM videos ORDER BY seq").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def replace_records(self, records):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM videos")
+            self._insert_many(conn, records)
+
+    def insert_record(self, record):
+        with self._transaction() as conn:
+            self._insert_many(conn, [record])
+
+    def _insert_many(self, conn, records):
+        conn.executemany(
+            "INSERT OR REPLACE INTO videos (id, status, created_at, video_name, data) VALUES (?, ?, ?, ?, ?)",
+            [
+                (r.get("id", ""), r.get("status", ""), r.get("created_at", ""), r.get("video_name", ""), _dumps(r))
+                for r in records
+            ],
+        )
+
+    def get_record(self, record_id):
+        row = self._conn().execute("SELECT data FROM videos WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def latest_records(self, limit, status=None):
+        if status is None:
+            rows = self._conn().execute(
+                "SELECT data FROM videos ORDER BY seq DESC LIMIT ?", (limit,)
+            ).fetchall()
+        else:
+            rows = self._conn().execute(
+                "SELECT data FROM videos WHERE status = ? ORDER BY seq DESC LIMIT ?", (status, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def iter_records(
+        self,
+        status=None,
+        created_from=None,
+        created_to=None,
+        name_prefix=None,
+        before_seq=None,
+        batch_size=ITER_BATCH_SIZE,
+    ):
+        # (seq, record) newest first, matching every given filter; created_to
+        # is exclusive. Rows are read in keyset batches, each on the calling
+        # thread's connection, so a consumer that resumes on another thread
+        # (a streamed response) is fine and no query stays open in between.
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if created_from is not None:
+            clauses.append("created_at >= ?")
+            params.append(created_from)
+        if created_to is not None:
+            clauses.append("created_at < ?")
+            params.append(created_to)
+        if name_prefix:
+            clauses.append("video_name >= ? AND video_name < ?")
+            params.extend([name_prefix, name_prefix + "\U0010ffff"])
+
+        while True:
+            where = clauses + (["seq < ?"] if before_seq is not None else [])
+            query = "SELECT seq, data FROM videos"
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            query += " ORDER BY seq DESC LIMIT ?"
+            rows = self._conn().execute(
+                query, [*params, *([before_seq] if before_seq is not None else []), batch_size]
+            ).fetchall()
+            for seq, data in rows:
+                yield seq, json.loads(data)
+            if len(rows) < batch_size:
+                return
+            before_seq = rows[-1][0]
+
+    def update_record(self, record_id, updates):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM videos WHERE id = ?", (record_id,)).fetchone()
+            if not row:
+                return None
+
+            previous = json.loads(row[0])
+            record = dict(previous)
+            record.update(updates)
+            conn.execute(
+                "UPDATE videos SET status = ?, created_at = ?, video_name = ?, data = ? WHERE id = ?",
+                (
+                    record.get("status", ""),
+                    record.get("created_at", ""),
+                    record.get("video_name", ""),
+                    _dumps(record),
+                    record_id,
+                ),
+            )
+            return previous, record
+
+    def delete_record(self, record_id):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM videos WHERE id = ?", (record_id,)).fetchone()
+            if not row:
+                return None
+            conn.execute("DELETE FROM videos WHERE id = ?", (record_id,))
+            return json.loads(row[0])
+
+    def migrate_from_json(self, json_path):
+        # One-shot import of the legacy JSON store; the marker keeps it from
+        # re-importing records that were deleted after the first run.
+        json_path = str(json_path)
+        with self._transaction() as conn:
+            done = conn.execute("SELECT value FROM meta WHERE key = 'json_migrated_from'").fetchone()
+            if done:
+                return 0
+
+            records = []
+            if os.path.exists(json_path):
+                try:
+                    with open(json_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if isinstance(data, list):
+                        records = [r for r in data if isinstance(r, dict) and r.get("id")]
+                except json.JSONDecodeError:
+                    records = []
+
+            existing = {row[0] for row in conn.execute("SELECT id FROM videos")}
+            self._insert_many(conn, [r for r in records if r.get("id") not in existing])
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated_from', ?)",
+                (json_path,),
+            )
+            return len(records)
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
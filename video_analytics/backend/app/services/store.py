@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from fnmatch import fnmatch
 from glob import glob
 from pathlib import Path
 from threading import RLock
@@ -8,7 +9,11 @@ import os
 
 from fastapi import UploadFile
 
-from app.core.config import ANALYTICS_STORE, OUTPUT_DIR, SUPPORTED_VIDEO_EXTENSIONS
+from app.core.config import ANALYTICS_DB, ANALYTICS_STORE, OUTPUT_DIR, STORE_BACKEND, SUPPORTED_VIDEO_EXTENSIONS
+from app.services.aggregates import analytics_aggregates
+from app.services.events import job_events
+from app.services.sqlite_store import SqliteRecordStore
+from app.services.streams import stream_manager
 
 
 records_lock = RLock()
@@ -24,7 +29,27 @@ def ensure_storage_dirs() -> None:
     Path(OUTPUT_DIR_STR).mkdir(parents=True, exist_ok=True)
 
 
+_sqlite_store = None
+
+
+def _use_sqlite():
+    return STORE_BACKEND == "sqlite"
+
+
+def _get_sqlite_store():
+    global _sqlite_store
+    with records_lock:
+        if _sqlite_store is None:
+            ensure_storage_dirs()
+            _sqlite_store = SqliteRecordStore(ANALYTICS_DB)
+            _sqlite_store.migrate_from_json(ANALYTICS_STORE_STR)
+        return _sqlite_store
+
+
 def load_analytics_records():
+    if _use_sqlite():
+        return _get_sqlite_store().load_records()
+
     with records_lock:
         if not os.path.exists(ANALYTICS_STORE_STR):
             return []
@@ -40,44 +65,198 @@ def load_analytics_records():
         return []
 
 
+def _write_json_records(records):
+    with open(ANALYTICS_STORE_STR, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=True, indent=2)
+
+
 def save_analytics_records(records):
     with records_lock:
-        with open(ANALYTICS_STORE_STR, "w", encoding="utf-8") as f:
-            json.dump(records, f, ensure_ascii=True, indent=2)
+        if _use_sqlite():
+            _get_sqlite_store().replace_records(records)
+        else:
+            _write_json_records(records)
+
+        if analytics_aggregates.ready:
+            analytics_aggregates.rebuild(records)
+
+
+def _latest_records(limit):
+    if _use_sqlite():
+        store = _get_sqlite_store()
+        return store.latest_records(limit), store.latest_records(limit, status="completed")
+
+    records = load_analytics_records()
+    completed = [r for r in records if r.get("status") == "completed"]
+    return records[-limit:], completed[-limit:]
+
+
+def rebuild_analytics_aggregates():
+    with records_lock:
+        analytics_aggregates.rebuild(load_analytics_records())
 
 
 def append_video_record(video_name, person_count, status, input_path="", output_path="", details=None, record_id=""):
     record_id = record_id or str(uuid4())
+    record = {
+        "id": record_id,
+        "video_name": video_name,
+        "person_count": int(person_count),
+        "status": status,
+        "created_at": datetime.utcnow().isoformat(),
+        "input_path": input_path,
+        "output_path": output_path,
+        "details": details or {},
+    }
     with records_lock:
-        records = load_analytics_records()
-        records.append({
-            "id": record_id,
-            "video_name": video_name,
-            "person_count": int(person_count),
-            "status": status,
-            "created_at": datetime.utcnow().isoformat(),
-            "input_path": input_path,
-            "output_path": output_path,
-            "details": details or {},
-        })
-        save_analytics_records(records)
+        if _use_sqlite():
+            _get_sqlite_store().insert_record(record)
+        else:
+            records = load_analytics_records()
+            records.append(record)
+            _write_json_records(records)
+        analytics_aggregates.record_inserted(record)
     return record_id
 
 
+def get_video_record(record_id):
+    if _use_sqlite():
+        return _get_sqlite_store().get_record(record_id)
+
+    records = load_analytics_records()
+    return next((r for r in records if r.get("id") == record_id), None)
+
+
+def created_at_bounds(date_from=None, date_to=None):
+    # ISO dates or datetimes to created_at string bounds: from is inclusive,
+    # the returned upper bound is exclusive. A date-only date_to includes that
+    # whole day. Timezone-aware values are converted to UTC, like created_at.
+    def parse(value, name):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError as exc:
+            raise ValueError(f"{name} must be an ISO date or datetime.") from exc
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+    created_from = parse(date_from, "date_from").isoformat() if date_from else None
+    created_to = None
+    if date_to:
+        upper = parse(date_to, "date_to")
+        upper += timedelta(days=1) if len(date_to) == 10 else timedelta(microseconds=1)
+        created_to = upper.isoformat()
+    return created_from, created_to
+
+
+def _record_matches(record, status, created_from, created_to, name_prefix):
+    created_at = record.get("created_at", "")
+    return (
+        (status is None or record.get("status", "") == status)
+        and (created_from is None or created_at >= created_from)
+        and (created_to is None or created_at < created_to)
+        and (not name_prefix or record.get("video_name", "").startswith(name_prefix))
+    )
+
+
+def _json_record_key(record):
+    return record.get("created_at", ""), record.get("id", "")
+
+
+def iter_video_records(status=None, created_from=None, created_to=None, name_prefix=None, before=None, batch_size=None):
+    # (position, record) newest first; a position is where to continue after
+    # that record: the row seq in SQLite, (created_at, id) in the JSON store,
+    # so deleting records between pages neither skips nor repeats any.
+    # SQLite reads in bounded batches; the legacy JSON store can only be read
+    # whole.
+    if _use_sqlite():
+        yield from _get_sqlite_store().iter_records(
+            status=status,
+            created_from=created_from,
+            created_to=created_to,
+            name_prefix=name_prefix,
+            before_seq=before,
+            **({"batch_size": batch_size} if batch_size else {}),
+        )
+        return
+
+    for record in sorted(load_analytics_records(), key=_json_record_key, reverse=True):
+        key = _json_record_key(record)
+        if before is not None and key >= before:
+            continue
+        if _record_matches(record, status, created_from, created_to, name_prefix):
+            yield key, record
+
+
+def _encode_cursor(position):
+    return str(position) if _use_sqlite() else "|".join(position)
+
+
+def _decode_cursor(cursor):
+    if _use_sqlite():
+        try:
+            position = int(cursor)
+        except ValueError:
+            position = 0
+        if position < 1:
+            raise ValueError("Invalid cursor.")
+        return position
+
+    created_at, separator, record_id = cursor.partition("|")
+    if not separator or not created_at or not record_id:
+        raise ValueError("Invalid cursor.")
+    return created_at, record_id
+
+
+def list_video_records(limit, cursor=None, **filters):
+    # One page and the cursor for the next one (None on the last page).
+    before = _decode_cursor(cursor) if cursor is not None else None
+    page = []
+    last_position = None
+    for position, record in iter_video_records(before=before, batch_size=limit + 1, **filters):
+        if len(page) == limit:
+            return page, _encode_cursor(last_position)
+        page.append(record)
+        last_position = position
+    return page, None
+
+
 def update_video_record(record_id, **updates):
     with records_lock:
-        records = load_analytics_records()
-        updated = False
-        for record in records:
-            if record.get("id") == record_id:
-                record.update(updates)
-                updated = True
-                break
+        if _use_sqlite():
+            changed = _get_sqlite_store().update_record(record_id, updates)
+            if changed is None:
+                return False
+            previous, record = changed
+        else:
+            records = load_analytics_records()
+            record = next((r for r in records if r.get("id") == record_id), None)
+            if record is None:
+                return False
+
+            previous = dict(record)
+            record.update(updates)
+            _write_json_records(records)
+
+        analytics_aggregates.record_updated(previous, record, refill=_latest_records)
+        return True
+
+
+def delete_video_record(record_id):
+    with records_lock:
+        if _use_sqlite():
+            record = _get_sqlite_store().delete_record(record_id)
+        else:
+            records = load_analytics_records()
+            record_index = next((idx for idx, r in enumerate(records) if r.get("id") == record_id), None)
+            if record_index is None:
+                return None
 
-        if updated:
-            save_analytics_records(records)
+            record = records.pop(record_index)
+            _write_json_records(records)
 
-        return updated
+        analytics_aggregates.record_deleted(record, refill=_latest_records)
+        return record
 
 
 def set_job_state(job_id, **updates):
@@ -86,6 +265,9 @@ def set_job_state(job_id, **updates):
         current.update(updates)
         current["updated_at"] = datetime.utcnow().isoformat()
         JOBS[job_id] = current
+        snapshot = dict(current)
+
+    job_events.publish(job_id, snapshot)
 
 
 def get_job_state(job_id):
@@ -100,104 +282,80 @@ def pop_job_state(job_id):
 
 
 def is_supported_video_upload(file: UploadFile):
-    filename = os.path.basename(file.filename or "")
+    return is_supported_video_name(file.filename, file.content_type)
+
+
+def is_supported_video_name(filename, content_type=""):
+    filename = os.path.basename(filename or "")
     extension = os.path.splitext(filename)[1].lower()
-    content_type = (file.content_type or "").lower()
+    content_type = (content_type or "").lower()
     return content_type.startswith("video/") or extension in SUPPORTED_VIDEO_EXTENSIONS
 
 
-def resolve_processed_video_path(record):
+def list_processed_outputs():
+    # Rendered outputs, newest first, for the legacy fallback below; callers
+    # resolving many records list the directory once and pass it in.
+    pattern = os.path.join(OUTPUT_DIR_STR, "processed_*.mp4")
+    return sorted(glob(pattern), key=os.path.getmtime, reverse=True)
+
+
+def _legacy_output_stem(record):
+    # Best effort fallback for legacy records without output_path metadata:
+    # only a completed render can be matched by name. Queued, failed and
+    # analytics-only records have no render, and an unrelated older output
+    # with a similar name must not stand in for one.
+    if record.get("status") != "completed":
+        return ""
+    if (record.get("details", {}) or {}).get("processing_mode") == "analytics":
+        return ""
+    output_path = record.get("output_path", "")
+    if output_path and os.path.exists(output_path):
+        return ""
+    return os.path.splitext(os.path.basename(record.get("video_name", "")))[0]
+
+
+def needs_output_listing(records):
+    return any(_legacy_output_stem(record) for record in records)
+
+
+def resolve_processed_video_path(record, processed_outputs=None):
     output_path = record.get("output_path", "")
     if output_path and os.path.exists(output_path):
         return f"/outputs/{os.path.basename(output_path)}"
 
-    # Best effort fallback for legacy records without output_path metadata.
-    video_name = record.get("video_name", "")
-    video_stem = os.path.splitext(os.path.basename(video_name))[0]
+    video_stem = _legacy_output_stem(record)
     if not video_stem:
         return ""
 
-    pattern = os.path.join(OUTPUT_DIR_STR, f"processed_*{video_stem}*.mp4")
-    candidates = sorted(glob(pattern), key=os.path.getmtime, reverse=True)
+    if processed_outputs is None:
+        processed_outputs = list_processed_outputs()
+    pattern = f"processed_*{video_stem}*.mp4"
+    candidates = [path for path in processed_outputs if fnmatch(os.path.basename(path), pattern)]
     if not candidates:
         return ""
 
     return f"/outputs/{os.path.basename(candidates[0])}"
 
 
-def build_analytics_payload():
-    records = load_analytics_records()
+def _resolve_details_file(record, key):
+    filename = (record.get("details", {}) or {}).get(key)
+    if not filename:
+        return ""
+    path = os.path.join(OUTPUT_DIR_STR, os.path.basename(filename))
+    return path if os.path.exists(path) else ""
 
-    completed_records = [r for r in records if r.get("status") == "completed"]
-    total_videos = len(completed_records)
-    total_persons = sum(int(r.get("person_count", 0)) for r in completed_records)
-    total_processing_time_seconds = sum(
-        float((r.get("details", {}) or {}).get("duration_seconds") or 0)
-        for r in completed_records
-    )
 
-    today = datetime.utcnow().date()
-    todays_detections = 0
-    for r in completed_records:
-        try:
-            created_day = datetime.fromisoformat(r.get("created_at", "")).date()
-        except ValueError:
-            continue
-        if created_day == today:
-            todays_detections += int(r.get("person_count", 0))
-
-    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
-    hourly_analytics = []
-    for hours_ago in range(11, -1, -1):
-        hour_start = now - timedelta(hours=hours_ago)
-        hour_end = hour_start + timedelta(hours=1)
-        hour_uploads = 0
-        hour_detections = 0
-
-        for r in completed_records:
-            try:
-                created_at = datetime.fromisoformat(r.get("created_at", ""))
-            except ValueError:
-                continue
-            if hour_start <= created_at < hour_end:
-                hour_uploads += 1
-                hour_detections += int(r.get("person_count", 0))
-
-        hourly_analytics.append({
-            "hour": hour_start.strftime("%H:00"),
-            "detections": hour_detections,
-            "uploads": hour_uploads,
-        })
-
-    person_count_per_video = [
-        {
-            "video": r.get("video_name", "unknown"),
-            "count": int(r.get("person_count", 0)),
-        }
-        for r in completed_records[-10:]
-    ]
-
-    recent_uploads = []
-    for r in reversed(records[-10:]):
-        created_at = r.get("created_at", "")
-        upload_date = created_at.split("T")[0] if "T" in created_at else created_at
-        recent_uploads.append({
-            "id": r.get("id", ""),
-            "videoName": r.get("video_name", "unknown"),
-            "uploadDate": upload_date,
-            "personCount": int(r.get("person_count", 0)),
-            "status": r.get("status", "completed"),
-            "processedVideo": resolve_processed_video_path(r),
-            "processingTimeSeconds": float((r.get("details", {}) or {}).get("duration_seconds") or 0),
-        })
-
-    return {
-        "total_videos": total_videos,
-        "total_persons": total_persons,
-        "total_processing_time_seconds": total_processing_time_seconds,
-        "active_cameras": 1 if total_videos > 0 else 0,
-        "todays_detections": todays_detections,
-        "hourly_analytics": hourly_analytics,
-        "person_count_per_video": person_count_per_video,
-        "recent_uploads": recent_uploads,
-    }
+def resolve_detections_path(record):
+    return _resolve_details_file(record, "detections_file")
+
+
+def resolve_series_path(record):
+    return _resolve_details_file(record, "series_file")
+
+
+def build_analytics_payload():
+    if not analytics_aggregates.ready:
+        rebuild_analytics_aggregates()
+    payload = analytics_aggregates.snapshot()
+    payload.update(stream_manager.dashboard())
+    return payload
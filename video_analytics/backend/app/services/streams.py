@@ -0,0 +1,157 @@
+from datetime import datetime
+from threading import RLock
+from uuid import uuid4
+import json
+import os
+
+from app.core.config import (
+    DETECT_MAX_SIDE,
+    INFERENCE_BACKEND,
+    INFERENCE_IMGSZ,
+    INFERENCE_SERVER,
+    INFERENCE_SERVER_MAX_BATCH,
+    INFERENCE_SERVER_MAX_WAIT_MS,
+    STREAM_MAX_INFER_FPS,
+    STREAM_RECONNECT_SECONDS,
+    STREAM_WINDOW_SECONDS,
+    STREAMS_MAX,
+    STREAMS_STORE,
+)
+from src.person_count.count import model_registry
+from src.person_count.live import StreamWorker
+
+
+def _stream_detector():
+    # Stream workers run in the API process; with the inference server on
+    # they share batches with each other and with thread-mode jobs.
+    if INFERENCE_SERVER:
+        return model_registry.server(
+            INFERENCE_BACKEND,
+            INFERENCE_IMGSZ,
+            max_batch_size=INFERENCE_SERVER_MAX_BATCH,
+            max_wait_seconds=INFERENCE_SERVER_MAX_WAIT_MS / 1000,
+        )
+    return model_registry.get(INFERENCE_BACKEND, INFERENCE_IMGSZ)
+
+
+class StreamManager:
+    # Registered live sources and their workers. Definitions are saved to
+    # streams.json so streams resume after a restart; counts are not, as they
+    # only cover the live sliding window.
+    def __init__(self, path=STREAMS_STORE, max_streams=STREAMS_MAX):
+        self.path = path
+        self.max_streams = max_streams
+        self._lock = RLock()
+        self._streams = {}
+        self._workers = {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(list(self._streams.values()), file, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _start_worker(self, stream):
+        worker = StreamWorker(
+            stream["stream_id"],
+            stream["source"],
+            _stream_detector,
+            confidence=stream["confidence"],
+            roi=stream.get("roi"),
+            detect_max_side=DETECT_MAX_SIDE,
+            window_seconds=STREAM_WINDOW_SECONDS,
+            max_infer_fps=STREAM_MAX_INFER_FPS,
+            reconnect_seconds=STREAM_RECONNECT_SECONDS,
+        )
+        self._workers[stream["stream_id"]] = worker.start()
+
+    def start(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                streams = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return
+        with self._lock:
+            for stream in streams[: self.max_streams]:
+                self._streams[stream["stream_id"]] = stream
+                self._start_worker(stream)
+
+    def shutdown(self):
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    def add(self, source, name, confidence, roi=None):
+        with self._lock:
+            if len(self._streams) >= self.max_streams:
+                raise ValueError(f"At most {self.max_streams} streams can be registered.")
+            if any(stream["source"] == source for stream in self._streams.values()):
+                raise ValueError("This source is already registered.")
+            stream = {
+                "stream_id": str(uuid4()),
+                "name": name,
+                "source": source,
+                "confidence": confidence,
+                "roi": roi,
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            self._streams[stream["stream_id"]] = stream
+            self._save()
+            self._start_worker(stream)
+        return self.describe(stream["stream_id"])
+
+    def remove(self, stream_id):
+        with self._lock:
+            if self._streams.pop(stream_id, None) is None:
+                return False
+            worker = self._workers.pop(stream_id, None)
+            self._save()
+        if worker is not None:
+            worker.stop()
+        return True
+
+    def describe(self, stream_id, include_window=False):
+        with self._lock:
+            stream = self._streams.get(stream_id)
+            worker = self._workers.get(stream_id)
+        if stream is None:
+            return None
+        payload = dict(stream)
+        if worker is not None:
+            payload.update(worker.status())
+            window = worker.window.snapshot()
+            payload["window_peak_count"] = window["peak_count"]
+            payload["window_average_count"] = window["average_count"]
+            if include_window:
+                payload["window"] = window
+        return payload
+
+    def list(self):
+        with self._lock:
+            stream_ids = list(self._streams)
+        return [self.describe(stream_id) for stream_id in stream_ids]
+
+    def dashboard(self):
+        streams = self.list()
+        return {
+            "active_cameras": sum(1 for stream in streams if stream.get("state") == "running"),
+            "live_streams": [
+                {
+                    "stream_id": stream["stream_id"],
+                    "name": stream["name"],
+                    "state": stream.get("state", "stopped"),
+                    "current_count": stream.get("current_count", 0),
+                    "window_peak_count": stream.get("window_peak_count", 0),
+                    "window_average_count": stream.get("window_average_count", 0),
+                }
+                for stream in streams
+            ],
+        }
+
+
+stream_manager = StreamManager()
@@ -0,0 +1,242 @@
+from datetime import datetime
+from pathlib import Path
+from threading import Lock, Thread
+from uuid import uuid4
+import asyncio
+import hashlib
+import json
+import os
+import queue
+
+from app.core.config import UPLOAD_BUFFER_CHUNKS, UPLOAD_CHUNK_SIZE, UPLOAD_DIR
+
+
+UPLOAD_SESSIONS_DIR = Path(UPLOAD_DIR) / ".sessions"
+_END = object()
+
+
+class UploadSessionError(Exception):
+    def __init__(self, message, status_code=400, offset=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+
+class ChunkWriter:
+    # Writes (and optionally hashes) chunks on a dedicated thread. The event
+    # loop only enqueues; at most max_chunks are buffered, after which the
+    # producer waits off-loop until the disk catches up.
+    def __init__(self, path, mode="wb", hasher=None, max_chunks=UPLOAD_BUFFER_CHUNKS):
+        self.path = str(path)
+        self.hasher = hasher
+        self.bytes_written = 0
+        self._queue = queue.Queue(maxsize=max(1, max_chunks))
+        self._error = None
+        self._file = open(self.path, mode)
+        self._thread = Thread(target=self._drain, name="upload-writer", daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is _END:
+                break
+            if self._error is not None:
+                # Keep draining so a blocked producer is released.
+                continue
+            try:
+                self._file.write(chunk)
+            except OSError as exc:
+                self._error = exc
+                continue
+            if self.hasher is not None:
+                self.hasher.update(chunk)
+            self.bytes_written += len(chunk)
+        self._file.close()
+
+    async def write(self, chunk):
+        if self._error is not None:
+            raise self._error
+        try:
+            self._queue.put_nowait(chunk)
+        except queue.Full:
+            await asyncio.to_thread(self._queue.put, chunk)
+
+    async def close(self):
+        await asyncio.to_thread(self._queue.put, _END)
+        await asyncio.to_thread(self._thread.join)
+        if self._error is not None:
+            raise self._error
+
+
+async def save_upload_stream(chunks, path):
+    # Streams an async iterator of byte chunks to path and returns
+    # (sha256 hexdigest, bytes written).
+    hasher = hashlib.sha256()
+    writer = ChunkWriter(path, hasher=hasher)
+    try:
+        async for chunk in chunks:
+            if chunk:
+                await writer.write(chunk)
+    finally:
+        await writer.close()
+    return hasher.hexdigest(), writer.bytes_written
+
+
+async def iter_upload_file(file, chunk_size=UPLOAD_CHUNK_SIZE):
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def hash_file(path, chunk_size=UPLOAD_CHUNK_SIZE):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+# Resumable uploads: session metadata and the partial file live side by side
+# under uploads/.sessions, so an interrupted upload can resume after a restart.
+# Running hashes are kept in memory and recomputed at finalize if lost.
+_session_hashers = {}
+_session_locks = {}
+_session_locks_guard = Lock()
+
+
+def _session_meta_path(upload_id):
+    return UPLOAD_SESSIONS_DIR / f"{upload_id}.json"
+
+
+def _session_data_path(upload_id):
+    return UPLOAD_SESSIONS_DIR / f"{upload_id}.part"
+
+
+def _session_lock(upload_id):
+    with _session_locks_guard:
+        return _session_locks.setdefault(upload_id, asyncio.Lock())
+
+
+def _write_session(session):
+    meta_path = _session_meta_path(session["upload_id"])
+    temp_path = meta_path.with_suffix(".json.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(session, f, ensure_ascii=True)
+    os.replace(temp_path, meta_path)
+
+
+def create_upload_session(filename, size=None):
+    UPLOAD_SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    upload_id = uuid4().hex
+    session = {
+        "upload_id": upload_id,
+        "filename": os.path.basename(filename or "upload_video.mp4"),
+        "size": int(size) if size is not None else None,
+        "offset": 0,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    _session_data_path(upload_id).touch()
+    _write_session(session)
+    _session_hashers[upload_id] = (hashlib.sha256(), 0)
+    return session
+
+
+def get_upload_session(upload_id):
+    meta_path = _session_meta_path(upload_id)
+    data_path = _session_data_path(upload_id)
+    if not meta_path.exists() or not data_path.exists():
+        return None
+
+    with open(meta_path, "r", encoding="utf-8") as f:
+        session = json.load(f)
+    # The partial file is the source of truth for how much has arrived.
+    session["offset"] = data_path.stat().st_size
+    return session
+
+
+async def append_upload_chunk(upload_id, offset, chunks):
+    async with _session_lock(upload_id):
+        session = get_upload_session(upload_id)
+        if session is None:
+            raise UploadSessionError("Upload session not found.", status_code=404)
+        if offset != session["offset"]:
+            raise UploadSessionError(
+                "Chunk offset does not match the bytes received so far.",
+                status_code=409,
+                offset=session["offset"],
+            )
+
+        hashed = _session_hashers.pop(upload_id, None)
+        hasher = hashed[0] if hashed and hashed[1] == offset else None
+        # Kept so a rejected chunk leaves the session exactly as it was.
+        hasher_before = hasher.copy() if hasher is not None else None
+        remaining = session["size"] - offset if session["size"] is not None else None
+
+        data_path = _session_data_path(upload_id)
+        writer = ChunkWriter(data_path, mode="ab", hasher=hasher)
+        received = 0
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                received += len(chunk)
+                if remaining is not None and received > remaining:
+                    break
+                await writer.write(chunk)
+        finally:
+            await writer.close()
+
+        if remaining is not None and received > remaining:
+            os.truncate(data_path, offset)
+            if hasher_before is not None:
+                _session_hashers[upload_id] = (hasher_before, offset)
+            raise UploadSessionError("Upload exceeds the declared size.", status_code=400, offset=offset)
+
+        session["offset"] = offset + writer.bytes_written
+
+        if hasher is not None:
+            _session_hashers[upload_id] = (hasher, session["offset"])
+        _write_session(session)
+        return session
+
+
+async def finalize_upload_session(upload_id, destination_dir=UPLOAD_DIR):
+    # Moves the completed partial file into the uploads directory (a rename,
+    # not a copy) and returns (filename, input_path, content hash).
+    async with _session_lock(upload_id):
+        session = get_upload_session(upload_id)
+        if session is None:
+            raise UploadSessionError("Upload session not found.", status_code=404)
+        if session["size"] is not None and session["offset"] != session["size"]:
+            raise UploadSessionError(
+                "Upload is incomplete.",
+                status_code=409,
+                offset=session["offset"],
+            )
+
+        data_path = _session_data_path(upload_id)
+        hashed = _session_hashers.get(upload_id)
+        if hashed and hashed[1] == session["offset"]:
+            content_hash = hashed[0].hexdigest()
+        else:
+            content_hash = await asyncio.to_thread(hash_file, data_path)
+
+        input_path = os.path.join(str(destination_dir), f"{uuid4().hex}_{session['filename']}")
+        os.replace(data_path, input_path)
+        discard_upload_session(upload_id)
+        return session["filename"], input_path, content_hash
+
+
+def discard_upload_session(upload_id):
+    _session_hashers.pop(upload_id, None)
+    with _session_locks_guard:
+        _session_locks.pop(upload_id, None)
+    for path in (_session_meta_path(upload_id), _session_data_path(upload_id)):
+        if path.exists():
+            os.remove(path)
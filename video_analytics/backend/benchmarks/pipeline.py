@@ -0,0 +1,76 @@
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+class StubDetector:
+    # Stands in for the model so pipeline overhead (decode, annotate, encode,
+    # queues) can be measured alone: returns `boxes` fixed person boxes per
+    # frame after sleeping latency_ms per frame.
+    def __init__(self, latency_ms=0.0, boxes=4):
+        self.latency_ms = latency_ms
+        self.boxes = boxes
+
+    def __call__(self, frames, conf):
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms * len(frames) / 1000)
+        results = []
+        for frame in frames:
+            height, width = frame.shape[:2]
+            xyxy = np.array(
+                [
+                    [width * (i + 0.2) / self.boxes, height * 0.3, width * (i + 0.6) / self.boxes, height * 0.8]
+                    for i in range(self.boxes)
+                ],
+                dtype=np.float32,
+            ).reshape(-1, 4)
+            results.append(
+                (xyxy, np.full(self.boxes, 0.9, dtype=np.float32), np.zeros(self.boxes, dtype=np.int16))
+            )
+        return results
+
+
+def peak_rss_bytes(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(who).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_pipeline_case(video, detector="stub", stub_latency_ms=0.0, **options):
+    # Runs in a fresh process so peak RSS belongs to this case alone.
+    from src.person_count.count import model_registry, process_video
+
+    backend = options.get("backend", "pytorch")
+    imgsz = options.get("imgsz", 640)
+    if detector == "stub":
+        model_registry.use(StubDetector(stub_latency_ms), backend, imgsz)
+    else:
+        model_registry.warm_up(backend, imgsz)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        started = time.perf_counter()
+        output_path, peak_count, details = process_video(video["path"], output_dir, **options)
+        wall_seconds = time.perf_counter() - started
+        output_bytes = os.path.getsize(output_path) if output_path else 0
+
+    return {
+        "video": {key: value for key, value in video.items() if key != "path"},
+        "detector": detector,
+        "stub_latency_ms": stub_latency_ms if detector == "stub" else None,
+        "options": options,
+        "wall_seconds": round(wall_seconds, 3),
+        "source_fps": round(details["total_frames"] / wall_seconds, 2) if wall_seconds > 0 else 0,
+        "sampled_fps": round(details["sampled_frames"] / wall_seconds, 2) if wall_seconds > 0 else 0,
+        "sampled_frames": details["sampled_frames"],
+        "encode_seconds": details["encode_seconds"],
+        "timings": details["timings"],
+        "pipeline_stages": details["pipeline_stages"],
+        "peak_count": peak_count,
+        "output_bytes": output_bytes,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "peak_child_rss_bytes": peak_rss_bytes(resource.RUSAGE_CHILDREN),
+    }
@@ -0,0 +1,153 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.pipeline import run_pipeline_case
+from benchmarks.store import run_store_case
+from benchmarks.synthetic import make_synthetic_video
+
+
+# Offline benchmarks for the processing pipeline and the record store.
+# Results are JSON so runs before and after a change can be diffed.
+#
+#   cd backend
+#   python -m benchmarks.run --output before.json
+#   python -m benchmarks.run --quick --skip-store
+#   python -m benchmarks.run --detector model --resolutions 1920x1080 --seconds 30
+
+
+def _in_fresh_process(fn, *args, **kwargs):
+    # Every case gets its own process so peak RSS and import state are its own.
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args, **kwargs).result()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_resolution(value):
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def run_pipeline_benchmarks(args, work_dir):
+    results = []
+    for resolution in args.resolutions:
+        width, height = _parse_resolution(resolution)
+        for seconds in args.seconds:
+            video = make_synthetic_video(
+                os.path.join(work_dir, f"synthetic_{width}x{height}_{seconds}s.mp4"),
+                width=width,
+                height=height,
+                seconds=seconds,
+                fps=args.fps,
+                people=args.people,
+            )
+            for render in (True, False) if args.include_analytics else (True,):
+                result = _in_fresh_process(
+                    run_pipeline_case,
+                    video,
+                    detector=args.detector,
+                    stub_latency_ms=args.stub_latency_ms,
+                    frame_stride=args.frame_stride,
+                    batch_size=args.batch_size,
+                    encoder_mode=args.encoder,
+                    render=render,
+                    backend=args.backend,
+                    imgsz=args.imgsz,
+                )
+                print(
+                    f"pipeline {resolution} {seconds}s render={render}: "
+                    f"{result['source_fps']} fps, encode {result['encode_seconds']}s, "
+                    f"peak rss {result['peak_rss_bytes'] // (1024 * 1024)} MiB",
+                    flush=True,
+                )
+                results.append(result)
+    return results
+
+
+def run_store_benchmarks(args, work_dir):
+    results = []
+    for store_backend in args.store_backends:
+        for record_count in args.record_counts:
+            case_dir = os.path.join(work_dir, f"store_{store_backend}_{record_count}")
+            os.makedirs(case_dir)
+            result = _in_fresh_process(
+                run_store_case, record_count, store_backend=store_backend, samples=args.samples, work_dir=case_dir
+            )
+            print(
+                f"store {store_backend} {record_count} records: "
+                f"append p50 {result['append_video_record']['p50_ms']}ms, "
+                f"update p50 {result['update_video_record']['p50_ms']}ms, "
+                f"/api/analytics p50 {result['api_analytics']['p50_ms']}ms",
+                flush=True,
+            )
+            results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the processing pipeline and the record store.")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    parser.add_argument("--quick", action="store_true", help="One small video and 1k records; for smoke runs.")
+    parser.add_argument("--skip-pipeline", action="store_true")
+    parser.add_argument("--skip-store", action="store_true")
+    parser.add_argument("--resolutions", nargs="+", default=["640x360", "1280x720", "1920x1080"])
+    parser.add_argument("--seconds", type=int, nargs="+", default=[10, 30])
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--people", type=int, default=4)
+    parser.add_argument("--detector", choices=("stub", "model"), default="stub")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0)
+    parser.add_argument("--frame-stride", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--encoder", default="pipe")
+    parser.add_argument("--backend", default="pytorch")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--include-analytics", action="store_true", help="Also run every video without rendering.")
+    parser.add_argument("--record-counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--store-backends", nargs="+", default=["sqlite"])
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.resolutions, args.seconds, args.record_counts, args.samples = ["640x360"], [5], [1000], 50
+
+    report = {
+        "meta": {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "pipeline": [],
+        "store": [],
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        if not args.skip_pipeline:
+            report["pipeline"] = run_pipeline_benchmarks(args, work_dir)
+        if not args.skip_store:
+            report["store"] = run_store_benchmarks(args, work_dir)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+
+def _latency_summary(samples):
+    samples_ms = sorted(sample * 1000 for sample in samples)
+    if not samples_ms:
+        return {"samples": 0}
+    return {
+        "samples": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3),
+        "p50_ms": round(samples_ms[len(samples_ms) // 2], 3),
+        "p95_ms": round(samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))], 3),
+        "max_ms": round(samples_ms[-1], 3),
+    }
+
+
+def _timed(fn, samples):
+    durations = []
+    for index in range(samples):
+        started = time.perf_counter()
+        fn(index)
+        durations.append(time.perf_counter() - started)
+    return _latency_summary(durations)
+
+
+def synthetic_records(count, seconds_per_video=30, seed=0):
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 1)
+    records = []
+    for index in range(count):
+        roll = rng.random()
+        status = "completed" if roll < 0.9 else "failed" if roll < 0.95 else "processing"
+        person_count = rng.randint(0, 40) if status == "completed" else 0
+        created_at = started + timedelta(minutes=index)
+        records.append(
+            {
+                "id": f"bench-{index:07d}",
+                "video_name": f"camera_{index % 50:02d}_{index}.mp4",
+                "person_count": person_count,
+                "status": status,
+                "created_at": created_at.isoformat(),
+                "completed_at": (created_at + timedelta(seconds=seconds_per_video)).isoformat(),
+                "input_path": f"uploads/bench_{index}.mp4",
+                "output_path": f"outputs/processed_bench_{index}.mp4" if status == "completed" else "",
+                "details": {
+                    "fps": 25.0,
+                    "total_frames": seconds_per_video * 25,
+                    "duration_seconds": seconds_per_video,
+                    "peak_count": person_count,
+                    "series_file": f"processed_bench_{index}.series.bin" if status == "completed" else None,
+                },
+            }
+        )
+    return records
+
+
+def run_store_case(record_count, store_backend="sqlite", samples=200, work_dir=None):
+    # Runs in a fresh process: the app reads its storage paths from the
+    # environment at import, so they are set before anything is imported.
+    os.environ["VIDEO_OUTPUT_DIR"] = os.path.join(work_dir, "outputs")
+    os.environ["VIDEO_UPLOAD_DIR"] = os.path.join(work_dir, "uploads")
+    os.environ["VIDEO_STORE_BACKEND"] = store_backend
+    os.environ["VIDEO_MODEL_WARMUP"] = "false"
+    os.environ["VIDEO_METRICS_ENABLED"] = "false"
+    os.makedirs(os.environ["VIDEO_OUTPUT_DIR"], exist_ok=True)
+
+    from app.core.config import ANALYTICS_STORE
+
+    records = synthetic_records(record_count)
+    with open(ANALYTICS_STORE, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.services.store import append_video_record, build_analytics_payload, load_analytics_records, update_video_record
+
+    started = time.perf_counter()
+    load_analytics_records()
+    seed_seconds = time.perf_counter() - started
+
+    rng = random.Random(1)
+    result = {"record_count": record_count, "store_backend": store_backend, "seed_seconds": round(seed_seconds, 3)}
+    with TestClient(app) as client:
+        result["append_video_record"] = _timed(
+            lambda index: append_video_record(
+                video_name=f"bench_append_{index}.mp4", person_count=0, status="processing", record_id=f"append-{index}"
+            ),
+            samples,
+        )
+        result["update_video_record"] = _timed(
+            lambda index: update_video_record(
+                f"bench-{rng.randrange(record_count):07d}",
+                status="completed",
+                person_count=rng.randint(0, 40),
+                completed_at=datetime.utcnow().isoformat(),
+            ),
+            samples,
+        )
+        result["build_analytics_payload"] = _timed(lambda index: build_analytics_payload(), samples)
+        result["api_analytics"] = _timed(lambda index: client.get("/api/analytics").raise_for_status(), samples)
+    return result
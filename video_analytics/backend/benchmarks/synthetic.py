@@ -0,0 +1,66 @@
+import math
+
+import cv2
+import numpy as np
+
+
+def _person_blob(frame, center_x, center_y, scale, color):
+    # A rough standing figure: head, torso and legs, so the frame has
+    # person-sized moving regions for the encoder and motion gate to see.
+    head_radius = max(2, int(6 * scale))
+    torso_width, torso_height = max(3, int(12 * scale)), max(6, int(30 * scale))
+    cv2.circle(frame, (center_x, center_y - torso_height // 2 - head_radius), head_radius, color, -1)
+    cv2.rectangle(
+        frame,
+        (center_x - torso_width // 2, center_y - torso_height // 2),
+        (center_x + torso_width // 2, center_y + torso_height // 2),
+        color,
+        -1,
+    )
+    leg_length = max(4, int(22 * scale))
+    for offset in (-torso_width // 3, torso_width // 3):
+        cv2.line(
+            frame,
+            (center_x + offset, center_y + torso_height // 2),
+            (center_x + offset, center_y + torso_height // 2 + leg_length),
+            color,
+            max(1, int(4 * scale)),
+        )
+
+
+def make_synthetic_video(path, width=1280, height=720, seconds=10, fps=25, people=4, seed=0):
+    # Writes an mp4v video of `people` blobs walking across a textured
+    # background and returns its metadata.
+    rng = np.random.default_rng(seed)
+    background = rng.integers(40, 90, size=(height, width, 3), dtype=np.uint8)
+    background = cv2.GaussianBlur(background, (0, 0), 3)
+    scale = height / 360
+
+    walkers = [
+        {
+            "x": rng.uniform(0, width),
+            "y": rng.uniform(height * 0.3, height * 0.8),
+            "speed": rng.uniform(0.5, 2.5) * scale * rng.choice((-1, 1)),
+            "phase": rng.uniform(0, 2 * math.pi),
+            "color": tuple(int(c) for c in rng.integers(120, 255, size=3)),
+        }
+        for _ in range(people)
+    ]
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise ValueError(f"Could not create synthetic video: {path}")
+
+    total_frames = int(seconds * fps)
+    try:
+        for frame_index in range(total_frames):
+            frame = background.copy()
+            for walker in walkers:
+                x = int(walker["x"] + walker["speed"] * frame_index) % width
+                y = int(walker["y"] + 4 * scale * math.sin(walker["phase"] + frame_index / fps * 2 * math.pi))
+                _person_blob(frame, x, y, scale, walker["color"])
+            writer.write(frame)
+    finally:
+        writer.release()
+
+    return {"path": path, "width": width, "height": height, "seconds": seconds, "fps": fps, "people": people, "frames": total_frames}
@@ -0,0 +1,25 @@
+import cv2
+
+
+def draw_person_boxes(frame, boxes, confs, labels=None):
+    for index, box in enumerate(boxes):
+        x1, y1, x2, y2 = map(int, box)
+        label = labels[index] if labels is not None else f"Person {float(confs[index]):.2f}"
+
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 2)
+        cv2.putText(frame, label,
+                    (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5, (0,255,0), 2)
+    return len(boxes)
+
+
+def draw_count(frame, person_count):
+    cv2.putText(frame, f"Count: {person_count}",
+                (20, 40),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                1, (0,0,255), 2)
+
+
+def draw_region(frame, polygon):
+    cv2.polylines(frame, [polygon.round().astype("int32")], True, (255,200,0), 2)
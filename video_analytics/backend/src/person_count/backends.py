@@ -0,0 +1,155 @@
+import os
+import shutil
+import time
+from threading import Lock
+from uuid import uuid4
+
+import numpy as np
+
+from src.person_count.counting import empty_detections
+
+
+INFERENCE_BACKENDS = ("pytorch", "onnx", "onnx-int8", "openvino")
+
+
+def _load_yolo(path, **kwargs):
+    # Imported on first use: ultralytics pulls in torch, which dominates
+    # import time for anything that never runs inference.
+    from ultralytics import YOLO
+
+    return YOLO(path, **kwargs)
+
+
+def _extract_detections(result):
+    # (xyxy, conf, cls) as plain arrays so results can outlive the model call.
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return empty_detections()
+    return (
+        boxes.xyxy.cpu().numpy().astype(np.float32).reshape(-1, 4),
+        boxes.conf.cpu().numpy().astype(np.float32).reshape(-1),
+        boxes.cls.cpu().numpy().astype(np.int16).reshape(-1),
+    )
+
+
+def _is_fresh(artifact_path, weights_path):
+    return os.path.exists(artifact_path) and os.path.getmtime(artifact_path) >= os.path.getmtime(weights_path)
+
+
+def _publish(temp_path, artifact_path):
+    # Exports are built under a private name and moved into place, so
+    # concurrent workers never load a half-written artifact.
+    if os.path.isdir(temp_path):
+        if os.path.exists(artifact_path):
+            shutil.rmtree(artifact_path, ignore_errors=True)
+        try:
+            os.replace(temp_path, artifact_path)
+        except OSError:
+            # Another worker published the same export first.
+            shutil.rmtree(temp_path, ignore_errors=True)
+    else:
+        os.replace(temp_path, artifact_path)
+    return artifact_path
+
+
+def _export(weights_path, export_format, imgsz, export_dir):
+    # Ultralytics writes exports next to the weights, so export from a private
+    # copy to keep concurrent exports from clobbering each other.
+    work_dir = os.path.join(export_dir, f".export-{uuid4().hex}")
+    os.makedirs(work_dir)
+    try:
+        local_weights = shutil.copy2(weights_path, work_dir)
+        try:
+            exported = _load_yolo(local_weights).export(format=export_format, imgsz=imgsz, dynamic=True, verbose=False)
+        except ImportError as exc:
+            raise ValueError(f"The {export_format} backend needs an optional dependency: {exc}") from exc
+
+        temp_path = os.path.join(export_dir, f".{uuid4().hex}_{os.path.basename(str(exported).rstrip(os.sep))}")
+        shutil.move(str(exported), temp_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return temp_path
+
+
+def _quantize_int8(onnx_path, temp_path):
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as exc:
+        raise ValueError("The onnx-int8 backend needs onnxruntime with quantization support.") from exc
+
+    quantize_dynamic(onnx_path, temp_path, weight_type=QuantType.QUInt8)
+    return temp_path
+
+
+def exported_model_path(weights_path, backend, imgsz, export_dir=None):
+    # Returns the model file (or OpenVINO directory) for backend, exporting
+    # it once and caching it under models/exports keyed by backend and imgsz.
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unsupported inference backend: {backend}")
+    if backend == "pytorch":
+        return weights_path
+    if not os.path.exists(weights_path):
+        raise ValueError(f"Model weights not found: {weights_path}")
+
+    export_dir = export_dir or os.path.join(os.path.dirname(weights_path), "exports")
+    os.makedirs(export_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+
+    onnx_path = os.path.join(export_dir, f"{stem}_{imgsz}.onnx")
+    if backend in ("onnx", "onnx-int8") and not _is_fresh(onnx_path, weights_path):
+        _publish(_export(weights_path, "onnx", imgsz, export_dir), onnx_path)
+    if backend == "onnx":
+        return onnx_path
+
+    if backend == "onnx-int8":
+        int8_path = os.path.join(export_dir, f"{stem}_{imgsz}_int8.onnx")
+        if not _is_fresh(int8_path, weights_path):
+            temp_path = os.path.join(export_dir, f".{uuid4().hex}_int8.onnx")
+            _publish(_quantize_int8(onnx_path, temp_path), int8_path)
+        return int8_path
+
+    openvino_path = os.path.join(export_dir, f"{stem}_{imgsz}_openvino_model")
+    if not _is_fresh(openvino_path, weights_path):
+        _publish(_export(weights_path, "openvino", imgsz, export_dir), openvino_path)
+    return openvino_path
+
+
+class Detector:
+    # One loaded model behind a common call: frames in, one
+    # (xyxy, conf, cls) tuple per frame out, whichever runtime executes it.
+    # Ultralytics drives all of the exported formats, so pre/post-processing
+    # (letterboxing, NMS) is identical across backends.
+    def __init__(self, weights_path, backend="pytorch", imgsz=640):
+        self.backend = backend
+        self.imgsz = imgsz
+        self.model_path = exported_model_path(weights_path, backend, imgsz)
+        self._model = _load_yolo(self.model_path, task="detect")
+        self._lock = Lock()
+
+    def __call__(self, frames, conf):
+        with self._lock:
+            results = self._model(frames, conf=conf, imgsz=self.imgsz, verbose=False)
+        return [_extract_detections(result) for result in results]
+
+
+class LatencyStats:
+    # Per-frame inference latency; a batch's time is split evenly over its frames.
+    def __init__(self):
+        self.samples = []
+
+    def time_batch(self, detector, frames, conf):
+        start = time.perf_counter()
+        detections = detector(frames, conf)
+        elapsed = time.perf_counter() - start
+        self.samples.extend([elapsed / len(frames)] * len(frames))
+        return detections, elapsed
+
+    def summary(self):
+        if not self.samples:
+            return {"mean_ms": 0, "p50_ms": 0, "p95_ms": 0}
+        samples = np.asarray(self.samples) * 1000
+        return {
+            "mean_ms": round(float(samples.mean()), 2),
+            "p50_ms": round(float(np.percentile(samples, 50)), 2),
+            "p95_ms": round(float(np.percentile(samples, 95)), 2),
+        }
@@ -0,0 +1,130 @@
+import time
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
+
+
+class _Request:
+    def __init__(self, frames, conf):
+        self.frames = frames
+        self.conf = conf
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class BatchingDetector:
+    # Shares one detector between concurrent jobs in a process. Calls from
+    # any thread are queued and a single server thread runs them through the
+    # model together, in batches of up to max_batch_size frames, waiting at
+    # most max_wait_seconds for a batch to fill. Same call as Detector.
+    def __init__(self, detector, max_batch_size=16, max_wait_seconds=0.005):
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_seconds)
+        self._requests = Queue()
+        self._thread = None
+        self._lock = Lock()
+        self._batches = 0
+        self._frames = 0
+        self._in_flight = []
+        # Set when the server thread has died; later calls fail with it.
+        self._error = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._serve, name="inference-server", daemon=True)
+                self._thread.start()
+
+    def __call__(self, frames, conf):
+        request = _Request(list(frames), conf)
+        if not request.frames:
+            return []
+        self._ensure_started()
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            self._requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self):
+        pending = [self._requests.get()]
+        size = len(pending[0].frames)
+        deadline = time.monotonic() + self.max_wait_seconds
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=timeout)
+            except Empty:
+                break
+            pending.append(request)
+            size += len(request.frames)
+        return pending
+
+    def _serve(self):
+        try:
+            while True:
+                self._in_flight = self._collect()
+                # One model call takes one confidence; jobs normally share it.
+                by_conf = {}
+                for request in self._in_flight:
+                    by_conf.setdefault(request.conf, []).append(request)
+                for conf, requests in by_conf.items():
+                    self._run(conf, requests)
+                self._in_flight = []
+        except BaseException as exc:
+            self._fail_all(exc)
+            raise
+
+    def _fail_all(self, exc):
+        # Anything that escapes _run (KeyboardInterrupt, SystemExit) ends the
+        # thread; callers already waiting and every later call get an error
+        # instead of blocking forever.
+        error = RuntimeError("The inference server stopped.")
+        error.__cause__ = exc
+        with self._lock:
+            self._error = error
+            pending = list(self._in_flight)
+            while True:
+                try:
+                    pending.append(self._requests.get_nowait())
+                except Empty:
+                    break
+        for request in pending:
+            if not request.done.is_set():
+                request.error = error
+                request.done.set()
+
+    def _run(self, conf, requests):
+        frames = [frame for request in requests for frame in request.frames]
+        try:
+            results = []
+            for start in range(0, len(frames), self.max_batch_size):
+                results.extend(self.detector(frames[start:start + self.max_batch_size], conf))
+                self._batches += 1
+            self._frames += len(frames)
+        except Exception as exc:
+            for request in requests:
+                request.error = exc
+                request.done.set()
+            return
+
+        offset = 0
+        for request in requests:
+            request.result = results[offset:offset + len(request.frames)]
+            offset += len(request.frames)
+            request.done.set()
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            "batches": self._batches,
+            "frames": self._frames,
+            "mean_batch_size": round(self._frames / self._batches, 2) if self._batches else 0,
+        }
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from src.person_count.count import process_video
+from src.person_count.series import CountSeries
+
+
+# Compares detect-every-N tracking runs against full detection on the same
+# video: throughput of each run and how far its counts drift from the
+# full-detection baseline.
+#
+#   python -m src.person_count.benchmark input.mp4 --detect-interval 2 5 10
+
+
+def _run(input_path, **kwargs):
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        _, peak_count, details = process_video(input_path, output_dir, **kwargs)
+        wall_seconds = time.perf_counter() - start
+        series = CountSeries(os.path.join(output_dir, details["series_file"]))
+        counts_per_second = {point["second"]: point["count"] for point in series.points(1)}
+
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "source_fps": round(details["total_frames"] / wall_seconds, 2) if wall_seconds > 0 else 0,
+        "sampled_fps": round(details["sampled_frames"] / wall_seconds, 2) if wall_seconds > 0 else 0,
+        "inferred_frames": details["inferred_frames"],
+        "inference_seconds": details["inference_seconds"],
+        "peak_count": peak_count,
+        "unique_persons": details["unique_persons"],
+        "counts_per_second": counts_per_second,
+    }
+
+
+def _drift(baseline, candidate):
+    seconds = sorted(set(baseline["counts_per_second"]) | set(candidate["counts_per_second"]))
+    errors = [
+        abs(candidate["counts_per_second"].get(second, 0) - baseline["counts_per_second"].get(second, 0))
+        for second in seconds
+    ]
+    return {
+        "mean_abs_count_error": round(sum(errors) / len(errors), 3) if errors else 0,
+        "max_abs_count_error": max(errors) if errors else 0,
+        "seconds_with_error": sum(1 for error in errors if error),
+        "peak_count_delta": candidate["peak_count"] - baseline["peak_count"],
+        "unique_persons_delta": candidate["unique_persons"] - baseline["unique_persons"],
+        "speedup": round(baseline["wall_seconds"] / candidate["wall_seconds"], 2) if candidate["wall_seconds"] > 0 else 0,
+    }
+
+
+def run_benchmark(input_path, detect_intervals, **kwargs):
+    baseline = _run(input_path, detect_interval=1, **kwargs)
+    report = {"input": os.path.basename(input_path), "settings": kwargs, "runs": []}
+    report["runs"].append({"detect_interval": 1, **_summary(baseline)})
+
+    for interval in detect_intervals:
+        if interval == 1:
+            continue
+        candidate = _run(input_path, detect_interval=interval, **kwargs)
+        report["runs"].append({"detect_interval": interval, **_summary(candidate), "drift": _drift(baseline, candidate)})
+
+    return report
+
+
+def _summary(run):
+    return {key: value for key, value in run.items() if key != "counts_per_second"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark detect-every-N tracking against full detection.")
+    parser.add_argument("input_path")
+    parser.add_argument("--detect-interval", type=int, nargs="+", default=[2, 5, 10])
+    parser.add_argument("--frame-stride", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--confidence", type=float, default=0.25)
+    parser.add_argument("--backend", default="pytorch")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.input_path,
+        args.detect_interval,
+        frame_stride=args.frame_stride,
+        batch_size=args.batch_size,
+        confidence=args.confidence,
+        backend=args.backend,
+        imgsz=args.imgsz,
+    )
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
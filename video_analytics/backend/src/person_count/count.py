@@ -1,21 +1,84 @@
 import cv2
 import os
-import subprocess
 import time
-from ultralytics import YOLO
 
-# Load YOLO11n model once from backend/models.
+from src.person_count.annotate import draw_count, draw_person_boxes, draw_region
+from src.person_count.backends import INFERENCE_BACKENDS, LatencyStats
+from src.person_count.counting import CountAccumulator, PersonBoxes
+from src.person_count.detections import DetectionRecorder, sidecar_path_for
+from src.person_count.encoders import open_video_writer
+from src.person_count.motion import MotionGate
+from src.person_count.pipeline import END_OF_STREAM, StagePipeline
+from src.person_count.regions import InferenceRegion
+from src.person_count.registry import ModelRegistry
+from src.person_count.sampling import SAMPLING_MODES, FrameSampler
+from src.person_count.series import series_path_for, write_series
+
+# YOLO11n from backend/models, loaded on first use.
 MODEL_PATH = os.path.join(
     os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
     "models",
     "yolo11n.pt",
 )
-model = YOLO(MODEL_PATH)
+model_registry = ModelRegistry(MODEL_PATH)
 
 
-def process_video(input_path, output_dir, frame_stride=1, progress_callback=None):
+def process_video(
+    input_path,
+    output_dir,
+    frame_stride=1,
+    progress_callback=None,
+    batch_size=1,
+    decode_queue_size=8,
+    result_queue_size=8,
+    encoder_mode="pipe",
+    ffmpeg_preset="veryfast",
+    ffmpeg_crf=23,
+    ffmpeg_threads=0,
+    sampling_mode="grab",
+    confidence=0.25,
+    motion_threshold=None,
+    motion_max_skip=10,
+    detect_interval=1,
+    save_detections=True,
+    detection_floor=None,
+    render=True,
+    backend="pytorch",
+    imgsz=640,
+    roi=None,
+    detect_max_side=0,
+    frame_range=None,
+    output_name=None,
+    inference_server=None,
+    hls_segment_seconds=4,
+    playlist_callback=None,
+):
+    # With render=False nothing is drawn, written or encoded: the returned
+    # output path is None and only the analytics (and sidecar) are produced.
+    # roi (see regions.parse_roi) limits detection and counting to part of
+    # the frame; detect_max_side downscales what the detector is given.
+    # frame_range=(start, end) processes only those source frames (one
+    # segment of a segmented run) and adds the raw count state to details.
+    # inference_server={"max_batch_size", "max_wait_seconds"} sends frames
+    # through the process-wide batching server shared with concurrent jobs.
+    # With encoder_mode="hls", playlist_callback(path) is called once the
+    # first HLS segment is listed in the playlist.
     if frame_stride < 1:
         raise ValueError("frame_stride must be >= 1.")
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1.")
+    if detect_interval < 1:
+        raise ValueError("detect_interval must be >= 1.")
+    if sampling_mode not in SAMPLING_MODES:
+        raise ValueError(f"Unsupported sampling mode: {sampling_mode}")
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unsupported inference backend: {backend}")
+    if detect_max_side < 0:
+        raise ValueError("detect_max_side must be >= 0.")
+    if inference_server:
+        detector = model_registry.server(backend, imgsz, **inference_server)
+    else:
+        detector = model_registry.get(backend, imgsz)
 
     cap = cv2.VideoCapture(input_path)
     if not cap.isOpened():
@@ -24,10 +87,8 @@ def process_video(input_path, output_dir, frame_stride=1, progress_callback=None
     filename = os.path.basename(input_path)
     stem, _ = os.path.splitext(filename)
     ts = int(time.time())
-    temp_output_path = os.path.join(output_dir, f"processed_{stem}_{ts}_raw.mp4")
-    output_path = os.path.join(output_dir, f"processed_{stem}_{ts}.mp4")
+    output_path = os.path.join(output_dir, output_name or f"processed_{stem}_{ts}.mp4")
 
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
     source_fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
     fps = source_fps if source_fps > 0 else 25.0
     source_total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
@@ -37,118 +98,234 @@ def process_video(input_path, output_dir, frame_stride=1, progress_callback=None
     if width <= 0 or height <= 0:
         cap.release()
         raise ValueError("Invalid video dimensions.")
+    start_frame, end_frame = frame_range or (0, None)
+    if end_frame is not None and source_total_frames > 0:
+        end_frame = min(end_frame, source_total_frames)
+    range_total_frames = (end_frame if end_frame is not None else source_total_frames) - start_frame
 
-    out = cv2.VideoWriter(temp_output_path, fourcc, output_fps, (width, height))
-    if not out.isOpened():
-        cap.release()
-        raise ValueError("Could not initialize output video writer.")
+    region = InferenceRegion(width, height, roi=roi, max_side=detect_max_side)
+
+    out = None
+    if render:
+        try:
+            out = open_video_writer(
+                encoder_mode,
+                output_path,
+                output_fps,
+                (width, height),
+                preset=ffmpeg_preset,
+                crf=ffmpeg_crf,
+                threads=ffmpeg_threads,
+                hls_segment_seconds=hls_segment_seconds,
+            )
+        except ValueError:
+            cap.release()
+            raise
+    # Checked about once per second of output until the first segment lands.
+    playlist_pending = playlist_callback is not None and hasattr(out, "playlist_ready")
+    playlist_check_every = max(1, int(output_fps))
 
-    max_person_count = 0
-    source_frame_index = 0
-    sampled_frames = 0
-    second_buckets = {}
+    started = time.perf_counter()
     last_reported_progress = -1
+    # Seconds spent in each stage; stages overlap on their own threads, so
+    # these add up to more than the wall time.
+    stage_seconds = dict.fromkeys(("decode", "inference", "annotate", "write", "encode", "sidecar"), 0.0)
+    inference_seconds = 0.0
+    inferred_frames_count = 0
+    latency = LatencyStats()
+    counts = CountAccumulator(fps)
+    # The sidecar keeps detections down to detection_floor so counts can later
+    # be recomputed at a lower threshold than the one used for this run.
+    model_confidence = min(confidence, detection_floor) if detection_floor is not None else confidence
+    recorder = DetectionRecorder() if save_detections else None
+
+    pipeline = StagePipeline()
+    decoded_frames = pipeline.make_queue(decode_queue_size)
+    inferred_frames = pipeline.make_queue(result_queue_size)
+
+    sampler = FrameSampler(
+        cap, frame_stride=frame_stride, mode=sampling_mode, start_frame=start_frame, end_frame=end_frame
+    )
+    # With a motion threshold, static frames reuse the previous detections.
+    motion_gate = None
+    if motion_threshold is not None:
+        motion_gate = MotionGate(threshold=motion_threshold, max_skip=motion_max_skip)
+
+    # Between keyframes (every detect_interval-th sampled frame) boxes are
+    # carried forward by the tracker instead of running the detector.
+    person_boxes = PersonBoxes(confidence)
+
+    def decode_stage():
+        decode_started = time.perf_counter()
+        for sampled_index, (frame_index, frame) in enumerate(sampler.frames()):
+            if sampled_index % detect_interval:
+                action = "track"
+            elif motion_gate and not motion_gate.should_infer(frame_index, region.crop_view(frame)):
+                action = "reuse"
+            else:
+                action = "detect"
+            # Cropping and downscaling here keeps the full-size frame out of
+            # the detector's preprocessing.
+            detect_frame = region.prepare(frame) if action == "detect" else None
+            stage_seconds["decode"] += time.perf_counter() - decode_started
+            pipeline.put("decode", decoded_frames, (frame_index, frame, action, detect_frame))
+            decode_started = time.perf_counter()
+        pipeline.put("decode", decoded_frames, END_OF_STREAM)
+
+    def inference_stage():
+        nonlocal inference_seconds, inferred_frames_count
+        finished = False
+        while not finished:
+            batch = []
+            item = pipeline.get("inference", decoded_frames)
+            while item is not END_OF_STREAM:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    break
+                item = pipeline.get("inference", decoded_frames)
+            finished = item is END_OF_STREAM
+
+            to_infer = [detect_frame for _, _, action, detect_frame in batch if action == "detect"]
+            results = iter([])
+            if to_infer:
+                # One model call per batch amortises the per-call pre/post-processing overhead.
+                batch_detections, elapsed = latency.time_batch(detector, to_infer, model_confidence)
+                results = iter(batch_detections)
+                inference_seconds += elapsed
+                inferred_frames_count += len(to_infer)
+
+            for frame_index, frame, action, _ in batch:
+                detections = region.to_source(next(results)) if action == "detect" else None
+                pipeline.put("inference", inferred_frames, (frame_index, frame, action, detections))
+
+        pipeline.put("inference", inferred_frames, END_OF_STREAM)
+
+    def annotate_stage():
+        nonlocal last_reported_progress, playlist_pending
+        while True:
+            item = pipeline.get("annotate", inferred_frames)
+            if item is END_OF_STREAM:
+                break
+
+            frame_index, frame, action, detections = item
+            annotate_started = time.perf_counter()
+            if recorder is not None:
+                recorder.add(frame_index, action, detections)
+            boxes, confs, labels = person_boxes.boxes_for(frame_index, action, detections)
+            counts.add(frame_index, len(boxes))
+            if out is not None:
+                if region.roi is not None:
+                    draw_region(frame, region.polygon)
+                draw_person_boxes(frame, boxes, confs, labels)
+                draw_count(frame, len(boxes))
+                write_started = time.perf_counter()
+                stage_seconds["annotate"] += write_started - annotate_started
+                out.write(frame)
+                stage_seconds["write"] += time.perf_counter() - write_started
+                if (
+                    playlist_pending
+                    and counts.sampled_frames % playlist_check_every == 0
+                    and out.playlist_ready()
+                ):
+                    playlist_callback(out.playlist_path)
+                    playlist_pending = False
+            else:
+                stage_seconds["annotate"] += time.perf_counter() - annotate_started
+
+            if progress_callback and range_total_frames > 0:
+                processed = frame_index + 1 - start_frame
+                progress = int((processed / range_total_frames) * 100)
+                progress = min(100, max(0, progress))
+                if progress != last_reported_progress:
+                    progress_callback(progress, processed, range_total_frames)
+                    last_reported_progress = progress
+
+    try:
+        pipeline.run([
+            ("decode", decode_stage),
+            ("inference", inference_stage),
+            ("annotate", annotate_stage),
+        ])
+    except BaseException:
+        if out is not None:
+            out.abort()
+        raise
+    finally:
+        cap.release()
+
+    if out is not None:
+        encode_started = time.perf_counter()
+        out.close()
+        stage_seconds["encode"] = time.perf_counter() - encode_started
+
+    processed_source_frames = range_total_frames if range_total_frames > 0 else sampler.frames_seen - start_frame
+    detections_path = None
+    sidecar_started = time.perf_counter()
+    if recorder is not None:
+        detections_path = recorder.save(
+            sidecar_path_for(output_path),
+            {
+                "source": filename,
+                "fps": fps,
+                "total_frames": processed_source_frames,
+                "width": width,
+                "height": height,
+                "frame_stride": frame_stride,
+                "sampling_mode": sampling_mode,
+                "confidence": confidence,
+                "detection_floor": model_confidence,
+                "detect_interval": detect_interval,
+                "roi": roi,
+            },
+        )
+    # Segments hand their count state back instead; the merged run writes
+    # the series.
+    series_path = write_series(series_path_for(output_path), counts) if frame_range is None else None
+    stage_seconds["sidecar"] = time.perf_counter() - sidecar_started
+    stage_seconds["inference"] = inference_seconds
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        if frame_stride > 1 and source_frame_index % frame_stride != 0:
-            source_frame_index += 1
-            continue
-
-        results = model(frame, verbose=False)
-
-        person_count = 0
-
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                cls = int(box.cls[0])
-                if cls == 0:  # class 0 = person
-                    person_count += 1
-
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    conf = float(box.conf[0])
-
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 2)
-                    cv2.putText(frame, f"Person {conf:.2f}",
-                                (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX,
-                                0.5, (0,255,0), 2)
-
-        max_person_count = max(max_person_count, person_count)
-        second_index = int(source_frame_index / fps) if fps else sampled_frames
-        if second_index not in second_buckets:
-            second_buckets[second_index] = {"sum": 0, "frames": 0}
-        second_buckets[second_index]["sum"] += person_count
-        second_buckets[second_index]["frames"] += 1
-
-        sampled_frames += 1
-
-        cv2.putText(frame, f"Count: {person_count}",
-                    (20, 40),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1, (0,0,255), 2)
-
-        out.write(frame)
-        source_frame_index += 1
-
-        if progress_callback and source_total_frames > 0:
-            progress = int((source_frame_index / source_total_frames) * 100)
-            progress = min(100, max(0, progress))
-            if progress != last_reported_progress:
-                progress_callback(progress, source_frame_index, source_total_frames)
-                last_reported_progress = progress
-
-    cap.release()
-    out.release()
-
-    # Re-encode to H.264 for broad browser compatibility.
-    ffmpeg_cmd = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        temp_output_path,
-        "-c:v",
-        "libx264",
-        "-preset",
-        "veryfast",
-        "-pix_fmt",
-        "yuv420p",
-        "-movflags",
-        "+faststart",
-        output_path,
-    ]
-    result = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if result.returncode != 0:
-        raise ValueError("Failed to encode output video for browser playback.")
-
-    if os.path.exists(temp_output_path):
-        os.remove(temp_output_path)
-
-    # Reduce to per-second data for frontend graphing.
-    counts_per_second = []
-    for second in sorted(second_buckets.keys()):
-        bucket = second_buckets[second]
-        if bucket["frames"] <= 0:
-            continue
-        avg_count = round(bucket["sum"] / bucket["frames"])
-        counts_per_second.append({"second": second, "count": avg_count})
-
-    processed_source_frames = source_total_frames or source_frame_index
+    max_person_count = counts.peak_count
     details = {
         "fps": fps,
         "total_frames": processed_source_frames,
-        "sampled_frames": sampled_frames,
+        "sampled_frames": counts.sampled_frames,
         "frame_stride": frame_stride,
+        "sampling_mode": sampling_mode,
+        "confidence": confidence,
+        "batch_size": batch_size,
+        "inference_backend": backend,
+        "imgsz": imgsz,
+        "inference_region": region.describe(),
+        "inference_latency": latency.summary(),
+        "inference_server": dict(inference_server) if inference_server else None,
+        "inferred_frames": inferred_frames_count,
+        "inference_seconds": round(inference_seconds, 3),
+        "inference_fps": round(inferred_frames_count / inference_seconds, 2) if inference_seconds > 0 else 0,
+        "pipeline_stages": pipeline.stage_stats(),
+        "timings": {stage: round(seconds, 3) for stage, seconds in stage_seconds.items()},
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "processing_mode": "annotated" if render else "analytics",
+        "encoder": encoder_mode if render else None,
+        "encode_seconds": round(out.encode_seconds, 3) if out is not None else 0,
         "duration_seconds": round(processed_source_frames / fps, 2) if fps else 0,
-        "counts_per_second": counts_per_second,
         "peak_count": max_person_count,
+        "detect_interval": detect_interval,
+        "tracked_frames": person_boxes.tracked_frames,
+        "unique_persons": person_boxes.unique_persons,
     }
+    if frame_range is not None:
+        details["frame_range"] = [start_frame, start_frame + processed_source_frames]
+        details["count_state"] = counts.state()
+    if detections_path is not None:
+        details["detections_file"] = os.path.basename(detections_path)
+    if series_path is not None:
+        details["series_file"] = os.path.basename(series_path)
+    if out is not None and hasattr(out, "playlist_path"):
+        details["hls_playlist"] = os.path.relpath(out.playlist_path, output_dir)
+    if motion_gate is not None:
+        details["motion_gate"] = motion_gate.stats()
 
     if progress_callback:
         progress_callback(100, processed_source_frames, processed_source_frames)
 
-    return output_path, max_person_count, details
+    return (output_path if render else None), max_person_count, details
@@ -0,0 +1,120 @@
+import numpy as np
+
+from src.person_count.tracking import IouTracker
+
+
+PERSON_CLASS = 0
+FRAME_ACTIONS = ("detect", "reuse", "track")
+
+
+def empty_detections():
+    return (
+        np.zeros((0, 4), dtype=np.float32),
+        np.zeros((0,), dtype=np.float32),
+        np.zeros((0,), dtype=np.int16),
+    )
+
+
+class PersonBoxes:
+    # Turns the per-frame detector output into the person boxes shown and
+    # counted on that frame. "detect" frames use fresh detections, "reuse"
+    # frames (motion gate) repeat the last ones and "track" frames take the
+    # tracker's prediction. Replaying the same detections through this class
+    # reproduces the original counts exactly, which is what the sidecar relies on.
+    def __init__(self, confidence):
+        self.confidence = confidence
+        self.tracker = IouTracker()
+        self.tracked_frames = 0
+        self._people = empty_detections()[:2]
+        self._earlier_unique = 0
+
+    @property
+    def unique_persons(self):
+        return self._earlier_unique + self.tracker.unique_count
+
+    def restart(self):
+        # Segmented runs start every segment with a fresh tracker; replays
+        # restart at the same frames to reproduce their counts.
+        self._earlier_unique += self.tracker.unique_count
+        self.tracker = IouTracker()
+        self._people = empty_detections()[:2]
+
+    def boxes_for(self, frame_index, action, detections):
+        # Returns (boxes, confs, labels); labels is None for the default style.
+        if action == "detect":
+            xyxy, conf, cls = detections
+            keep = (cls == PERSON_CLASS) & (conf >= self.confidence)
+            self._people = (xyxy[keep], conf[keep])
+            self.tracker.update(frame_index, *self._people)
+            return self._people[0], self._people[1], None
+        if action == "reuse":
+            return self._people[0], self._people[1], None
+
+        track_ids, boxes, confs = self.tracker.predict(frame_index)
+        self.tracked_frames += 1
+        return boxes, confs, [f"Person #{track_id}" for track_id in track_ids]
+
+
+class CountAccumulator:
+    # Per-frame person counts reduced to peak and time buckets.
+    def __init__(self, fps):
+        self.fps = fps
+        self.peak_count = 0
+        self.sampled_frames = 0
+        self.second_buckets = {}
+
+    def add(self, frame_index, person_count):
+        self.peak_count = max(self.peak_count, person_count)
+        second_index = int(frame_index / self.fps) if self.fps else self.sampled_frames
+        if second_index not in self.second_buckets:
+            self.second_buckets[second_index] = {"sum": 0, "frames": 0, "peak": 0}
+        bucket = self.second_buckets[second_index]
+        bucket["sum"] += person_count
+        bucket["frames"] += 1
+        bucket["peak"] = max(bucket["peak"], person_count)
+        self.sampled_frames += 1
+
+    def state(self):
+        return {
+            "peak_count": self.peak_count,
+            "sampled_frames": self.sampled_frames,
+            "second_buckets": self.second_buckets,
+        }
+
+    @classmethod
+    def from_state(cls, fps, state):
+        counts = cls(fps)
+        counts.peak_count = state["peak_count"]
+        counts.sampled_frames = state["sampled_frames"]
+        counts.second_buckets = {int(second): dict(bucket) for second, bucket in state["second_buckets"].items()}
+        return counts
+
+    def merge(self, other):
+        # Buckets hold sums and frame counts rather than averages, so merging
+        # the accumulators of disjoint frame ranges is exact.
+        self.peak_count = max(self.peak_count, other.peak_count)
+        self.sampled_frames += other.sampled_frames
+        for second, bucket in other.second_buckets.items():
+            total = self.second_buckets.setdefault(second, {"sum": 0, "frames": 0, "peak": 0})
+            total["sum"] += bucket["sum"]
+            total["frames"] += bucket["frames"]
+            total["peak"] = max(total["peak"], bucket["peak"])
+        return self
+
+    def counts_per_second(self, bucket_seconds=1):
+        # Average count per bucket, keyed by the bucket's first second.
+        bucket_seconds = max(1, int(bucket_seconds))
+        merged = {}
+        for second, bucket in self.second_buckets.items():
+            start = (second // bucket_seconds) * bucket_seconds
+            total = merged.setdefault(start, {"sum": 0, "frames": 0})
+            total["sum"] += bucket["sum"]
+            total["frames"] += bucket["frames"]
+
+        counts = []
+        for second in sorted(merged.keys()):
+            bucket = merged[second]
+            if bucket["frames"] <= 0:
+                continue
+            counts.append({"second": second, "count": round(bucket["sum"] / bucket["frames"])})
+        return counts
@@ -0,0 +1,114 @@
+import json
+import os
+
+import numpy as np
+
+from src.person_count.counting import FRAME_ACTIONS, empty_detections
+
+
+SIDECAR_VERSION = 1
+SIDECAR_SUFFIX = ".detections.npz"
+
+
+def sidecar_path_for(output_path):
+    stem, _ = os.path.splitext(output_path)
+    return f"{stem}{SIDECAR_SUFFIX}"
+
+
+class DetectionRecorder:
+    # Collects every sampled frame's raw detections (all classes, down to the
+    # stored confidence floor) in columnar form: one row per sampled frame plus
+    # flat box arrays sliced by offsets. Only "detect" frames carry boxes; the
+    # other actions are replayed from them.
+    def __init__(self):
+        self._frame_index = []
+        self._action = []
+        self._counts = []
+        self._xyxy = []
+        self._conf = []
+        self._cls = []
+
+    def add(self, frame_index, action, detections):
+        self._frame_index.append(frame_index)
+        self._action.append(FRAME_ACTIONS.index(action))
+        if detections is None:
+            self._counts.append(0)
+            return
+        xyxy, conf, cls = detections
+        self._counts.append(len(conf))
+        self._xyxy.append(xyxy)
+        self._conf.append(conf)
+        self._cls.append(cls)
+
+    def save(self, path, meta):
+        empty_xyxy, empty_conf, empty_cls = empty_detections()
+        offsets = np.zeros(len(self._counts) + 1, dtype=np.int64)
+        np.cumsum(self._counts, out=offsets[1:])
+        return _write_sidecar(
+            path,
+            meta,
+            frame_index=np.asarray(self._frame_index, dtype=np.int64),
+            action=np.asarray(self._action, dtype=np.uint8),
+            offsets=offsets,
+            xyxy=np.concatenate(self._xyxy) if self._xyxy else empty_xyxy,
+            conf=np.concatenate(self._conf) if self._conf else empty_conf,
+            cls=np.concatenate(self._cls) if self._cls else empty_cls,
+        )
+
+
+def _write_sidecar(path, meta, **arrays):
+    temp_path = f"{path}.tmp.npz"
+    np.savez_compressed(temp_path, meta=np.array(json.dumps(dict(meta, version=SIDECAR_VERSION))), **arrays)
+    os.replace(temp_path, path)
+    return path
+
+
+def merge_sidecars(paths, path, **meta):
+    # Joins sidecars of consecutive frame ranges, in order, into one. The
+    # first part's meta is kept, updated with meta. segment_starts records the
+    # first sampled frame of each part, where replays restart the tracker;
+    # a range's own start is a keyframe and need not be a sampled frame.
+    parts = [DetectionSidecar(part_path) for part_path in paths]
+    offsets = [np.zeros(1, dtype=np.int64)]
+    base = 0
+    for part in parts:
+        offsets.append(part.offsets[1:] + base)
+        base += int(part.offsets[-1])
+    return _write_sidecar(
+        path,
+        dict(parts[0].meta, **{"segment_starts": [int(part.frame_index[0]) for part in parts if len(part)], **meta}),
+        frame_index=np.concatenate([part.frame_index for part in parts]),
+        action=np.concatenate([part.action for part in parts]),
+        offsets=np.concatenate(offsets),
+        xyxy=np.concatenate([part.xyxy for part in parts]),
+        conf=np.concatenate([part.conf for part in parts]),
+        cls=np.concatenate([part.cls for part in parts]),
+    )
+
+
+class DetectionSidecar:
+    def __init__(self, path):
+        self.path = str(path)
+        with np.load(self.path, allow_pickle=False) as data:
+            self.meta = json.loads(str(data["meta"]))
+            if self.meta.get("version") != SIDECAR_VERSION:
+                raise ValueError(f"Unsupported detection sidecar version: {self.meta.get('version')}")
+            self.frame_index = data["frame_index"]
+            self.action = data["action"]
+            self.offsets = data["offsets"]
+            self.xyxy = data["xyxy"]
+            self.conf = data["conf"]
+            self.cls = data["cls"]
+
+    def __len__(self):
+        return len(self.frame_index)
+
+    def frames(self):
+        # Yields (frame_index, action, detections) in the original order.
+        for row in range(len(self.frame_index)):
+            action = FRAME_ACTIONS[int(self.action[row])]
+            detections = None
+            if action == "detect":
+                start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+                detections = (self.xyxy[start:end], self.conf[start:end], self.cls[start:end])
+            yield int(self.frame_index[row]), action, detections
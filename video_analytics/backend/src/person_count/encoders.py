@@ -0,0 +1,290 @@
+import cv2
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+
+ENCODER_MODES = ("pipe", "reencode", "hls")
+
+
+def _x264_codec_args(preset, crf, threads):
+    return [
+        "-c:v",
+        "libx264",
+        "-preset",
+        preset,
+        "-crf",
+        str(crf),
+        "-threads",
+        str(threads),
+        "-pix_fmt",
+        "yuv420p",
+    ]
+
+
+def _x264_output_args(preset, crf, threads):
+    return [*_x264_codec_args(preset, crf, threads), "-movflags", "+faststart"]
+
+
+def hls_dir_for(output_path):
+    stem, _ = os.path.splitext(output_path)
+    return f"{stem}_hls"
+
+
+def remove_hls_segments(output_path):
+    # The segments only serve playback while the job runs; the finished MP4
+    # holds the same stream.
+    if output_path:
+        shutil.rmtree(hls_dir_for(output_path), ignore_errors=True)
+
+
+def remove_video_output(output_path):
+    # The rendered MP4 and, for HLS runs, its segment directory.
+    if output_path and os.path.exists(output_path):
+        os.remove(output_path)
+    remove_hls_segments(output_path)
+
+
+class FfmpegPipeWriter:
+    # Streams raw BGR frames into a single long-lived ffmpeg process so the
+    # annotated video is encoded to H.264 exactly once.
+    def __init__(self, output_path, fps, frame_size, preset="veryfast", crf=23, threads=0):
+        self.output_path = output_path
+        self.encode_seconds = 0.0
+        self._start(fps, frame_size, [*_x264_output_args(preset, crf, threads), output_path])
+
+    def _start(self, fps, frame_size, output_args):
+        width, height = frame_size
+        self._stderr = tempfile.TemporaryFile()
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "bgr24",
+            "-s",
+            f"{width}x{height}",
+            "-r",
+            f"{fps:.6f}",
+            "-i",
+            "-",
+            "-an",
+            *output_args,
+        ]
+        try:
+            self._process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=self._stderr,
+            )
+        except OSError as exc:
+            self._stderr.close()
+            raise ValueError("Could not start ffmpeg for output encoding.") from exc
+
+    def write(self, frame):
+        started = time.perf_counter()
+        try:
+            self._process.stdin.write(frame.tobytes())
+        except (BrokenPipeError, ValueError) as exc:
+            self._process.kill()
+            raise ValueError("Failed to encode output video for browser playback.") from exc
+        finally:
+            self.encode_seconds += time.perf_counter() - started
+
+    def close(self):
+        started = time.perf_counter()
+        try:
+            if self._process.stdin and not self._process.stdin.closed:
+                try:
+                    self._process.stdin.close()
+                except BrokenPipeError:
+                    pass
+            returncode = self._process.wait()
+        finally:
+            self.encode_seconds += time.perf_counter() - started
+            self._stderr.close()
+
+        if returncode != 0:
+            if os.path.exists(self.output_path):
+                os.remove(self.output_path)
+            raise ValueError("Failed to encode output video for browser playback.")
+
+    def abort(self):
+        if self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        self._stderr.close()
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+
+class FfmpegHlsWriter(FfmpegPipeWriter):
+    # Encodes into fragmented-MP4 HLS segments next to the output
+    # (<stem>_hls/index.m3u8) while frames arrive, so playback can start once
+    # the first segment is written. Keyframes are forced at every segment
+    # boundary. On close the segments are remuxed, without re-encoding, into
+    # the MP4 at output_path; the caller removes the segment directory with
+    # remove_hls_segments once nothing plays from it.
+    def __init__(self, output_path, fps, frame_size, preset="veryfast", crf=23, threads=0, segment_seconds=4):
+        self.output_path = output_path
+        self.encode_seconds = 0.0
+        self.hls_dir = hls_dir_for(output_path)
+        self.playlist_path = os.path.join(self.hls_dir, "index.m3u8")
+        os.makedirs(self.hls_dir, exist_ok=True)
+        output_args = [
+            *_x264_codec_args(preset, crf, threads),
+            "-force_key_frames",
+            f"expr:gte(t,n_forced*{segment_seconds})",
+            "-f",
+            "hls",
+            "-hls_time",
+            str(segment_seconds),
+            "-hls_playlist_type",
+            "event",
+            "-hls_segment_type",
+            "fmp4",
+            "-hls_fmp4_init_filename",
+            "init.mp4",
+            "-hls_flags",
+            "independent_segments+temp_file",
+            "-hls_segment_filename",
+            os.path.join(self.hls_dir, "segment_%05d.m4s"),
+            self.playlist_path,
+        ]
+        try:
+            self._start(fps, frame_size, output_args)
+        except ValueError:
+            shutil.rmtree(self.hls_dir, ignore_errors=True)
+            raise
+
+    def playlist_ready(self):
+        return os.path.exists(self.playlist_path)
+
+    def close(self):
+        try:
+            super().close()
+        except ValueError:
+            shutil.rmtree(self.hls_dir, ignore_errors=True)
+            raise
+        started = time.perf_counter()
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-i",
+            self.playlist_path,
+            "-c",
+            "copy",
+            "-movflags",
+            "+faststart",
+            self.output_path,
+        ]
+        try:
+            subprocess.run(cmd, check=True, capture_output=True)
+        except (OSError, subprocess.CalledProcessError) as exc:
+            remove_video_output(self.output_path)
+            raise ValueError("Failed to encode output video for browser playback.") from exc
+        finally:
+            self.encode_seconds += time.perf_counter() - started
+
+    def abort(self):
+        super().abort()
+        shutil.rmtree(self.hls_dir, ignore_errors=True)
+
+
+class Mp4vReencodeWriter:
+    # Legacy path: write an mp4v intermediate with OpenCV, then re-encode it to
+    # H.264 with ffmpeg once all frames are written.
+    def __init__(self, output_path, fps, frame_size, preset="veryfast", crf=23, threads=0):
+        stem, ext = os.path.splitext(output_path)
+        self.output_path = output_path
+        self.temp_output_path = f"{stem}_raw{ext}"
+        self.encode_seconds = 0.0
+        self._output_args = _x264_output_args(preset, crf, threads)
+
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+        self._writer = cv2.VideoWriter(self.temp_output_path, fourcc, fps, frame_size)
+        if not self._writer.isOpened():
+            raise ValueError("Could not initialize output video writer.")
+
+    def write(self, frame):
+        started = time.perf_counter()
+        self._writer.write(frame)
+        self.encode_seconds += time.perf_counter() - started
+
+    def close(self):
+        started = time.perf_counter()
+        self._writer.release()
+
+        # Re-encode to H.264 for broad browser compatibility.
+        ffmpeg_cmd = ["ffmpeg", "-y", "-i", self.temp_output_path, *self._output_args, self.output_path]
+        result = subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.encode_seconds += time.perf_counter() - started
+
+        if os.path.exists(self.temp_output_path):
+            os.remove(self.temp_output_path)
+        if result.returncode != 0:
+            raise ValueError("Failed to encode output video for browser playback.")
+
+    def abort(self):
+        self._writer.release()
+        if os.path.exists(self.temp_output_path):
+            os.remove(self.temp_output_path)
+
+
+def open_video_writer(
+    mode, output_path, fps, frame_size, preset="veryfast", crf=23, threads=0, hls_segment_seconds=4
+):
+    if mode == "hls":
+        return FfmpegHlsWriter(
+            output_path, fps, frame_size, preset=preset, crf=crf, threads=threads, segment_seconds=hls_segment_seconds
+        )
+    if mode == "pipe":
+        return FfmpegPipeWriter(output_path, fps, frame_size, preset=preset, crf=crf, threads=threads)
+    if mode == "reencode":
+        return Mp4vReencodeWriter(output_path, fps, frame_size, preset=preset, crf=crf, threads=threads)
+    raise ValueError(f"Unsupported encoder mode: {mode}")
+
+
+def concat_videos(segment_paths, output_path):
+    # Joins H.264 segments encoded with identical settings using the concat
+    # demuxer; streams are copied, not re-encoded.
+    list_path = f"{output_path}.concat.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-loglevel",
+        "error",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        list_path,
+        "-c",
+        "copy",
+        "-movflags",
+        "+faststart",
+        output_path,
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise ValueError("Failed to join the encoded video segments.") from exc
+    finally:
+        os.remove(list_path)
+    return output_path
@@ -0,0 +1,255 @@
+import os
+import time
+from collections import deque
+from threading import Condition, Event, Lock, Thread
+
+import cv2
+import numpy as np
+
+from src.person_count.counting import PERSON_CLASS
+from src.person_count.regions import InferenceRegion
+
+
+def is_file_source(source):
+    return "://" not in source
+
+
+class LatestFrameReader:
+    # Reads a capture on its own thread and keeps only the newest frame. A
+    # consumer slower than the source gets the latest frame each time and
+    # the ones it missed are counted as dropped, so memory stays at one frame
+    # however far behind inference falls. File sources are paced to their
+    # frame rate so they behave like a live camera; when a file stops
+    # growing the reader waits and resumes from the last frame read.
+    def __init__(self, source, reconnect_seconds=5.0, pace_files=True):
+        self.source = source
+        self.reconnect_seconds = reconnect_seconds
+        self.pace = pace_files and is_file_source(source)
+        self.state = "connecting"
+        self.error = None
+        self.fps = 0.0
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self._frame = None
+        self._frame_number = 0
+        self._taken_number = 0
+        self._condition = Condition()
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name=f"stream-reader-{os.path.basename(source)[:20]}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        self._thread.join(timeout=5)
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        if self.pace and self.frames_read:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.frames_read)
+        source_fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+        self.fps = source_fps if source_fps > 0 else 25.0
+        return cap
+
+    def _run(self):
+        while not self._stop.is_set():
+            cap = self._open()
+            if cap is None:
+                self.state = "reconnecting"
+                self.error = f"Could not open stream source: {self.source}"
+                self._stop.wait(self.reconnect_seconds)
+                continue
+
+            self.state = "running"
+            self.error = None
+            next_frame_at = time.monotonic()
+            try:
+                while not self._stop.is_set():
+                    ok, frame = cap.read()
+                    if not ok:
+                        break
+                    self.frames_read += 1
+                    with self._condition:
+                        self._frame = frame
+                        self._frame_number += 1
+                        self._condition.notify_all()
+                    if self.pace:
+                        next_frame_at += 1.0 / self.fps
+                        delay = next_frame_at - time.monotonic()
+                        if delay > 0:
+                            self._stop.wait(delay)
+                        else:
+                            next_frame_at = time.monotonic()
+            finally:
+                cap.release()
+
+            if not self._stop.is_set():
+                self.state = "reconnecting"
+                self._stop.wait(self.reconnect_seconds)
+        self.state = "stopped"
+
+    def latest(self, timeout=1.0):
+        # Returns (frame_number, frame) newer than the last one taken, or None.
+        with self._condition:
+            if self._frame_number == self._taken_number:
+                self._condition.wait(timeout)
+            if self._frame_number == self._taken_number:
+                return None
+            self.frames_dropped += self._frame_number - self._taken_number - 1
+            self._taken_number = self._frame_number
+            return self._frame_number, self._frame
+
+
+class SlidingWindowCounts:
+    # Per-second average counts for the last window_seconds, in a deque of
+    # one bucket per second, so memory is bounded by the window length.
+    def __init__(self, window_seconds=300):
+        self.window_seconds = max(1, int(window_seconds))
+        self._buckets = deque()
+        self._lock = Lock()
+
+    def add(self, timestamp, person_count):
+        second = int(timestamp)
+        with self._lock:
+            if self._buckets and self._buckets[-1][0] == second:
+                self._buckets[-1][1] += person_count
+                self._buckets[-1][2] += 1
+                self._buckets[-1][3] = max(self._buckets[-1][3], person_count)
+            else:
+                self._buckets.append([second, person_count, 1, person_count])
+            self._expire(second)
+
+    def _expire(self, now_second):
+        while self._buckets and self._buckets[0][0] <= now_second - self.window_seconds:
+            self._buckets.popleft()
+
+    def snapshot(self, now=None):
+        with self._lock:
+            self._expire(int(now if now is not None else time.time()))
+            counts = [
+                {"second": second, "count": round(total / frames), "peak": peak}
+                for second, total, frames, peak in self._buckets
+            ]
+        return {
+            "window_seconds": self.window_seconds,
+            "counts_per_second": counts,
+            "peak_count": max((item["peak"] for item in counts), default=0),
+            "average_count": round(sum(item["count"] for item in counts) / len(counts), 2) if counts else 0,
+        }
+
+
+class StreamWorker:
+    # Continuous person counting for one stream source. Only the newest frame
+    # is ever inferred (at most max_infer_fps per second); nothing is drawn
+    # or written, and the only state kept is the sliding window.
+    def __init__(
+        self,
+        stream_id,
+        source,
+        detector_factory,
+        confidence=0.25,
+        roi=None,
+        detect_max_side=0,
+        window_seconds=300,
+        max_infer_fps=5.0,
+        reconnect_seconds=5.0,
+    ):
+        self.stream_id = stream_id
+        self.source = source
+        self.confidence = confidence
+        self.roi = roi
+        self.detect_max_side = detect_max_side
+        self.max_infer_fps = max_infer_fps
+        self.window = SlidingWindowCounts(window_seconds)
+        self.reader = LatestFrameReader(source, reconnect_seconds=reconnect_seconds)
+        self.frames_inferred = 0
+        self.current_count = 0
+        self.last_inference_at = None
+        self.inference_seconds = 0.0
+        self.error = None
+        self._detector_factory = detector_factory
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name=f"stream-{stream_id[:8]}", daemon=True)
+
+    def start(self):
+        self.reader.start()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.reader.stop()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        try:
+            detector = self._detector_factory()
+        except Exception as exc:
+            self.error = str(exc) if isinstance(exc, ValueError) else "Could not load the detection model."
+            self.reader.stop()
+            return
+
+        min_interval = 1.0 / self.max_infer_fps if self.max_infer_fps > 0 else 0.0
+        region, region_size = None, None
+        while not self._stop.is_set():
+            loop_started = time.monotonic()
+            latest = self.reader.latest(timeout=1.0)
+            if latest is None:
+                continue
+            _, frame = latest
+            height, width = frame.shape[:2]
+            if region_size != (width, height):
+                region = InferenceRegion(width, height, self.roi, self.detect_max_side)
+                region_size = (width, height)
+
+            # Time inference only, not the wait for a frame.
+            started = time.monotonic()
+            try:
+                detections, = detector([region.prepare(frame)], self.confidence)
+                _, conf, cls = region.to_source(detections)
+            except Exception:
+                self.error = "Inference failed on a stream frame."
+                self._stop.wait(1.0)
+                continue
+            self.error = None
+            elapsed = time.monotonic() - started
+            self.inference_seconds += elapsed
+
+            person_count = int(np.count_nonzero((cls == PERSON_CLASS) & (conf >= self.confidence)))
+            now = time.time()
+            self.current_count = person_count
+            self.frames_inferred += 1
+            self.last_inference_at = now
+            self.window.add(now, person_count)
+
+            remaining = min_interval - (time.monotonic() - loop_started)
+            if remaining > 0:
+                self._stop.wait(remaining)
+
+    @property
+    def state(self):
+        if self._stop.is_set():
+            return "stopped"
+        if self.error and not self._thread.is_alive():
+            return "failed"
+        return self.reader.state
+
+    def status(self):
+        return {
+            "state": self.state,
+            "error": self.error or self.reader.error,
+            "current_count": self.current_count,
+            "source_fps": round(self.reader.fps, 2),
+            "frames_read": self.reader.frames_read,
+            "frames_inferred": self.frames_inferred,
+            "frames_dropped": self.reader.frames_dropped,
+            "inference_fps": round(self.frames_inferred / self.inference_seconds, 2) if self.inference_seconds > 0 else 0,
+            "last_inference_at": self.last_inference_at,
+        }
@@ -0,0 +1,76 @@
+import cv2
+
+
+class MotionGate:
+    # Decides per sampled frame whether the detector needs to run. Each frame
+    # is shrunk to a small grayscale thumbnail and compared with the thumbnail
+    # of the last frame that was actually inferred; below the threshold the
+    # previous detections are reused. Comparing against the last inferred
+    # frame (not the previous frame) means slow drift still adds up and
+    # eventually triggers a fresh inference.
+    def __init__(self, threshold=0.01, max_skip=10, downscale_width=160, pixel_delta=25):
+        if threshold < 0:
+            raise ValueError("motion threshold must be >= 0.")
+        if max_skip < 0:
+            raise ValueError("motion max_skip must be >= 0.")
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.downscale_width = max(16, int(downscale_width))
+        self.pixel_delta = pixel_delta
+        self.inferences = 0
+        self.skipped = 0
+        self.stride_histogram = {}
+        self._reference = None
+        self._reference_index = None
+        self._skipped_in_row = 0
+
+    def _thumbnail(self, frame):
+        height, width = frame.shape[:2]
+        scale = self.downscale_width / float(width)
+        small = cv2.resize(
+            frame,
+            (self.downscale_width, max(1, int(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def motion_score(self, thumbnail):
+        # Fraction of thumbnail pixels that changed noticeably.
+        if self._reference is None or self._reference.shape != thumbnail.shape:
+            return 1.0
+        diff = cv2.absdiff(thumbnail, self._reference)
+        _, changed = cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(changed) / float(changed.size)
+
+    def should_infer(self, frame_index, frame):
+        thumbnail = self._thumbnail(frame)
+        infer = (
+            self._reference is None
+            or self._skipped_in_row >= self.max_skip
+            or self.motion_score(thumbnail) >= self.threshold
+        )
+        if not infer:
+            self.skipped += 1
+            self._skipped_in_row += 1
+            return False
+
+        if self._reference_index is not None:
+            stride = frame_index - self._reference_index
+            self.stride_histogram[stride] = self.stride_histogram.get(stride, 0) + 1
+        self.inferences += 1
+        self._reference = thumbnail
+        self._reference_index = frame_index
+        self._skipped_in_row = 0
+        return True
+
+    def stats(self):
+        return {
+            "threshold": self.threshold,
+            "max_skip": self.max_skip,
+            "inferences": self.inferences,
+            "skipped_inferences": self.skipped,
+            "effective_stride_histogram": {
+                str(stride): count for stride, count in sorted(self.stride_histogram.items())
+            },
+        }
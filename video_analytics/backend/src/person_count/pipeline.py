@@ -0,0 +1,97 @@
+import queue
+import threading
+import time
+
+
+END_OF_STREAM = object()
+_POLL_SECONDS = 0.1
+
+
+class PipelineAborted(Exception):
+    pass
+
+
+# Runs each stage on its own thread, connected by bounded queues. Stages record
+# time blocked on input (starved) and on output (backpressured) so the
+# bottleneck stage shows up as the one its neighbours are waiting on.
+class StagePipeline:
+    def __init__(self):
+        self._stop = threading.Event()
+        self._errors = []
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def make_queue(self, maxsize):
+        return queue.Queue(maxsize=max(1, int(maxsize)))
+
+    def _add_stall(self, stage, key, seconds):
+        with self._stats_lock:
+            stats = self._stats.setdefault(stage, {"input_stall_seconds": 0.0, "output_stall_seconds": 0.0})
+            stats[key] += seconds
+
+    def get(self, stage, source):
+        started = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise PipelineAborted()
+                try:
+                    return source.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+        finally:
+            self._add_stall(stage, "input_stall_seconds", time.perf_counter() - started)
+
+    def get_nowait(self, source):
+        try:
+            return source.get_nowait()
+        except queue.Empty:
+            return None
+
+    def put(self, stage, target, item):
+        started = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise PipelineAborted()
+                try:
+                    target.put(item, timeout=_POLL_SECONDS)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            self._add_stall(stage, "output_stall_seconds", time.perf_counter() - started)
+
+    def _run_stage(self, name, fn):
+        started = time.perf_counter()
+        try:
+            fn()
+        except PipelineAborted:
+            pass
+        except BaseException as exc:
+            self._errors.append(exc)
+            self._stop.set()
+        finally:
+            with self._stats_lock:
+                stats = self._stats.setdefault(name, {"input_stall_seconds": 0.0, "output_stall_seconds": 0.0})
+                stats["wall_seconds"] = time.perf_counter() - started
+
+    def run(self, stages):
+        threads = [
+            threading.Thread(target=self._run_stage, args=(name, fn), name=f"pipeline-{name}", daemon=True)
+            for name, fn in stages
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+    def stage_stats(self):
+        with self._stats_lock:
+            return {
+                name: {key: round(value, 3) for key, value in stats.items()}
+                for name, stats in self._stats.items()
+            }
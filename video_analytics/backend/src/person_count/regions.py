@@ -0,0 +1,119 @@
+import json
+
+import cv2
+import numpy as np
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def parse_roi(value):
+    # A region of interest as JSON (or the decoded list): a rectangle
+    # [x1, y1, x2, y2] or a polygon [[x, y], ...], in fractions of the frame
+    # width and height so it holds for any resolution. Returns the polygon
+    # points, or None when no ROI is given.
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError as exc:
+            raise ValueError("roi must be a JSON rectangle [x1, y1, x2, y2] or polygon [[x, y], ...].") from exc
+
+    if isinstance(value, list) and len(value) == 4 and all(_is_number(v) for v in value):
+        x1, y1, x2, y2 = (float(v) for v in value)
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError("roi rectangle must have x2 > x1 and y2 > y1.")
+        points = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+    elif (
+        isinstance(value, list)
+        and len(value) >= 3
+        and all(isinstance(p, list) and len(p) == 2 and all(_is_number(v) for v in p) for p in value)
+    ):
+        points = [[float(x), float(y)] for x, y in value]
+    else:
+        raise ValueError("roi must be a JSON rectangle [x1, y1, x2, y2] or polygon [[x, y], ...].")
+
+    if any(not 0.0 <= v <= 1.0 for point in points for v in point):
+        raise ValueError("roi coordinates must be fractions of the frame between 0 and 1.")
+    return points
+
+
+def _is_axis_aligned_rect(points):
+    if len(points) != 4:
+        return False
+    xs = {x for x, _ in points}
+    ys = {y for _, y in points}
+    return len(xs) == 2 and len(ys) == 2
+
+
+class InferenceRegion:
+    # What the detector sees of each frame: the ROI's bounding box, with
+    # pixels outside a polygon ROI blacked out, downscaled so its longest side
+    # is at most max_side. Detections are mapped back to source coordinates
+    # and only those centred inside the ROI are kept, so drawing, counting and
+    # the sidecar all work in the original frame.
+    def __init__(self, width, height, roi=None, max_side=0):
+        self.roi = roi
+        corners = roi or [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]]
+        self.polygon = np.array([[x * width, y * height] for x, y in corners], dtype=np.float32)
+
+        x1 = int(np.clip(np.floor(self.polygon[:, 0].min()), 0, width - 1))
+        y1 = int(np.clip(np.floor(self.polygon[:, 1].min()), 0, height - 1))
+        x2 = int(np.clip(np.ceil(self.polygon[:, 0].max()), x1 + 1, width))
+        y2 = int(np.clip(np.ceil(self.polygon[:, 1].max()), y1 + 1, height))
+        self.crop = (x1, y1, x2, y2)
+
+        crop_width, crop_height = x2 - x1, y2 - y1
+        self.scale = min(1.0, max_side / max(crop_width, crop_height)) if max_side > 0 else 1.0
+        self.size = (max(1, round(crop_width * self.scale)), max(1, round(crop_height * self.scale)))
+        self.active = roi is not None or self.scale < 1.0
+
+        self._mask = None
+        if roi is not None and not _is_axis_aligned_rect(roi):
+            mask = np.zeros((crop_height, crop_width), dtype=np.uint8)
+            cv2.fillPoly(mask, [np.round(self.polygon - (x1, y1)).astype(np.int32)], 255)
+            if self.scale < 1.0:
+                mask = cv2.resize(mask, self.size, interpolation=cv2.INTER_NEAREST)
+            self._mask = mask
+
+    def crop_view(self, frame):
+        x1, y1, x2, y2 = self.crop
+        return frame[y1:y2, x1:x2]
+
+    def prepare(self, frame):
+        if not self.active:
+            return frame
+        view = self.crop_view(frame)
+        if self.scale < 1.0:
+            view = cv2.resize(view, self.size, interpolation=cv2.INTER_AREA)
+        else:
+            view = np.ascontiguousarray(view)
+        if self._mask is not None:
+            view = cv2.bitwise_and(view, view, mask=self._mask)
+        return view
+
+    def to_source(self, detections):
+        if not self.active:
+            return detections
+        xyxy, conf, cls = detections
+        x1, y1, _, _ = self.crop
+        xyxy = (xyxy / self.scale + np.array([x1, y1, x1, y1], dtype=np.float32)).astype(np.float32)
+        if self.roi is None or not len(xyxy):
+            return xyxy, conf, cls
+
+        centers = np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2, (xyxy[:, 1] + xyxy[:, 3]) / 2], axis=1)
+        keep = np.array(
+            [cv2.pointPolygonTest(self.polygon, (float(cx), float(cy)), False) >= 0 for cx, cy in centers],
+            dtype=bool,
+        )
+        return xyxy[keep], conf[keep], cls[keep]
+
+    def describe(self):
+        return {
+            "scale": round(self.scale, 4),
+            "detect_size": list(self.size),
+            "roi": self.roi,
+            "roi_box": list(self.crop) if self.roi is not None else None,
+        }
@@ -0,0 +1,105 @@
+import time
+from threading import Lock, Thread
+
+import numpy as np
+
+from src.person_count.backends import Detector
+from src.person_count.batching import BatchingDetector
+
+
+MODEL_STATES = ("not_loaded", "loading", "ready", "failed")
+
+
+class _Entry:
+    def __init__(self):
+        self.lock = Lock()
+        self.detector = None
+        self.state = "not_loaded"
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.server = None
+
+
+class ModelRegistry:
+    # Detectors are loaded on first use (or by warm_up), once per
+    # (backend, imgsz) per process. Nothing heavy happens at import time, so
+    # processes that never run inference never pay for torch/ultralytics.
+    def __init__(self, weights_path):
+        self.weights_path = weights_path
+        self._entries = {}
+        self._lock = Lock()
+
+    def _entry(self, backend, imgsz):
+        with self._lock:
+            return self._entries.setdefault((backend, imgsz), _Entry())
+
+    def get(self, backend="pytorch", imgsz=640):
+        entry = self._entry(backend, imgsz)
+        with entry.lock:
+            if entry.detector is None:
+                entry.state = "loading"
+                start = time.perf_counter()
+                try:
+                    entry.detector = Detector(self.weights_path, backend=backend, imgsz=imgsz)
+                except Exception as exc:
+                    entry.state = "failed"
+                    entry.error = str(exc)
+                    raise
+                entry.load_seconds = round(time.perf_counter() - start, 3)
+                entry.state = "ready"
+                entry.error = None
+            return entry.detector
+
+    def use(self, detector, backend="pytorch", imgsz=640):
+        # Installs an already-built detector (e.g. a benchmark stub) for this key.
+        entry = self._entry(backend, imgsz)
+        with entry.lock:
+            entry.detector = detector
+            entry.server = None
+            entry.state = "ready"
+            entry.error = None
+
+    def server(self, backend="pytorch", imgsz=640, max_batch_size=16, max_wait_seconds=0.005):
+        # The process-wide batching server for this detector; the first
+        # caller's batch settings apply.
+        detector = self.get(backend, imgsz)
+        entry = self._entry(backend, imgsz)
+        with entry.lock:
+            if entry.server is None:
+                entry.server = BatchingDetector(detector, max_batch_size, max_wait_seconds)
+            return entry.server
+
+    def warm_up(self, backend="pytorch", imgsz=640):
+        # Loads the detector and runs one blank frame through it, so the
+        # first real job does not pay for lazy runtime initialisation.
+        detector = self.get(backend, imgsz)
+        entry = self._entry(backend, imgsz)
+        start = time.perf_counter()
+        detector([np.zeros((imgsz, imgsz, 3), dtype=np.uint8)], 0.5)
+        entry.warmup_seconds = round(time.perf_counter() - start, 3)
+        return detector
+
+    def warm_up_in_background(self, backend="pytorch", imgsz=640):
+        def run():
+            try:
+                self.warm_up(backend, imgsz)
+            except Exception:
+                # The failure is kept in status(); jobs will retry the load.
+                pass
+
+        thread = Thread(target=run, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self, backend="pytorch", imgsz=640):
+        entry = self._entry(backend, imgsz)
+        return {
+            "backend": backend,
+            "imgsz": imgsz,
+            "state": entry.state,
+            "error": entry.error,
+            "load_seconds": entry.load_seconds,
+            "warmup_seconds": entry.warmup_seconds,
+            "inference_server": entry.server.stats() if entry.server is not None else None,
+        }
@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import time
+
+import cv2
+
+from src.person_count.annotate import draw_count, draw_person_boxes, draw_region
+from src.person_count.counting import CountAccumulator, PersonBoxes
+from src.person_count.detections import DetectionSidecar
+from src.person_count.encoders import open_video_writer
+from src.person_count.regions import InferenceRegion
+from src.person_count.sampling import FrameSampler
+from src.person_count.series import series_path_for, write_series
+
+
+# Recount and re-render from a detection sidecar written by process_video.
+# Nothing here loads the model.
+#
+#   python -m src.person_count.replay recount outputs/processed_x.detections.npz --confidence 0.4
+#   python -m src.person_count.replay rerender outputs/processed_x.detections.npz uploads/x.mp4 outputs/
+
+
+def _resolve_confidence(sidecar, confidence):
+    if confidence is None:
+        return float(sidecar.meta["confidence"])
+    floor = float(sidecar.meta.get("detection_floor", sidecar.meta["confidence"]))
+    if confidence < floor:
+        raise ValueError(f"The detection sidecar only holds detections with confidence >= {floor}.")
+    return float(confidence)
+
+
+def _segment_restarts(meta):
+    # True for the first sampled frame at or after each segment start. Older
+    # sidecars recorded the (keyframe) range starts, which with frame_stride
+    # > 1 are often not sampled frames at all.
+    pending = sorted(meta.get("segment_starts") or [], reverse=True)
+
+    def due(frame_index):
+        restart = False
+        while pending and frame_index >= pending[-1]:
+            pending.pop()
+            restart = True
+        return restart
+
+    return due
+
+
+def recount(sidecar_path, confidence=None, bucket_seconds=1, series_path=None):
+    # With series_path the recounted series is also written there.
+    sidecar = DetectionSidecar(sidecar_path)
+    confidence = _resolve_confidence(sidecar, confidence)
+    person_boxes = PersonBoxes(confidence)
+    counts = CountAccumulator(sidecar.meta["fps"])
+    segment_restart = _segment_restarts(sidecar.meta)
+
+    for frame_index, action, detections in sidecar.frames():
+        if segment_restart(frame_index):
+            person_boxes.restart()
+        boxes, _, _ = person_boxes.boxes_for(frame_index, action, detections)
+        counts.add(frame_index, len(boxes))
+
+    if series_path:
+        write_series(series_path, counts)
+    return {
+        "person_count": counts.peak_count,
+        "peak_count": counts.peak_count,
+        "sampled_frames": counts.sampled_frames,
+        "unique_persons": person_boxes.unique_persons,
+        "confidence": confidence,
+        "bucket_seconds": max(1, int(bucket_seconds)),
+        "counts_per_second": counts.counts_per_second(bucket_seconds),
+    }
+
+
+def rerender(
+    sidecar_path,
+    input_path,
+    output_dir,
+    confidence=None,
+    progress_callback=None,
+    encoder_mode="pipe",
+    ffmpeg_preset="veryfast",
+    ffmpeg_crf=23,
+    ffmpeg_threads=0,
+):
+    sidecar = DetectionSidecar(sidecar_path)
+    confidence = _resolve_confidence(sidecar, confidence)
+    meta = sidecar.meta
+
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open input video: {input_path}")
+
+    stem, _ = os.path.splitext(os.path.basename(input_path))
+    ts = int(time.time())
+    output_path = os.path.join(output_dir, f"processed_{stem}_{ts}.mp4")
+    while os.path.exists(output_path):
+        # Never overwrite the render this one replaces.
+        ts += 1
+        output_path = os.path.join(output_dir, f"processed_{stem}_{ts}.mp4")
+    fps = float(meta["fps"])
+    frame_stride = int(meta["frame_stride"])
+    total_frames = int(meta.get("total_frames") or 0)
+
+    try:
+        out = open_video_writer(
+            encoder_mode,
+            output_path,
+            max(fps / frame_stride, 1.0),
+            (int(meta["width"]), int(meta["height"])),
+            preset=ffmpeg_preset,
+            crf=ffmpeg_crf,
+            threads=ffmpeg_threads,
+        )
+    except ValueError:
+        cap.release()
+        raise
+
+    # Only the ROI outline is needed here; the sidecar boxes are already in
+    # source coordinates.
+    region = InferenceRegion(int(meta["width"]), int(meta["height"]), roi=meta.get("roi"))
+    person_boxes = PersonBoxes(confidence)
+    counts = CountAccumulator(fps)
+    segment_restart = _segment_restarts(meta)
+    last_reported_progress = -1
+    try:
+        sampled = FrameSampler(cap, frame_stride=frame_stride, mode="grab").frames()
+        for frame_index, action, detections in sidecar.frames():
+            decoded = next(sampled, None)
+            if decoded is None or decoded[0] != frame_index:
+                raise ValueError("The source video does not match its detection sidecar.")
+            frame = decoded[1]
+            if segment_restart(frame_index):
+                person_boxes.restart()
+
+            boxes, confs, labels = person_boxes.boxes_for(frame_index, action, detections)
+            if region.roi is not None:
+                draw_region(frame, region.polygon)
+            person_count = draw_person_boxes(frame, boxes, confs, labels)
+            counts.add(frame_index, person_count)
+            draw_count(frame, person_count)
+            out.write(frame)
+
+            if progress_callback and total_frames > 0:
+                progress = min(100, max(0, int(((frame_index + 1) / total_frames) * 100)))
+                if progress != last_reported_progress:
+                    progress_callback(progress, frame_index + 1, total_frames)
+                    last_reported_progress = progress
+    except BaseException:
+        out.abort()
+        raise
+    finally:
+        cap.release()
+
+    out.close()
+    series_path = write_series(series_path_for(output_path), counts)
+
+    details = {
+        "confidence": confidence,
+        "sampled_frames": counts.sampled_frames,
+        "peak_count": counts.peak_count,
+        "unique_persons": person_boxes.unique_persons,
+        "series_file": os.path.basename(series_path),
+        "encoder": encoder_mode,
+        "encode_seconds": round(out.encode_seconds, 3),
+    }
+    return output_path, counts.peak_count, details
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recount or re-render a video from its detection sidecar.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    recount_parser = commands.add_parser("recount")
+    recount_parser.add_argument("sidecar_path")
+    recount_parser.add_argument("--confidence", type=float)
+    recount_parser.add_argument("--bucket-seconds", type=int, default=1)
+
+    rerender_parser = commands.add_parser("rerender")
+    rerender_parser.add_argument("sidecar_path")
+    rerender_parser.add_argument("input_path")
+    rerender_parser.add_argument("output_dir")
+    rerender_parser.add_argument("--confidence", type=float)
+    rerender_parser.add_argument("--encoder", default="pipe")
+
+    args = parser.parse_args(argv)
+    if args.command == "recount":
+        result = recount(args.sidecar_path, args.confidence, args.bucket_seconds)
+    else:
+        output_path, person_count, details = rerender(
+            args.sidecar_path,
+            args.input_path,
+            args.output_dir,
+            confidence=args.confidence,
+            encoder_mode=args.encoder,
+        )
+        result = {"output_path": output_path, "person_count": person_count, "details": details}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
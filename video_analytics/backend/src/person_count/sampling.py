@@ -0,0 +1,51 @@
+import cv2
+
+
+SAMPLING_MODES = ("grab", "read")
+
+
+class FrameSampler:
+    # Yields (source_frame_index, frame) for every frame_stride-th frame.
+    # In "grab" mode skipped frames are only demuxed/decoded by cap.grab() and
+    # never converted to BGR, which is where most of the per-frame cost goes.
+    # Frame indices keep counting skipped frames so timestamps stay correct.
+    # With start_frame/end_frame only that range is read; indices (and which
+    # frames are sampled) stay those of the whole video.
+    def __init__(self, cap, frame_stride=1, mode="grab", start_frame=0, end_frame=None):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unsupported sampling mode: {mode}")
+        self.cap = cap
+        self.frame_stride = frame_stride
+        self.mode = mode
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.frames_seen = start_frame
+        self.frames_skipped = 0
+        if start_frame > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    def _is_sampled(self, frame_index):
+        return self.frame_stride <= 1 or frame_index % self.frame_stride == 0
+
+    def frames(self):
+        while True:
+            if self.end_frame is not None and self.frames_seen >= self.end_frame:
+                return
+            if not self._is_sampled(self.frames_seen):
+                if self.mode == "grab":
+                    ok = self.cap.grab()
+                else:
+                    ok, _ = self.cap.read()
+                if not ok:
+                    return
+                self.frames_seen += 1
+                self.frames_skipped += 1
+                continue
+
+            ret, frame = self.cap.read()
+            if not ret:
+                return
+
+            frame_index = self.frames_seen
+            self.frames_seen += 1
+            yield frame_index, frame
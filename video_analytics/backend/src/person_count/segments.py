@@ -0,0 +1,263 @@
+import multiprocessing
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from queue import Empty
+from uuid import uuid4
+
+import cv2
+
+from src.person_count.count import process_video
+from src.person_count.counting import CountAccumulator
+from src.person_count.detections import merge_sidecars, sidecar_path_for
+from src.person_count.encoders import concat_videos
+from src.person_count.series import series_path_for, write_series
+
+
+# Long videos are split into frame ranges that start at keyframes, and each
+# range is processed by process_video in its own worker process (with its
+# own model). Counts are merged exactly and the encoded segments are joined
+# without re-encoding. Tracking restarts at every segment, so people visible
+# across a segment boundary are counted once per segment in unique_persons.
+# Segmented runs encode each part straight to MP4, so there is no HLS
+# playlist to watch while they run.
+
+
+def probe_keyframes(input_path, fps):
+    # Source frame indices of the video's keyframes, from packet flags, so
+    # nothing is decoded.
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time,flags",
+        "-of",
+        "csv=p=0",
+        input_path,
+    ]
+    try:
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        raise ValueError("Could not read the video keyframes with ffprobe.") from exc
+
+    times = []
+    keyframe_times = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        try:
+            pts_time = float(pts_time)
+        except ValueError:
+            continue
+        times.append(pts_time)
+        if "K" in flags:
+            keyframe_times.append(pts_time)
+    if not times:
+        return []
+
+    origin = min(times)
+    return sorted({int(round((pts_time - origin) * fps)) for pts_time in keyframe_times})
+
+
+def plan_segments(total_frames, keyframes, segment_count):
+    # Up to segment_count (start, end) ranges covering [0, total_frames),
+    # each starting at the keyframe nearest an even split point.
+    starts = [0]
+    for index in range(1, segment_count):
+        target = total_frames * index // segment_count
+        candidates = [frame for frame in keyframes if starts[-1] < frame < total_frames]
+        if not candidates:
+            break
+        start = min(candidates, key=lambda frame: abs(frame - target))
+        if start not in starts:
+            starts.append(start)
+    starts.sort()
+    return list(zip(starts, starts[1:] + [total_frames]))
+
+
+_progress_queue = None
+
+
+def _init_segment_worker(progress_queue, torch_threads):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+    try:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+
+def _run_segment(index, input_path, output_dir, frame_range, options):
+    def on_progress(progress, processed_frames, total_frames):
+        _progress_queue.put((index, processed_frames))
+
+    return process_video(
+        input_path,
+        output_dir,
+        progress_callback=on_progress,
+        frame_range=frame_range,
+        output_name=f"part{index:04d}.mp4",
+        save_detections=True,
+        **options,
+    )
+
+
+def _merge_latency(segment_details):
+    # Percentiles cannot be merged exactly; the slowest segment's are reported.
+    inferred = sum(details["inferred_frames"] for details in segment_details)
+    if not inferred:
+        return {"mean_ms": 0, "p50_ms": 0, "p95_ms": 0}
+    return {
+        "mean_ms": round(
+            sum(details["inference_latency"]["mean_ms"] * details["inferred_frames"] for details in segment_details)
+            / inferred,
+            2,
+        ),
+        "p50_ms": max(details["inference_latency"]["p50_ms"] for details in segment_details),
+        "p95_ms": max(details["inference_latency"]["p95_ms"] for details in segment_details),
+    }
+
+
+def _merge_details(segment_details, counts, total_frames, fps, wall_seconds):
+    inferred_frames = sum(details["inferred_frames"] for details in segment_details)
+    inference_seconds = sum(details["inference_seconds"] for details in segment_details)
+
+    details = dict(segment_details[0])
+    for key in ("frame_range", "count_state", "pipeline_stages", "motion_gate", "detections_file"):
+        details.pop(key, None)
+    timings = {}
+    for segment in segment_details:
+        for stage, seconds in segment["timings"].items():
+            timings[stage] = round(timings.get(stage, 0.0) + seconds, 3)
+
+    details.update(
+        timings=timings,
+        total_frames=total_frames,
+        sampled_frames=counts.sampled_frames,
+        inference_latency=_merge_latency(segment_details),
+        inferred_frames=inferred_frames,
+        inference_seconds=round(inference_seconds, 3),
+        inference_fps=round(inferred_frames / inference_seconds, 2) if inference_seconds > 0 else 0,
+        encode_seconds=round(sum(details["encode_seconds"] for details in segment_details), 3),
+        duration_seconds=round(total_frames / fps, 2) if fps else 0,
+        peak_count=counts.peak_count,
+        tracked_frames=sum(details["tracked_frames"] for details in segment_details),
+        unique_persons=sum(details["unique_persons"] for details in segment_details),
+        wall_seconds=round(wall_seconds, 3),
+        segments=[
+            {
+                "frame_range": details["frame_range"],
+                "sampled_frames": details["sampled_frames"],
+                "inferred_frames": details["inferred_frames"],
+                "inference_seconds": details["inference_seconds"],
+                "pipeline_stages": details["pipeline_stages"],
+                **({"motion_gate": details["motion_gate"]} if "motion_gate" in details else {}),
+            }
+            for details in segment_details
+        ],
+    )
+    return details
+
+
+def process_video_segmented(
+    input_path,
+    output_dir,
+    workers=2,
+    min_segment_seconds=60,
+    progress_callback=None,
+    save_detections=True,
+    **options,
+):
+    # Same contract as process_video. Videos too short for more than one
+    # segment of min_segment_seconds, or whose keyframes cannot be probed,
+    # are processed sequentially.
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open input video: {input_path}")
+    source_fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    cap.release()
+    fps = source_fps if source_fps > 0 else 25.0
+
+    segment_count = min(workers, int(total_frames / fps // max(min_segment_seconds, 1)))
+    ranges = []
+    if segment_count > 1:
+        try:
+            ranges = plan_segments(total_frames, probe_keyframes(input_path, fps), segment_count)
+        except ValueError:
+            ranges = []
+    if len(ranges) < 2:
+        return process_video(
+            input_path, output_dir, progress_callback=progress_callback, save_detections=save_detections, **options
+        )
+
+    render = options.get("render", True)
+    options.pop("playlist_callback", None)
+    if options.get("encoder_mode") == "hls":
+        options["encoder_mode"] = "pipe"
+    stem, _ = os.path.splitext(os.path.basename(input_path))
+    output_path = os.path.join(output_dir, f"processed_{stem}_{int(time.time())}.mp4")
+    work_dir = os.path.join(output_dir, f".segments-{uuid4().hex}")
+    os.makedirs(work_dir)
+
+    context = multiprocessing.get_context("spawn")
+    progress_queue = context.Queue()
+    processed = [0] * len(ranges)
+    last_reported_progress = -1
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=len(ranges),
+            mp_context=context,
+            initializer=_init_segment_worker,
+            initargs=(progress_queue, max(1, (os.cpu_count() or 1) // len(ranges))),
+        ) as pool:
+            futures = [
+                pool.submit(_run_segment, index, input_path, work_dir, frame_range, options)
+                for index, frame_range in enumerate(ranges)
+            ]
+            while not all(future.done() for future in futures):
+                try:
+                    index, processed_frames = progress_queue.get(timeout=0.2)
+                except Empty:
+                    continue
+                processed[index] = processed_frames
+                if progress_callback:
+                    progress = min(99, int(sum(processed) * 100 / total_frames))
+                    if progress != last_reported_progress:
+                        progress_callback(progress, sum(processed), total_frames)
+                        last_reported_progress = progress
+            results = [future.result() for future in futures]
+
+        segment_outputs = [os.path.join(work_dir, f"part{index:04d}.mp4") for index in range(len(ranges))]
+        segment_details = [details for _, _, details in results]
+        counts = CountAccumulator(fps)
+        for details in segment_details:
+            counts.merge(CountAccumulator.from_state(fps, details["count_state"]))
+
+        if render:
+            concat_videos(segment_outputs, output_path)
+        details = _merge_details(segment_details, counts, total_frames, fps, time.perf_counter() - started)
+        if save_detections:
+            detections_path = merge_sidecars(
+                [sidecar_path_for(path) for path in segment_outputs],
+                sidecar_path_for(output_path),
+                total_frames=total_frames,
+            )
+            details["detections_file"] = os.path.basename(detections_path)
+        details["series_file"] = os.path.basename(write_series(series_path_for(output_path), counts))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        progress_queue.close()
+
+    if progress_callback:
+        progress_callback(100, total_frames, total_frames)
+
+    return (output_path if render else None), counts.peak_count, details
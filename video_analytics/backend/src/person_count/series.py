@@ -0,0 +1,155 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+
+SERIES_VERSION = 1
+SERIES_SUFFIX = ".series.bin"
+SERIES_MAGIC = b"PCSERIES"
+# Bucket widths kept in every series file, finest first.
+SERIES_RESOLUTIONS = {"1s": 1, "10s": 10, "1m": 60, "10m": 600}
+BUCKET_DTYPE = np.dtype([("sum", "<u4"), ("frames", "<u4"), ("peak", "<u2")])
+_HEADER = struct.Struct("<8sII")
+_ALIGN = 16
+
+
+# Per-video person counts as a small binary file next to the output:
+#
+#   magic | version | header length | JSON header | padding | levels
+#
+# Each level is a dense array of BUCKET_DTYPE (summed counts, sampled frames
+# and peak count per bucket) indexed by bucket number, one level per entry in
+# SERIES_RESOLUTIONS. The header records each level's offset from the
+# (aligned) end of the header so a level can be memory-mapped on its own;
+# charts read the coarsest level that still has enough points instead of the
+# full per-second series.
+
+
+def _aligned(size):
+    return -(-size // _ALIGN) * _ALIGN
+
+
+def series_path_for(output_path):
+    stem, _ = os.path.splitext(output_path)
+    return f"{stem}{SERIES_SUFFIX}"
+
+
+def _rollup(base, bucket_seconds):
+    if not len(base):
+        return np.zeros(0, dtype=BUCKET_DTYPE)
+    padded_length = -(-len(base) // bucket_seconds) * bucket_seconds
+    # Trailing partial buckets are padded with empty seconds.
+    padded = np.zeros(padded_length, dtype=BUCKET_DTYPE)
+    padded[: len(base)] = base
+    level = np.zeros(padded_length // bucket_seconds, dtype=BUCKET_DTYPE)
+    level["sum"] = padded["sum"].reshape(-1, bucket_seconds).sum(axis=1)
+    level["frames"] = padded["frames"].reshape(-1, bucket_seconds).sum(axis=1)
+    level["peak"] = padded["peak"].reshape(-1, bucket_seconds).max(axis=1)
+    return level
+
+
+def _base_level(second_buckets):
+    # second_buckets as kept by CountAccumulator: {second: {"sum", "frames", "peak"}}.
+    length = max(second_buckets) + 1 if second_buckets else 0
+    base = np.zeros(length, dtype=BUCKET_DTYPE)
+    for second, bucket in second_buckets.items():
+        base[second] = (bucket["sum"], bucket["frames"], bucket.get("peak", 0))
+    return base
+
+
+def write_series(path, counts):
+    # counts is a CountAccumulator; returns path.
+    base = _base_level(counts.second_buckets)
+    levels = [(seconds, base if seconds == 1 else _rollup(base, seconds)) for seconds in SERIES_RESOLUTIONS.values()]
+
+    header = {"version": SERIES_VERSION, "fps": counts.fps, "peak_count": counts.peak_count, "levels": []}
+    offset = 0
+    for seconds, level in levels:
+        header["levels"].append({"seconds": seconds, "offset": offset, "length": len(level)})
+        offset += _aligned(level.nbytes)
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _aligned(_HEADER.size + len(header_bytes))
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(SERIES_MAGIC, SERIES_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for entry, (_, level) in zip(header["levels"], levels):
+            f.write(b"\0" * (data_start + entry["offset"] - f.tell()))
+            f.write(level.tobytes())
+    os.replace(temp_path, path)
+    return path
+
+
+class CountSeries:
+    # Read side of a series file. Levels are memory-mapped on first use, so
+    # reading one resolution touches only that part of the file.
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, header_length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != SERIES_MAGIC or version != SERIES_VERSION:
+                raise ValueError(f"Unsupported count series file: {os.path.basename(path)}")
+            self.header = json.loads(f.read(header_length))
+        self._data_start = _aligned(_HEADER.size + header_length)
+        self.peak_count = self.header["peak_count"]
+        self._levels = {}
+
+    @classmethod
+    def from_points(cls, points):
+        # Legacy records kept [{"second", "count"}, ...] inline; each point is
+        # treated as one sampled frame with that count.
+        series = cls.__new__(cls)
+        series.path = None
+        second_buckets = {
+            int(point["second"]): {"sum": int(point["count"]), "frames": 1, "peak": int(point["count"])}
+            for point in points
+        }
+        base = _base_level(second_buckets)
+        series._levels = {
+            seconds: base if seconds == 1 else _rollup(base, seconds) for seconds in SERIES_RESOLUTIONS.values()
+        }
+        series.header = {
+            "levels": [{"seconds": seconds, "length": len(level)} for seconds, level in series._levels.items()]
+        }
+        series.peak_count = int(base["peak"].max()) if len(base) else 0
+        return series
+
+    def level(self, bucket_seconds):
+        if bucket_seconds not in self._levels:
+            entry = next((entry for entry in self.header["levels"] if entry["seconds"] == bucket_seconds), None)
+            if entry is None:
+                raise ValueError(f"No {bucket_seconds}s level in this count series.")
+            if entry["length"] == 0:
+                self._levels[bucket_seconds] = np.zeros(0, dtype=BUCKET_DTYPE)
+            else:
+                self._levels[bucket_seconds] = np.memmap(
+                    self.path,
+                    dtype=BUCKET_DTYPE,
+                    mode="r",
+                    offset=self._data_start + entry["offset"],
+                    shape=(entry["length"],),
+                )
+        return self._levels[bucket_seconds]
+
+    def bucket_seconds_for(self, max_points):
+        # The finest level with at most max_points buckets, else the coarsest.
+        lengths = {entry["seconds"]: entry["length"] for entry in self.header["levels"]}
+        for seconds in sorted(lengths):
+            if lengths[seconds] <= max_points:
+                return seconds
+        return max(lengths)
+
+    def points(self, bucket_seconds):
+        # Average and peak count per bucket with at least one sampled frame,
+        # keyed by the bucket's first second.
+        level = self.level(bucket_seconds)
+        (indexes,) = np.nonzero(level["frames"])
+        sampled = level[indexes]
+        averages = np.round(sampled["sum"] / sampled["frames"], 2)
+        return [
+            {"second": int(index) * bucket_seconds, "count": float(average), "peak": int(peak)}
+            for index, average, peak in zip(indexes, averages, sampled["peak"])
+        ]
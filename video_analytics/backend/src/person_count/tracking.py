@@ -0,0 +1,108 @@
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0).astype(np.float32)
+
+
+class _Track:
+    __slots__ = ("track_id", "box", "velocity", "conf", "frame_index", "hits", "misses")
+
+    def __init__(self, track_id, box, conf, frame_index):
+        self.track_id = track_id
+        self.box = box
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.conf = conf
+        self.frame_index = frame_index
+        self.hits = 1
+        self.misses = 0
+
+    def predicted_box(self, frame_index):
+        return self.box + self.velocity * (frame_index - self.frame_index)
+
+
+class IouTracker:
+    # Greedy IoU association with a constant-velocity motion model. Detections
+    # only arrive on keyframes; in between, predict() moves each live track
+    # along its last observed velocity (per source frame), which is enough to
+    # keep boxes on people walking through a fixed CCTV view.
+    def __init__(self, iou_threshold=0.3, max_missed=2, min_hits=2, velocity_smoothing=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.min_hits = min_hits
+        self.velocity_smoothing = velocity_smoothing
+        self._tracks = []
+        self._next_id = 1
+        self._confirmed_ids = set()
+
+    def update(self, frame_index, boxes, confs):
+        # Returns the track id assigned to each detection, in input order.
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        confs = np.asarray(confs, dtype=np.float32).reshape(-1)
+        predicted = np.array(
+            [track.predicted_box(frame_index) for track in self._tracks], dtype=np.float32
+        ).reshape(-1, 4)
+        ious = iou_matrix(predicted, boxes)
+
+        track_for_detection = [None] * len(boxes)
+        matched_tracks = set()
+        if ious.size:
+            for flat_index in np.argsort(-ious, axis=None):
+                track_index, detection_index = np.unravel_index(flat_index, ious.shape)
+                if ious[track_index, detection_index] < self.iou_threshold:
+                    break
+                if track_index in matched_tracks or track_for_detection[detection_index] is not None:
+                    continue
+                matched_tracks.add(track_index)
+                track_for_detection[detection_index] = self._tracks[track_index]
+
+        for detection_index, track in enumerate(track_for_detection):
+            box = boxes[detection_index]
+            if track is None:
+                track = _Track(self._next_id, box, float(confs[detection_index]), frame_index)
+                self._next_id += 1
+                self._tracks.append(track)
+                track_for_detection[detection_index] = track
+            else:
+                elapsed = frame_index - track.frame_index
+                if elapsed > 0:
+                    observed = (box - track.box) / elapsed
+                    track.velocity = (
+                        self.velocity_smoothing * track.velocity
+                        + (1 - self.velocity_smoothing) * observed
+                    )
+                track.box = box
+                track.conf = float(confs[detection_index])
+                track.frame_index = frame_index
+                track.hits += 1
+                track.misses = 0
+            if track.hits >= self.min_hits:
+                self._confirmed_ids.add(track.track_id)
+
+        for track_index, track in enumerate(self._tracks):
+            if track_index not in matched_tracks and track not in track_for_detection:
+                track.misses += 1
+        self._tracks = [track for track in self._tracks if track.misses <= self.max_missed]
+
+        return [track.track_id for track in track_for_detection]
+
+    def predict(self, frame_index):
+        # Returns (track_ids, boxes, confs) for tracks seen on the last keyframe.
+        live = [track for track in self._tracks if track.misses == 0]
+        boxes = np.array([track.predicted_box(frame_index) for track in live], dtype=np.float32).reshape(-1, 4)
+        return [track.track_id for track in live], boxes, np.array([track.conf for track in live], dtype=np.float32)
+
+    @property
+    def unique_count(self):
+        return len(self._confirmed_ids)
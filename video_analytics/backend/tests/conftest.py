@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# The app reads its storage paths from the environment at import, so tests
+# point them at a scratch directory before anything from app is imported.
+_work_dir = tempfile.mkdtemp(prefix="video-analytics-tests-")
+os.environ.setdefault("VIDEO_OUTPUT_DIR", os.path.join(_work_dir, "outputs"))
+os.environ.setdefault("VIDEO_UPLOAD_DIR", os.path.join(_work_dir, "uploads"))
+os.environ.setdefault("VIDEO_MODEL_WARMUP", "false")
+os.environ.setdefault("VIDEO_METRICS_ENABLED", "false")
+
+from benchmarks.pipeline import StubDetector  # noqa: E402
+from benchmarks.synthetic import make_synthetic_video  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def synthetic_video(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("videos") / "walkers.mp4")
+    make_synthetic_video(path, width=320, height=180, seconds=6, fps=25, people=3)
+    return path
+
+
+@pytest.fixture
+def stub_detector():
+    # Registered under the default backend so process_video never loads a model.
+    from src.person_count.count import model_registry
+
+    detector = StubDetector(boxes=3)
+    model_registry.use(detector, "pytorch", 640)
+    return detector
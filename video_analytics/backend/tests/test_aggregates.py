@@ -0,0 +1,49 @@
+from app.services import store
+from app.services.aggregates import AnalyticsAggregates
+
+
+def _record(record_id, status, created_at):
+    return {
+        "id": record_id,
+        "video_name": f"{record_id}.mp4",
+        "created_at": created_at,
+        "person_count": 2,
+        "status": status,
+        "output_path": "",
+        "details": {"duration_seconds": 1.5, "counts_per_second": [1] * 1000},
+    }
+
+
+def test_recent_uploads_resolve_outputs_on_read_and_only_for_completed(monkeypatch):
+    listings = []
+
+    def list_processed_outputs():
+        listings.append(1)
+        return ["/outputs/processed_20240101_done.mp4", "/outputs/processed_20240101_queued.mp4"]
+
+    monkeypatch.setattr(store, "list_processed_outputs", list_processed_outputs)
+    aggregates = AnalyticsAggregates()
+    aggregates.rebuild([])
+
+    aggregates.record_inserted(_record("queued", "queued", "2024-01-01T10:00:00"))
+    done = _record("done", "processing", "2024-01-01T09:00:00")
+    aggregates.record_inserted(done)
+    aggregates.record_updated(done, dict(done, status="completed"))
+    assert listings == []
+
+    uploads = {item["id"]: item for item in aggregates.snapshot()["recent_uploads"]}
+    assert listings == [1]
+    assert uploads["done"]["processedVideo"] == "/outputs/processed_20240101_done.mp4"
+    assert uploads["queued"]["processedVideo"] == ""
+    assert uploads["done"]["processingTimeSeconds"] == 1.5
+
+
+def test_snapshot_skips_the_listing_when_no_record_needs_it(monkeypatch):
+    def list_processed_outputs():
+        raise AssertionError("outputs/ listed without a legacy record")
+
+    monkeypatch.setattr(store, "list_processed_outputs", list_processed_outputs)
+    aggregates = AnalyticsAggregates()
+    aggregates.rebuild([_record("failed", "failed", "2024-01-01T10:00:00")])
+
+    assert [item["processedVideo"] for item in aggregates.snapshot()["recent_uploads"]] == [""]
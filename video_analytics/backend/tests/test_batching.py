@@ -0,0 +1,72 @@
+import threading
+
+import numpy as np
+import pytest
+
+from benchmarks.pipeline import StubDetector
+from src.person_count.batching import BatchingDetector
+
+
+def _frames(count):
+    return [np.zeros((36, 64, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def test_concurrent_calls_are_batched_and_split_back():
+    server = BatchingDetector(StubDetector(boxes=2), max_batch_size=8, max_wait_seconds=0.05)
+    results = {}
+
+    def call(index):
+        results[index] = server(_frames(index + 1), 0.25)
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert {index: len(result) for index, result in results.items()} == {0: 1, 1: 2, 2: 3, 3: 4}
+    assert server.stats()["frames"] == 10
+    assert server.stats()["batches"] < 4
+
+
+def test_detector_errors_reach_the_caller_and_the_server_keeps_running():
+    calls = []
+
+    def detector(frames, conf):
+        calls.append(len(frames))
+        if len(calls) == 1:
+            raise ValueError("bad batch")
+        return StubDetector(boxes=1)(frames, conf)
+
+    server = BatchingDetector(detector, max_wait_seconds=0)
+
+    with pytest.raises(ValueError):
+        server(_frames(1), 0.25)
+    assert len(server(_frames(2), 0.25)) == 2
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_a_dead_server_fails_waiting_and_later_calls():
+    def detector(frames, conf):
+        raise KeyboardInterrupt
+
+    server = BatchingDetector(detector, max_wait_seconds=0)
+    errors = []
+
+    def call():
+        try:
+            server(_frames(1), 0.25)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    thread.join(timeout=5)
+
+    server._thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert not server._thread.is_alive()
+    assert len(errors) == 1
+    with pytest.raises(RuntimeError):
+        server(_frames(1), 0.25)
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from src.person_count.count import process_video
+from src.person_count.counting import CountAccumulator
+from src.person_count.detections import DetectionSidecar, merge_sidecars, sidecar_path_for
+from src.person_count.replay import recount
+
+# Keyframe-style range starts: 76 is not a multiple of the frame stride, so
+# the second segment's first sampled frame is 78.
+RANGES = [(0, 76), (76, 150)]
+
+
+def _run_segments(video, output_dir, ranges, **options):
+    # What process_video_segmented does, minus the worker processes (which
+    # would not see the stub detector): one process_video per range, then
+    # the counts and sidecars are merged.
+    details = []
+    for index, frame_range in enumerate(ranges):
+        _, _, part = process_video(
+            video, output_dir, render=False, frame_range=frame_range, output_name=f"part{index:04d}.mp4", **options
+        )
+        details.append(part)
+
+    counts = CountAccumulator(details[0]["fps"])
+    for part in details:
+        counts.merge(CountAccumulator.from_state(details[0]["fps"], part["count_state"]))
+    sidecar_path = merge_sidecars(
+        [sidecar_path_for(os.path.join(output_dir, f"part{index:04d}.mp4")) for index in range(len(ranges))],
+        os.path.join(output_dir, "merged.detections.npz"),
+        total_frames=ranges[-1][1],
+    )
+    return counts, details, sidecar_path
+
+
+@pytest.mark.parametrize("frame_stride,detect_interval", [(1, 1), (3, 1), (3, 4)])
+def test_recount_of_merged_sidecar_matches_segmented_run(
+    synthetic_video, stub_detector, tmp_path, frame_stride, detect_interval
+):
+    counts, details, sidecar_path = _run_segments(
+        synthetic_video, str(tmp_path), RANGES, frame_stride=frame_stride, detect_interval=detect_interval
+    )
+
+    result = recount(sidecar_path)
+
+    assert result["unique_persons"] == sum(part["unique_persons"] for part in details)
+    assert result["peak_count"] == counts.peak_count
+    assert result["sampled_frames"] == counts.sampled_frames
+    assert result["counts_per_second"] == counts.counts_per_second()
+
+
+def test_merged_sidecar_records_first_sampled_frame_of_each_segment(synthetic_video, stub_detector, tmp_path):
+    _, _, sidecar_path = _run_segments(synthetic_video, str(tmp_path), RANGES, frame_stride=3, detect_interval=4)
+
+    assert DetectionSidecar(sidecar_path).meta["segment_starts"] == [0, 78]
+
+
+def test_recount_restarts_after_unsampled_legacy_segment_starts(synthetic_video, stub_detector, tmp_path):
+    # Sidecars written before segment_starts held sampled frames recorded the
+    # keyframe starts themselves.
+    _, details, sidecar_path = _run_segments(synthetic_video, str(tmp_path), RANGES, frame_stride=3, detect_interval=4)
+    legacy_path = merge_sidecars(
+        [sidecar_path],
+        str(tmp_path / "legacy.detections.npz"),
+        segment_starts=[start for start, _ in RANGES],
+    )
+
+    assert recount(legacy_path)["unique_persons"] == sum(part["unique_persons"] for part in details)
+
+
+def test_count_accumulator_merge_matches_single_pass():
+    fps = 25.0
+    samples = [(frame_index, (frame_index * 7) % 5) for frame_index in range(0, 300, 3)]
+    single = CountAccumulator(fps)
+    for frame_index, person_count in samples:
+        single.add(frame_index, person_count)
+
+    merged = CountAccumulator(fps)
+    for part in (samples[:37], samples[37:61], samples[61:]):
+        segment = CountAccumulator(fps)
+        for frame_index, person_count in part:
+            segment.add(frame_index, person_count)
+        merged.merge(CountAccumulator.from_state(fps, segment.state()))
+
+    assert merged.state() == single.state()
+    assert merged.counts_per_second(10) == single.counts_per_second(10)
+
+
+def test_segmented_counts_match_a_single_pass(synthetic_video, stub_detector, tmp_path):
+    counts, _, _ = _run_segments(synthetic_video, str(tmp_path), RANGES, frame_stride=3)
+    _, peak_count, details = process_video(synthetic_video, str(tmp_path), frame_stride=3, render=False)
+
+    assert counts.peak_count == peak_count
+    assert counts.sampled_frames == details["sampled_frames"]
+    assert counts.counts_per_second() == recount(os.path.join(str(tmp_path), details["detections_file"]))[
+        "counts_per_second"
+    ]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from src.person_count.counting import CountAccumulator
+from src.person_count.series import SERIES_RESOLUTIONS, CountSeries, series_path_for, write_series
+
+
+def _accumulator(seconds=1300, fps=10.0):
+    counts = CountAccumulator(fps)
+    for frame_index in range(0, int(seconds * fps), 2):
+        second = int(frame_index / fps)
+        # Seconds 100-199 have no sampled frames at all.
+        if 100 <= second < 200:
+            continue
+        counts.add(frame_index, (frame_index // 7) % 9)
+    return counts
+
+
+def test_series_path_sits_next_to_the_output():
+    assert series_path_for("/outputs/processed_x_1.mp4") == "/outputs/processed_x_1.series.bin"
+
+
+def test_write_and_read_round_trip(tmp_path):
+    counts = _accumulator()
+    path = write_series(str(tmp_path / "video.series.bin"), counts)
+    series = CountSeries(path)
+
+    assert series.peak_count == counts.peak_count
+    for seconds in SERIES_RESOLUTIONS.values():
+        expected = {point["second"]: point["count"] for point in counts.counts_per_second(seconds)}
+        points = series.points(seconds)
+        assert [point["second"] for point in points] == sorted(expected)
+        assert [round(point["count"]) for point in points] == [expected[point["second"]] for point in points]
+
+
+def test_levels_are_memory_mapped_independently(tmp_path):
+    counts = _accumulator()
+    series = CountSeries(write_series(str(tmp_path / "video.series.bin"), counts))
+
+    minute = series.level(60)
+    assert isinstance(minute, np.memmap)
+    assert len(minute) == 22
+    assert int(minute["frames"].sum()) == counts.sampled_frames
+    assert int(minute["peak"].max()) == counts.peak_count
+    base = series.level(1)
+    assert int(base["sum"].sum()) == int(minute["sum"].sum())
+    assert not base["frames"][100:200].any()
+
+
+def test_bucket_seconds_for_picks_the_finest_level_that_fits(tmp_path):
+    series = CountSeries(write_series(str(tmp_path / "video.series.bin"), _accumulator()))
+
+    assert series.bucket_seconds_for(2000) == 1
+    assert series.bucket_seconds_for(600) == 10
+    assert series.bucket_seconds_for(30) == 60
+    assert series.bucket_seconds_for(1) == 600
+
+
+def test_empty_series(tmp_path):
+    series = CountSeries(write_series(str(tmp_path / "empty.series.bin"), CountAccumulator(25.0)))
+
+    assert series.peak_count == 0
+    assert series.points(1) == []
+    assert series.points(600) == []
+
+
+def test_legacy_points_are_rolled_up():
+    series = CountSeries.from_points([{"second": second, "count": second % 4} for second in range(25)])
+
+    assert series.points(10) == [
+        {"second": 0, "count": 1.3, "peak": 3},
+        {"second": 10, "count": 1.7, "peak": 3},
+        {"second": 20, "count": 1.2, "peak": 3},
+    ]
+    assert series.peak_count == 3
+
+
+def test_rejects_files_that_are_not_series(tmp_path):
+    path = tmp_path / "bogus.series.bin"
+    path.write_bytes(b"not a series file at all")
+
+    with pytest.raises(ValueError):
+        CountSeries(str(path))
@@ -0,0 +1,80 @@
+import pytest
+
+from app.services import store
+from app.services.sqlite_store import SqliteRecordStore
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def record_store(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STORE_BACKEND", request.param)
+    monkeypatch.setattr(store, "ANALYTICS_STORE_STR", str(tmp_path / "analytics.json"))
+    monkeypatch.setattr(store, "_sqlite_store", SqliteRecordStore(str(tmp_path / "analytics.db")))
+    return request.param
+
+
+def _append(count, prefix):
+    return [
+        store.append_video_record(f"{prefix}_{index}.mp4", index % 5, "completed" if index % 3 else "failed")
+        for index in range(count)
+    ]
+
+
+def _all_ids(**filters):
+    return [record["id"] for _, record in store.iter_video_records(**filters)]
+
+
+def test_pages_cover_every_record_once(record_store):
+    _append(40, "cam")
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.list_video_records(7, cursor=cursor)
+        seen += [record["id"] for record in page]
+        if cursor is None:
+            break
+
+    assert seen == _all_ids()
+    assert len(set(seen)) == 40
+
+
+def test_pages_stay_stable_across_inserts_and_deletes(record_store):
+    _append(30, "cam")
+    expected = _all_ids()
+
+    first, cursor = store.list_video_records(10)
+    # Newer uploads land before the cursor; a deleted record that was not
+    # yet listed simply drops out.
+    _append(5, "late")
+    store.delete_video_record(expected[15])
+    store.delete_video_record(expected[2])
+
+    seen = [record["id"] for record in first]
+    while cursor is not None:
+        page, cursor = store.list_video_records(10, cursor=cursor)
+        seen += [record["id"] for record in page]
+
+    assert seen == [record_id for record_id in expected if record_id != expected[15]]
+
+
+def test_filters_apply_within_pages(record_store):
+    _append(20, "cam")
+    _append(20, "lobby")
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.list_video_records(4, cursor=cursor, status="failed", name_prefix="lobby")
+        seen += page
+        if cursor is None:
+            break
+
+    assert seen
+    assert all(record["status"] == "failed" and record["video_name"].startswith("lobby") for record in seen)
+    assert [record["id"] for record in seen] == _all_ids(status="failed", name_prefix="lobby")
+
+
+@pytest.mark.parametrize("cursor", ["junk", "0", "-3", "no-separator"])
+def test_invalid_cursors_are_rejected(record_store, cursor):
+    _append(3, "cam")
+
+    with pytest.raises(ValueError):
+        store.list_video_records(5, cursor=cursor)
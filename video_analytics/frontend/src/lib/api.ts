@@ -1,5 +1,5 @@
 import { API_BASE_URL } from "@/config/env";
-import { requestBlob, requestJson, toBackendAssetUrl } from "@/lib/http";
+import { buildApiUrl, requestBlob, requestJson, toBackendAssetUrl } from "@/lib/http";
 
 interface ApiResponse<T> {
   data: T;
@@ -7,35 +7,52 @@ interface ApiResponse<T> {
   message?: string;
 }
 
+type ProcessingMode = "annotated" | "analytics";
+
 interface UploadResponse {
   message: string;
   job_id: string;
-  status: "processing";
+  status: "queued" | "processing" | "completed";
+  queue_position: number;
   frame_stride: number;
+  mode: ProcessingMode;
+  cache_hit?: boolean;
 }
 
 interface UploadJobStatus {
   job_id: string;
   record_id: string;
   video_name: string;
-  status: "processing" | "completed" | "failed";
+  status: "queued" | "processing" | "completed" | "failed";
   progress: number;
+  queue_position?: number;
   frame_stride?: number;
   processed_frames?: number;
   total_frames?: number;
   total_person_count?: number;
   processed_video?: string;
+  playlist?: string;
   error?: string;
   started_at?: string;
   updated_at?: string;
   completed_at?: string;
 }
 
+interface LiveStream {
+  stream_id: string;
+  name: string;
+  state: "connecting" | "running" | "reconnecting" | "stopped" | "failed";
+  current_count: number;
+  window_peak_count: number;
+  window_average_count: number;
+}
+
 interface AnalyticsData {
   total_videos: number;
   total_persons: number;
   total_processing_time_seconds?: number;
   active_cameras: number;
+  live_streams: LiveStream[];
   todays_detections: number;
   hourly_analytics: { hour: string; detections: number; uploads: number }[];
   person_count_per_video: { video: string; count: number }[];
@@ -62,18 +79,33 @@ interface VideoDetails {
     total_frames?: number;
     duration_seconds?: number;
     peak_count?: number;
-    counts_per_second?: { second: number; count: number }[];
+    series_file?: string;
   };
 }
 
+interface SeriesPoint {
+  second: number;
+  count: number;
+  peak: number;
+}
+
+interface VideoSeries {
+  resolution: string;
+  bucket_seconds: number;
+  available: string[];
+  peak_count: number;
+  duration_seconds: number;
+  points: SeriesPoint[];
+}
+
 async function apiRequest<T>(endpoint: string, options?: RequestInit): Promise<ApiResponse<T>> {
   return requestJson<ApiResponse<T>>(endpoint, options);
 }
 
-export async function uploadVideo(file: File): Promise<UploadResponse> {
+export async function uploadVideo(file: File, mode: ProcessingMode = "annotated"): Promise<UploadResponse> {
   const formData = new FormData();
   formData.append("file", file);
-  return requestJson<UploadResponse>("/upload-video", {
+  return requestJson<UploadResponse>(`/upload-video?mode=${mode}`, {
     method: "POST",
     body: formData,
   });
@@ -81,13 +113,63 @@ export async function uploadVideo(file: File): Promise<UploadResponse> {
 
 export async function getUploadJobStatus(jobId: string): Promise<UploadJobStatus> {
   const response = await apiRequest<UploadJobStatus>(`/api/jobs/${jobId}`);
-  const data = response.data;
+  return normalizeJobStatus(response.data);
+}
+
+function normalizeJobStatus(data: UploadJobStatus): UploadJobStatus {
   if (data?.processed_video) {
     data.processed_video = toBackendAssetUrl(data.processed_video);
   }
+  if (data?.playlist) {
+    data.playlist = toBackendAssetUrl(data.playlist);
+  }
   return data;
 }
 
+// Follows a job over the server-sent event stream until it completes or
+// fails, falling back to polling when the stream is unavailable.
+export function waitForUploadJob(
+  jobId: string,
+  onUpdate: (status: UploadJobStatus) => void
+): Promise<UploadJobStatus> {
+  const poll = async (): Promise<UploadJobStatus> => {
+    while (true) {
+      const status = await getUploadJobStatus(jobId);
+      onUpdate(status);
+      if (status.status === "completed" || status.status === "failed") {
+        return status;
+      }
+      await new Promise((resolve) => window.setTimeout(resolve, 2000));
+    }
+  };
+
+  if (typeof EventSource === "undefined") {
+    return poll();
+  }
+
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(buildApiUrl(`/api/jobs/events?job_ids=${encodeURIComponent(jobId)}`));
+    let settled = false;
+
+    source.addEventListener("job", (event) => {
+      const status = normalizeJobStatus(JSON.parse((event as MessageEvent).data) as UploadJobStatus);
+      onUpdate(status);
+      if (status.status === "completed" || status.status === "failed") {
+        settled = true;
+        source.close();
+        resolve(status);
+      }
+    });
+
+    source.onerror = () => {
+      if (settled) return;
+      settled = true;
+      source.close();
+      poll().then(resolve, reject);
+    };
+  });
+}
+
 export async function getAnalytics(): Promise<ApiResponse<AnalyticsData>> {
   return apiRequest<AnalyticsData>("/api/analytics");
 }
@@ -100,6 +182,14 @@ export async function getVideoDetails(videoId: string): Promise<ApiResponse<Vide
   return apiRequest<VideoDetails>(`/api/videos/${videoId}`);
 }
 
+export async function getVideoSeries(
+  videoId: string,
+  resolution = "auto",
+  maxPoints = 600,
+): Promise<ApiResponse<VideoSeries>> {
+  return apiRequest<VideoSeries>(`/api/videos/${videoId}/series?resolution=${resolution}&max_points=${maxPoints}`);
+}
+
 export async function deleteVideo(videoId: string): Promise<void> {
   await requestJson<{ success: boolean; message: string }>(`/api/videos/${videoId}`, {
     method: "DELETE",
@@ -107,4 +197,4 @@ export async function deleteVideo(videoId: string): Promise<void> {
 }
 
 export { API_BASE_URL };
-export type { ApiResponse, UploadResponse, UploadJobStatus, AnalyticsData, VideoDetails };
+export type { ApiResponse, ProcessingMode, UploadResponse, UploadJobStatus, AnalyticsData, LiveStream, VideoDetails, SeriesPoint, VideoSeries };
@@ -1,6 +1,6 @@
 import { API_BASE_URL } from "@/config/env";
 
-function buildApiUrl(endpoint: string): string {
+export function buildApiUrl(endpoint: string): string {
   if (/^https?:\/\//i.test(endpoint)) {
     return endpoint;
   }
@@ -1,4 +1,4 @@
-import { Video, Users, Eye, Download } from "lucide-react";
+import { Video, Users, Eye, Download, Camera } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { StatCard } from "@/components/StatCard";
 import { HourlyAnalyticsChart, ProcessedVideoPanel } from "@/components/AnalyticsCharts";
@@ -8,8 +8,10 @@ import {
   downloadReport,
   getAnalytics,
   getVideoDetails,
+  getVideoSeries,
   type AnalyticsData,
   type VideoDetails,
+  type VideoSeries,
 } from "@/lib/api";
 import { toBackendAssetUrl } from "@/lib/http";
 import { toast } from "@/hooks/use-toast";
@@ -23,6 +25,8 @@ interface SelectedVideoHourlyEntry {
 
 type TimelineGranularity = "seconds" | "minutes" | "hours";
 
+const LIVE_REFRESH_MS = 5000;
+
 interface SelectedVideoTimeline {
   data: SelectedVideoHourlyEntry[];
   ticks: number[];
@@ -66,8 +70,8 @@ function buildTimelineTicks(endSecond: number, bucketSizeSeconds: number): numbe
   return ticks;
 }
 
-function buildSelectedVideoTimeline(video: VideoDetails): SelectedVideoTimeline {
-  const timeline = video.details.counts_per_second ?? [];
+function buildSelectedVideoTimeline(video: VideoDetails, series: VideoSeries | null): SelectedVideoTimeline {
+  const timeline = series?.points ?? [];
   const maxSecondFromData = timeline.length > 0 ? Math.max(...timeline.map((p) => p.second)) : 0;
   const durationSeconds = Math.max(
     maxSecondFromData,
@@ -154,6 +158,7 @@ export default function Dashboard() {
   const [analytics, setAnalytics] = useState<AnalyticsData | null>(null);
   const [loading, setLoading] = useState(true);
   const [selectedVideo, setSelectedVideo] = useState<VideoDetails | null>(null);
+  const [selectedSeries, setSelectedSeries] = useState<VideoSeries | null>(null);
   const [deletingId, setDeletingId] = useState<string | null>(null);
   const hasViewedVideo = selectedVideo !== null;
 
@@ -182,6 +187,14 @@ export default function Dashboard() {
     fetchAnalytics();
   }, []);
 
+  const hasLiveStreams = (analytics?.live_streams?.length ?? 0) > 0;
+
+  useEffect(() => {
+    if (!hasLiveStreams) return;
+    const timer = window.setInterval(fetchAnalytics, LIVE_REFRESH_MS);
+    return () => window.clearInterval(timer);
+  }, [hasLiveStreams]);
+
   const handleDownloadReport = async () => {
     try {
       const blob = await downloadReport();
@@ -203,11 +216,16 @@ export default function Dashboard() {
 
   const handleViewVideo = async (videoId: string) => {
     try {
-      const response = await getVideoDetails(videoId);
+      // Failed or legacy videos may have no count series; the chart is then flat.
+      const [response, series] = await Promise.all([
+        getVideoDetails(videoId),
+        getVideoSeries(videoId).then((result) => result.data).catch(() => null),
+      ]);
       const details = response.data;
       if (details.processedVideo && !details.processedVideo.startsWith("http")) {
         details.processedVideo = toBackendAssetUrl(details.processedVideo);
       }
+      setSelectedSeries(series);
       setSelectedVideo(details);
     } catch {
       toast({
@@ -224,6 +242,7 @@ export default function Dashboard() {
       await deleteVideo(videoId);
       if (selectedVideo?.id === videoId) {
         setSelectedVideo(null);
+        setSelectedSeries(null);
       }
       await fetchAnalytics();
       toast({ title: "Video deleted permanently" });
@@ -239,8 +258,8 @@ export default function Dashboard() {
   };
 
   const selectedVideoTimeline = useMemo(
-    () => (selectedVideo ? buildSelectedVideoTimeline(selectedVideo) : null),
-    [selectedVideo],
+    () => (selectedVideo ? buildSelectedVideoTimeline(selectedVideo, selectedSeries) : null),
+    [selectedVideo, selectedSeries],
   );
 
   const zeroedHourlyAnalytics = useMemo(
@@ -314,6 +333,30 @@ export default function Dashboard() {
         />
       </div>
 
+      {hasLiveStreams && (
+        <div className="space-y-2">
+          <h2 className="text-sm font-medium text-muted-foreground">
+            Live Cameras ({analytics?.active_cameras ?? 0} active)
+          </h2>
+          <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-4">
+            {analytics?.live_streams.map((stream) => (
+              <StatCard
+                key={stream.stream_id}
+                title={stream.name}
+                value={stream.state === "running" ? stream.current_count : "-"}
+                change={
+                  stream.state === "running"
+                    ? `Peak ${stream.window_peak_count}, avg ${stream.window_average_count} recently`
+                    : `Stream ${stream.state}`
+                }
+                changeType={stream.state === "running" ? "positive" : "negative"}
+                icon={Camera}
+              />
+            ))}
+          </div>
+        </div>
+      )}
+
       <div className="grid grid-cols-1 lg:grid-cols-2 gap-4">
         <HourlyAnalyticsChart
           data={hourlyChartData}
@@ -3,7 +3,7 @@ import { Upload, X, FileVideo, Loader2, CheckCircle, RotateCcw } from "lucide-re
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Progress } from "@/components/ui/progress";
-import { getUploadJobStatus, uploadVideo } from "@/lib/api";
+import { uploadVideo, waitForUploadJob } from "@/lib/api";
 import { toast } from "@/hooks/use-toast";
 
 const SUPPORTED_VIDEO_EXTENSIONS = [
@@ -33,6 +33,7 @@ export default function UploadVideo() {
   const [file, setFile] = useState<File | null>(null);
   const [uploading, setUploading] = useState(false);
   const [processedVideoUrl, setProcessedVideoUrl] = useState<string | null>(null);
+  const [playlistUrl, setPlaylistUrl] = useState<string | null>(null);
   const [processingProgress, setProcessingProgress] = useState(0);
   const [processingSeconds, setProcessingSeconds] = useState(0);
   const processingStartTimeRef = useRef<number | null>(null);
@@ -76,6 +77,7 @@ export default function UploadVideo() {
   const handleSubmit = async () => {
     if (!file) return;
     setProcessedVideoUrl(null);
+    setPlaylistUrl(null);
     setProcessingProgress(0);
     setProcessingSeconds(0);
     processingStartTimeRef.current = Date.now();
@@ -87,27 +89,22 @@ export default function UploadVideo() {
         description: `Processing started (sampling every ${response.frame_stride} frame(s)).`,
       });
 
-      while (true) {
-        const status = await getUploadJobStatus(response.job_id);
-        setProcessingProgress(status.progress ?? 0);
-
-        if (status.status === "completed") {
-          setProcessedVideoUrl(status.processed_video ?? null);
-          setProcessingProgress(100);
-          toast({
-            title: "Processing complete",
-            description: `Total person count: ${status.total_person_count ?? 0}`,
-          });
-          break;
-        }
-
-        if (status.status === "failed") {
-          throw new Error(status.error || "Video processing failed.");
-        }
+      const status = await waitForUploadJob(response.job_id, (update) => {
+        setProcessingProgress(update.progress ?? 0);
+        setPlaylistUrl(update.playlist || null);
+      });
 
-        await new Promise((resolve) => window.setTimeout(resolve, 2000));
+      if (status.status === "failed") {
+        throw new Error(status.error || "Video processing failed.");
       }
 
+      setProcessedVideoUrl(status.processed_video || null);
+      setProcessingProgress(100);
+      toast({
+        title: "Processing complete",
+        description: `Total person count: ${status.total_person_count ?? 0}`,
+      });
+
       if (processingStartTimeRef.current) {
         const elapsedSeconds = Math.max(
           1,
@@ -131,6 +128,7 @@ export default function UploadVideo() {
   const clearFile = () => {
     setFile(null);
     setProcessedVideoUrl(null);
+    setPlaylistUrl(null);
     setProcessingProgress(0);
     setProcessingSeconds(0);
     processingStartTimeRef.current = null;
@@ -246,6 +244,16 @@ export default function UploadVideo() {
                     <span>{processingProgress}%</span>
                   </div>
                   <Progress value={processingProgress} />
+                  {playlistUrl && (
+                    <a
+                      href={playlistUrl}
+                      target="_blank"
+                      rel="noreferrer"
+                      className="text-sm font-medium text-primary underline-offset-4 hover:underline"
+                    >
+                      Watch while processing (HLS)
+                    </a>
+                  )}
                 </div>
               )}
             </div>